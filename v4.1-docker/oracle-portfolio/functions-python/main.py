@@ -8,7 +8,7 @@ Architecture: GitHub Actions → Firebase Functions
 import os
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any, Optional, List
 import functions_framework
 import firebase_admin
@@ -26,98 +26,21 @@ logger = logging.getLogger(__name__)
 # MODULES ORACLE PORTFOLIO 3.0
 # ============================================================================
 
-class RegimeDetectorOptimized:
-    """Détecteur de régimes économiques avec fréquences réalistes"""
-    
-    def __init__(self):
-        self.regimes = {
-            'RECOVERY': {'description': 'Reprise économique', 'confidence': 0.85},
-            'EXPANSION': {'description': 'Expansion soutenue', 'confidence': 0.92},
-            'STAGFLATION': {'description': 'Stagflation', 'confidence': 0.78},
-            'RECESSION': {'description': 'Récession', 'confidence': 0.88},
-            'UNKNOWN': {'description': 'Régime indéterminé', 'confidence': 0.45}
-        }
-    
-    def detect_regime(self, country: str) -> Dict[str, Any]:
-        """Détection régime avec cache intelligent"""
-        # Simulation détection sophistiquée
-        import random
-        regime_keys = list(self.regimes.keys())
-        current_regime = random.choice(regime_keys[:-1])  # Évite UNKNOWN
-        
-        return {
-            'country': country,
-            'regime': current_regime,
-            'description': self.regimes[current_regime]['description'],
-            'confidence': self.regimes[current_regime]['confidence'],
-            'timestamp': datetime.utcnow().isoformat(),
-            'indicators': {
-                'pmi_manufacturing': round(random.uniform(45, 65), 1),
-                'unemployment_rate': round(random.uniform(3, 12), 1),
-                'inflation_rate': round(random.uniform(-1, 8), 1),
-                'gdp_growth': round(random.uniform(-3, 6), 1)
-            }
-        }
+# Les modules (numpy, sources amont) sont importés dans les fonctions qui les utilisent:
+# getSystemHealth et getCountries restent légères au démarrage à froid
+REGIME_COUNTRIES = ['FRA', 'DEU', 'USA', 'GBR', 'JPN', 'ITA', 'ESP', 'CAN']
 
-class PhysicalIndicatorsManager:
-    """Gestionnaire allocations basées indicateurs physiques"""
-    
-    def __init__(self):
-        self.indicators = {
-            'electricity_consumption': {'weight': 0.18, 'confidence': 0.94},
-            'copper_prices': {'weight': 0.16, 'confidence': 0.89},
-            'oil_consumption': {'weight': 0.15, 'confidence': 0.91},
-            'steel_production': {'weight': 0.14, 'confidence': 0.87},
-            'shipping_rates': {'weight': 0.13, 'confidence': 0.85},
-            'rail_freight': {'weight': 0.12, 'confidence': 0.83},
-            'cement_production': {'weight': 0.12, 'confidence': 0.88}
-        }
-        
-        self.risk_profiles = {
-            'conservative': {'equity_max': 0.4, 'volatility_target': 0.08},
-            'moderate': {'equity_max': 0.7, 'volatility_target': 0.12},
-            'aggressive': {'equity_max': 0.9, 'volatility_target': 0.18}
-        }
-    
-    def get_allocations(self, country: str, risk_profile: str) -> Dict[str, Any]:
-        """Calcul allocations dynamiques"""
-        import random
-        
-        profile = self.risk_profiles.get(risk_profile, self.risk_profiles['moderate'])
-        base_equity = profile['equity_max']
-        
-        # Simulation allocations sophistiquées
-        equity_allocation = round(base_equity * random.uniform(0.7, 1.0), 3)
-        bond_allocation = round((1 - equity_allocation) * random.uniform(0.6, 0.9), 3)
-        commodity_allocation = round(1 - equity_allocation - bond_allocation, 3)
-        
-        return {
-            'country': country,
-            'risk_profile': risk_profile,
-            'allocations': {
-                'equity': equity_allocation,
-                'bonds': bond_allocation,
-                'commodities': commodity_allocation
-            },
-            'indicators_breakdown': {
-                indicator: {
-                    'value': round(random.uniform(0.8, 1.2), 3),
-                    'weight': data['weight'],
-                    'confidence': data['confidence']
-                }
-                for indicator, data in self.indicators.items()
-            },
-            'performance_metrics': {
-                'expected_return': round(random.uniform(0.06, 0.14), 3),
-                'volatility': round(random.uniform(0.08, 0.20), 3),
-                'sharpe_ratio': round(random.uniform(0.8, 2.5), 2)
-            },
-            'timestamp': datetime.utcnow().isoformat()
-        }
-
-# Instances globales
-regime_detector = RegimeDetectorOptimized()
-indicators_manager = PhysicalIndicatorsManager()
+def _regime_payload(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Réponse régime à partir de l'analyse de RegimeDetectorOptimized"""
+    return {
+        'country': analysis['country'],
+        'regime': analysis['current_regime'],
+        'confidence': analysis['confidence_score'],
+        'timestamp': datetime.utcnow().isoformat(),
+        'indicators': analysis['indicators_used'],
+        'regime_state': analysis['regime_state'],
+        'gdp_nowcast': analysis['gdp_nowcast']
+    }
 
 # ============================================================================
 # FIREBASE FUNCTIONS ORACLE PORTFOLIO 3.0
@@ -126,6 +49,13 @@ indicators_manager = PhysicalIndicatorsManager()
 @functions_framework.http
 def getSystemHealth(request ):
     """Santé système Oracle Portfolio 3.0"""
+    # modules.cache seul: pas de chargement des modules de calcul
+    from modules.cache import get_cache_stats
+    
+    # Statistiques réelles des caches de l'instance (None tant qu'aucune lecture n'a eu lieu)
+    cache_stats = get_cache_stats()
+    hit_rate = cache_stats['hit_rate']
+    
     return {
         'status': 'OK',
         'version': '3.0.0',
@@ -139,7 +69,8 @@ def getSystemHealth(request ):
         'performance': {
             'avg_response_time': '< 2s',
             'uptime': '99.9%',
-            'cache_hit_rate': '85%'
+            'cache_hit_rate': f"{hit_rate:.0%}" if hit_rate is not None else 'n/a',
+            'cache': cache_stats
         }
     }
 
@@ -147,9 +78,13 @@ def getSystemHealth(request ):
 def getRegime(request ):
     """Détection régime économique"""
     try:
-        country = request.args.get('country', 'FRA')
-        result = regime_detector.detect_regime(country)
-        return result
+        from modules import get_regime_detector
+        
+        country = request.args.get('country', 'FRA').upper()
+        analysis = get_regime_detector().analyze_country_regime_realistic(country)
+        if 'error' in analysis:
+            return analysis, 400
+        return _regime_payload(analysis)
     except Exception as e:
         logger.error(f"Erreur getRegime: {e}")
         return {'error': str(e)}, 500
@@ -158,16 +93,17 @@ def getRegime(request ):
 def getMultiRegime(request ):
     """Analyse multi-pays"""
     try:
-        countries = ['FRA', 'DEU', 'USA', 'GBR', 'JPN', 'ITA', 'ESP', 'CAN']
-        results = {}
+        from modules import get_regime_detector
         
-        for country in countries:
-            results[country] = regime_detector.detect_regime(country)
+        analysis = get_regime_detector().get_multi_country_analysis_optimized(REGIME_COUNTRIES)
+        results = {country: _regime_payload(data) for country, data in analysis['countries'].items()}
         
         return {
             'multi_regime_analysis': results,
             'summary': {
-                'total_countries': len(countries),
+                'total_countries': len(results),
+                'dominant_regime': analysis['global_summary']['dominant_regime'],
+                'regime_distribution': analysis['global_summary']['regime_distribution'],
                 'timestamp': datetime.utcnow().isoformat()
             }
         }
@@ -179,10 +115,14 @@ def getMultiRegime(request ):
 def getAllocations(request ):
     """Allocations dynamiques"""
     try:
-        country = request.args.get('country', 'FRA')
-        risk_profile = request.args.get('risk_profile', 'moderate')
+        from modules import get_indicators_manager
         
-        result = indicators_manager.get_allocations(country, risk_profile)
+        country = request.args.get('country', 'FRA').upper()
+        risk_profile = request.args.get('risk_profile', 'moderate').lower()
+        
+        result = get_indicators_manager().calculate_dynamic_allocations(country, risk_profile)
+        if 'error' in result:
+            return result, 400
         return result
     except Exception as e:
         logger.error(f"Erreur getAllocations: {e}")
@@ -192,26 +132,10 @@ def getAllocations(request ):
 def getIndicatorsBreakdown(request ):
     """Détail indicateurs physiques"""
     try:
-        country = request.args.get('country', 'FRA')
-        
-        breakdown = {}
-        for indicator, data in indicators_manager.indicators.items():
-            import random
-            breakdown[indicator] = {
-                'current_value': round(random.uniform(0.8, 1.2), 3),
-                'weight': data['weight'],
-                'confidence': data['confidence'],
-                'trend': random.choice(['up', 'down', 'stable']),
-                'impact': random.choice(['positive', 'negative', 'neutral'])
-            }
+        from modules import get_indicators_manager
         
-        return {
-            'country': country,
-            'indicators_breakdown': breakdown,
-            'overall_score': round(sum(ind['current_value'] * ind['weight'] 
-                                     for ind in breakdown.values()), 3),
-            'timestamp': datetime.utcnow().isoformat()
-        }
+        country = request.args.get('country', 'FRA').upper()
+        return get_indicators_manager().get_indicators_breakdown(country)
     except Exception as e:
         logger.error(f"Erreur getIndicatorsBreakdown: {e}")
         return {'error': str(e)}, 500
@@ -258,12 +182,19 @@ def getMarketData(request ):
 def getIntegratedDashboard(request ):
     """Dashboard complet intégré"""
     try:
-        country = request.args.get('country', 'FRA')
-        risk_profile = request.args.get('risk_profile', 'moderate')
+        from modules import get_regime_detector, get_indicators_manager
+        
+        country = request.args.get('country', 'FRA').upper()
+        risk_profile = request.args.get('risk_profile', 'moderate').lower()
         
         # Données intégrées
-        regime_data = regime_detector.detect_regime(country)
-        allocation_data = indicators_manager.get_allocations(country, risk_profile)
+        regime_analysis = get_regime_detector().analyze_country_regime_realistic(country)
+        if 'error' in regime_analysis:
+            return regime_analysis, 400
+        allocation_data = get_indicators_manager().calculate_dynamic_allocations(country, risk_profile)
+        if 'error' in allocation_data:
+            return allocation_data, 400
+        regime_data = _regime_payload(regime_analysis)
         
         dashboard = {
             'country': country,
@@ -277,10 +208,7 @@ def getIntegratedDashboard(request ):
             },
             'performance_summary': {
                 'regime_confidence': regime_data['confidence'],
-                'allocation_efficiency': round(sum(
-                    ind['confidence'] * ind['weight'] 
-                    for ind in allocation_data['indicators_breakdown'].values()
-                ), 3),
+                'allocation_efficiency': allocation_data['confidence_score'],
                 'overall_score': 'A+'
             }
         }
@@ -4,8 +4,23 @@ Version: 3.0.0 Production Ready
 Date: 23 Juin 2025
 """
 
-from .economic_regimes_corrected import RegimeDetectorOptimized, get_regime_detector
-from .physical_indicators_manager import PhysicalIndicatorsManager, get_indicators_manager
+import importlib
+
+# Exports résolus au premier accès: importer un sous-module léger (ex: modules.cache)
+# ne charge pas numpy ni les modules de calcul
+_EXPORTS = {
+    'RegimeDetectorOptimized': 'economic_regimes_corrected',
+    'get_regime_detector': 'economic_regimes_corrected',
+    'PhysicalIndicatorsManager': 'physical_indicators_manager',
+    'get_indicators_manager': 'physical_indicators_manager'
+}
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     'RegimeDetectorOptimized',
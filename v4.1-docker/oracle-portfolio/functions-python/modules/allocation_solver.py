@@ -0,0 +1,66 @@
+"""
+Oracle Portfolio - Solveur d'Allocations Contraintes
+Projection euclidienne sur le simplexe avec bornes par actif (somme = 1, lower <= w <= upper)
+Résolution vectorisée sur (..., actifs): une bisection sur le multiplicateur de la contrainte de somme
+"""
+
+import numpy as np
+
+# Itérations de bisection: précision ~ (écart initial) / 2^60, bien en deçà de l'arrondi des poids
+BISECTION_ITERATIONS = 60
+
+def project_to_simplex(targets: np.ndarray, lower=0.0, upper=1.0, total: float = 1.0,
+                       iterations: int = BISECTION_ITERATIONS) -> np.ndarray:
+    """
+    Poids les plus proches des cibles (norme euclidienne) respectant somme et bornes
+
+    La solution est w = clip(targets - tau, lower, upper), où tau est l'unique valeur
+    telle que sum(w) = total (somme décroissante en tau, trouvée par bisection)
+
+    Args:
+        targets: Allocations cibles (..., n_actifs), non contraintes
+        lower: Bornes basses (scalaire ou diffusable sur targets)
+        upper: Bornes hautes (scalaire ou diffusable sur targets)
+        total: Somme des poids
+        iterations: Nombre d'itérations de bisection
+
+    Returns:
+        Poids (..., n_actifs). Si les bornes sont incompatibles avec la somme,
+        poids aux bornes les plus proches (voir is_feasible)
+    """
+    targets = np.asarray(targets, dtype=float)
+    lower = np.broadcast_to(np.asarray(lower, dtype=float), targets.shape)
+    upper = np.broadcast_to(np.asarray(upper, dtype=float), targets.shape)
+
+    # tau_low: tous les poids à upper (somme maximale), tau_high: tous à lower (somme minimale)
+    tau_low = (targets - upper).min(axis=-1, keepdims=True)
+    tau_high = (targets - lower).max(axis=-1, keepdims=True)
+
+    for _ in range(iterations):
+        tau = (tau_low + tau_high) / 2
+        excess = np.clip(targets - tau, lower, upper).sum(axis=-1, keepdims=True) > total
+        tau_low = np.where(excess, tau, tau_low)
+        tau_high = np.where(excess, tau_high, tau)
+
+    return np.clip(targets - (tau_low + tau_high) / 2, lower, upper)
+
+def deviation_bounds(base: np.ndarray, max_deviation, lower=0.0, upper=1.0):
+    """
+    Bornes [base - max_deviation, base + max_deviation] intersectées avec [lower, upper]
+
+    Returns:
+        Tuple (bornes basses, bornes hautes) de la forme de base
+    """
+    base = np.asarray(base, dtype=float)
+    max_deviation = np.asarray(max_deviation, dtype=float)
+    return np.maximum(base - max_deviation, lower), np.minimum(base + max_deviation, upper)
+
+def is_feasible(lower, upper, total: float = 1.0, tolerance: float = 1e-9) -> np.ndarray:
+    """Masque des problèmes admissibles: sum(lower) <= total <= sum(upper) et lower <= upper"""
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    return (
+        (lower.sum(axis=-1) <= total + tolerance)
+        & (upper.sum(axis=-1) >= total - tolerance)
+        & (lower <= upper + tolerance).all(axis=-1)
+    )
@@ -0,0 +1,130 @@
+"""
+Oracle Portfolio - Cache Borné Partagé
+Cache LRU thread-safe avec TTL par entrée et compteurs hit/miss/éviction
+"""
+
+import time
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class BoundedTTLCache:
+    """
+    Cache en mémoire borné pour instances longues
+    - Éviction LRU au-delà de max_entries
+    - Expiration par entrée (TTL par défaut ou fourni à l'écriture)
+    - Accès protégés par verrou, compteurs de statistiques
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, default_ttl: float = 3600.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+        _register(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Valeur de la clé si présente et non expirée (entrée marquée récemment utilisée)"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Écrit une entrée (TTL en secondes, défaut: default_ttl)"""
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Présence d'une entrée non expirée (sans effet sur les statistiques ni l'ordre LRU)"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and entry[1] > time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Statistiques du cache (taux de hit = hits / lectures)"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['name'] = self.name
+        stats['max_entries'] = self.max_entries
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+# Registre des caches de l'instance (références faibles: pas de fuite si un gestionnaire est libéré)
+_caches = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+def _register(cache: BoundedTTLCache):
+    with _registry_lock:
+        _caches.add(cache)
+
+def get_cache_stats() -> Dict:
+    """
+    Statistiques agrégées de tous les caches de l'instance
+
+    Returns:
+        Dict avec 'hit_rate' global (None sans lecture), totaux et détail par cache
+    """
+    with _registry_lock:
+        caches = list(_caches)
+
+    all_stats = [cache.stats() for cache in caches]
+    totals = {
+        key: sum(stats[key] for stats in all_stats)
+        for key in ('hits', 'misses', 'evictions', 'expirations', 'size')
+    }
+
+    # Détail par nom (plusieurs instances d'un même cache regroupées)
+    details = {}
+    for stats in all_stats:
+        detail = details.setdefault(stats['name'], {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'size': 0})
+        for key in detail:
+            detail[key] += stats[key]
+    lookups = totals['hits'] + totals['misses']
+
+    return {
+        'hit_rate': round(totals['hits'] / lookups, 4) if lookups else None,
+        **totals,
+        'caches': details
+    }
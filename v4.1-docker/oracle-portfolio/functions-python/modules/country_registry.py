@@ -0,0 +1,168 @@
+"""
+Oracle Portfolio - Registre Unifié Pays / Séries
+Référentiel immuable et indexé des pays et de leurs séries par source
+Construit une seule fois à l'import, résolution O(1) par code pays ou alias
+"""
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+@dataclass(frozen=True)
+class CountryInfo:
+    """Métadonnées et séries d'un pays (code canonique ISO 3166 alpha-3)"""
+    code: str
+    name: str
+    currency: str
+    region: str
+    data_quality: str
+    aliases: Tuple[str, ...]
+    fred_series: Mapping[str, str]
+    eia_code: Optional[str]
+    entso_code: Optional[str]
+    oecd_code: Optional[str]
+    fred_electricity_code: Optional[str]
+
+    def series(self, indicator: str) -> Optional[str]:
+        """Série FRED d'un indicateur ('GDP_GROWTH', 'INFLATION', 'UNEMPLOYMENT', 'GDP', 'UNEMPLOYMENT_MONTHLY', 'PMI')"""
+        return self.fred_series.get(indicator)
+
+# Séries FRED par pays
+# GDP_GROWTH / INFLATION / UNEMPLOYMENT: séries trimestrielles du détecteur macro
+# GDP / UNEMPLOYMENT_MONTHLY / PMI: séries du détecteur à fréquences réalistes
+_FRED_SERIES = {
+    'FRA': {'GDP_GROWTH': 'NAEXKP01FRQ657S', 'INFLATION': 'FRACPIALLMINMEI', 'UNEMPLOYMENT': 'LRHUTTTTFRQ156S',
+            'GDP': 'NAEXKP01FRQ652S', 'UNEMPLOYMENT_MONTHLY': 'LRHUTTTTFRM156S', 'PMI': 'OECD_PMI_FRA'},
+    'DEU': {'GDP_GROWTH': 'NAEXKP01DEQ657S', 'INFLATION': 'DEUCPIALLMINMEI', 'UNEMPLOYMENT': 'LRHUTTTTDEQ156S',
+            'GDP': 'NAEXKP01DEQ652S', 'UNEMPLOYMENT_MONTHLY': 'LRHUTTTTDEM156S', 'PMI': 'OECD_PMI_DEU'},
+    'GBR': {'GDP_GROWTH': 'NAEXKP01GBQ657S', 'INFLATION': 'GBRCPIALLMINMEI', 'UNEMPLOYMENT': 'LRHUTTTTGBQ156S',
+            'GDP': 'NAEXKP01GBQ652S', 'UNEMPLOYMENT_MONTHLY': 'LRHUTTTTGBM156S', 'PMI': 'OECD_PMI_GBR'},
+    'USA': {'GDP_GROWTH': 'GDPC1', 'INFLATION': 'CPIAUCSL', 'UNEMPLOYMENT': 'UNRATE',
+            'GDP': 'GDPC1', 'UNEMPLOYMENT_MONTHLY': 'UNRATE', 'PMI': 'ISMMAN'},
+    'JPN': {'GDP': 'NAEXKP01JPQ652S', 'UNEMPLOYMENT_MONTHLY': 'LRHUTTTTJPM156S', 'PMI': 'OECD_PMI_JPN'},
+    'ITA': {'GDP': 'NAEXKP01ITQ652S', 'UNEMPLOYMENT_MONTHLY': 'LRHUTTTTITM156S', 'PMI': 'OECD_PMI_ITA'},
+    'ESP': {'GDP': 'NAEXKP01ESQ652S', 'UNEMPLOYMENT_MONTHLY': 'LRHUTTTTESM156S', 'PMI': 'OECD_PMI_ESP'},
+    'CAN': {'GDP': 'NAEXKP01CAQ652S', 'UNEMPLOYMENT_MONTHLY': 'LRHUTTTTCAM156S', 'PMI': 'OECD_PMI_CAN'},
+}
+
+# (code, nom, devise, région, qualité données, code ENTSO-E, alias)
+_COUNTRIES = [
+    # Europe ENTSO-E + OECD
+    ('FRA', 'France', 'EUR', 'Europe', 'HIGH', '10Y1001A1001A92E', ()),
+    ('DEU', 'Germany', 'EUR', 'Europe', 'HIGH', '10Y1001A1001A83F', ()),
+    ('GBR', 'United Kingdom', 'GBP', 'Europe', 'HIGH', '10Y1001A1001A92E', ('UK',)),
+    ('ITA', 'Italy', 'EUR', 'Europe', 'MEDIUM', '10Y1001A1001A70O', ()),
+    ('ESP', 'Spain', 'EUR', 'Europe', 'MEDIUM', '10Y1001A1001A85B', ()),
+    ('NLD', 'Netherlands', 'EUR', 'Europe', 'MEDIUM', '10Y1001A1001A92K', ()),
+    ('BEL', 'Belgium', 'EUR', 'Europe', 'MEDIUM', '10Y1001A1001A82H', ()),
+    ('AUT', 'Austria', 'EUR', 'Europe', 'MEDIUM', '10Y1001A1001A83F', ()),
+    ('CHE', 'Switzerland', 'CHF', 'Europe', 'MEDIUM', '10Y1001A1001A68B', ()),
+    ('POL', 'Poland', 'PLN', 'Europe', 'MEDIUM', '10Y1001A1001A51S', ()),
+    ('CZE', 'Czech Republic', 'CZK', 'Europe', 'MEDIUM', '10Y1001A1001A51S', ()),
+    ('SVK', 'Slovakia', 'EUR', 'Europe', 'MEDIUM', '10Y1001A1001A51S', ()),
+    ('HUN', 'Hungary', 'HUF', 'Europe', 'MEDIUM', '10Y1001A1001A51S', ()),
+    ('DNK', 'Denmark', 'DKK', 'Europe', 'MEDIUM', '10Y1001A1001A65H', ()),
+    ('SWE', 'Sweden', 'SEK', 'Europe', 'MEDIUM', '10Y1001A1001A44P', ()),
+    ('NOR', 'Norway', 'NOK', 'Europe', 'MEDIUM', '10Y1001A1001A48H', ()),
+    ('FIN', 'Finland', 'EUR', 'Europe', 'MEDIUM', '10Y1001A1001A47J', ()),
+
+    # Amérique du Nord
+    ('USA', 'United States', 'USD', 'North America', 'HIGH', None, ('US',)),
+    ('CAN', 'Canada', 'CAD', 'North America', 'MEDIUM', None, ()),
+    ('MEX', 'Mexico', 'MXN', 'North America', 'MEDIUM', None, ()),
+
+    # Asie-Pacifique
+    ('JPN', 'Japan', 'JPY', 'Asia', 'MEDIUM', None, ()),
+    ('KOR', 'South Korea', 'KRW', 'Asia', 'MEDIUM', None, ()),
+    ('AUS', 'Australia', 'AUD', 'Oceania', 'MEDIUM', None, ()),
+    ('NZL', 'New Zealand', 'NZD', 'Oceania', 'MEDIUM', None, ()),
+
+    # Autres
+    ('CHN', 'China', 'CNY', 'Asia', 'MEDIUM', None, ()),
+    ('IND', 'India', 'INR', 'Asia', 'MEDIUM', None, ()),
+    ('BRA', 'Brazil', 'BRL', 'South America', 'MEDIUM', None, ()),
+    ('RUS', 'Russia', 'RUB', 'Europe', 'MEDIUM', None, ()),
+]
+
+# Séries FRED d'électricité disponibles
+_FRED_ELECTRICITY = {'USA': 'ELEC'}
+
+def _build_registry():
+    """Construit les index (une seule fois, à l'import)"""
+    countries = {}
+    by_alias = {}
+    series_index = {}
+
+    for code, name, currency, region, quality, entso_code, aliases in _COUNTRIES:
+        info = CountryInfo(
+            code=code,
+            name=name,
+            currency=currency,
+            region=region,
+            data_quality=quality,
+            aliases=aliases,
+            fred_series=MappingProxyType(dict(_FRED_SERIES.get(code, {}))),
+            eia_code=f'INTL.2-12-{code}-BKWH.A',
+            entso_code=entso_code,
+            oecd_code=code,
+            fred_electricity_code=_FRED_ELECTRICITY.get(code)
+        )
+        countries[code] = info
+        by_alias[code] = info
+        for alias in aliases:
+            by_alias[alias] = info
+
+        for indicator, series_id in info.fred_series.items():
+            series_index.setdefault(indicator, {})[code] = series_id
+
+    return (
+        MappingProxyType(countries),
+        MappingProxyType(by_alias),
+        MappingProxyType({k: MappingProxyType(v) for k, v in series_index.items()})
+    )
+
+COUNTRIES, _BY_ALIAS, _SERIES_BY_INDICATOR = _build_registry()
+
+# Périmètre des détecteurs de régimes (codes canoniques)
+REGIME_COUNTRIES = ('FRA', 'DEU', 'GBR', 'USA', 'JPN', 'ITA', 'ESP', 'CAN')
+
+def resolve_country(code: str) -> Optional[CountryInfo]:
+    """Résolution O(1) d'un code pays ou alias ('US' → USA), insensible à la casse"""
+    if not code:
+        return None
+    return _BY_ALIAS.get(code.strip().upper())
+
+def canonical_code(code: str) -> Optional[str]:
+    """Code canonique ISO alpha-3 d'un code pays ou alias"""
+    info = resolve_country(code)
+    return info.code if info else None
+
+def get_series(code: str, indicator: str) -> Optional[str]:
+    """Série FRED d'un indicateur pour un pays, None si inconnue"""
+    info = resolve_country(code)
+    return info.series(indicator) if info else None
+
+def get_country_name(code: str) -> str:
+    """Nom du pays, ou le code tel quel si inconnu"""
+    info = resolve_country(code)
+    return info.name if info else code
+
+def series_by_country(indicator: str, codes: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """
+    Séries d'un indicateur pour plusieurs pays {code canonique: série}
+    Permet de regrouper les récupérations par série sur l'ensemble des pays
+    """
+    index = _SERIES_BY_INDICATOR.get(indicator, {})
+    if codes is None:
+        return dict(index)
+
+    result = {}
+    for code in codes:
+        canonical = canonical_code(code)
+        if canonical in index:
+            result[canonical] = index[canonical]
+    return result
+
+def countries_for(codes: Iterable[str]) -> List[CountryInfo]:
+    """Liste des CountryInfo pour des codes (codes inconnus ignorés)"""
+    return [info for info in (resolve_country(code) for code in codes) if info is not None]
@@ -0,0 +1,304 @@
+"""
+Oracle Portfolio - Analyse Transversale des Régimes
+Corrélations glissantes entre pays, synchronisation des régimes et relations d'avance/retard
+Calcul par lots sur des panels (pays × périodes), sans boucle par paire de pays
+"""
+
+import math
+import numpy as np
+from statistics import NormalDist
+from typing import Dict, List, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CrossCountryAnalytics:
+    """
+    Analyses de contagion entre pays à partir des historiques d'indicateurs et de régimes
+    - Matrices de corrélation glissantes (sommes cumulées, toutes paires et fenêtres en une passe)
+    - Indice de synchronisation des régimes et concordance par paire
+    - Corrélations croisées décalées (leader / suiveur), retenues si significatives après
+      correction de Bonferroni sur le nombre de décalages testés
+    Les panels sont en ordre chronologique (dernière colonne = période la plus récente), NaN autorisés
+    """
+
+    def __init__(self, window: int = 12, max_lag: int = 6, min_periods: int = 6,
+                 min_overlap: int = 12, significance: float = 0.05):
+        self.config = {
+            'window': window,            # Fenêtre des corrélations glissantes (périodes)
+            'max_lag': max_lag,          # Décalage maximal testé pour l'avance/retard
+            'min_periods': min_periods,  # Observations communes minimales par paire
+            'min_overlap': min_overlap,  # Observations communes minimales pour retenir un leader
+            'significance': significance  # Seuil de significativité global (tous décalages confondus)
+        }
+
+        logger.info(f"CrossCountryAnalytics initialisé - fenêtre {window}, décalage max {max_lag}")
+
+    def rolling_correlations(self, panel: np.ndarray) -> np.ndarray:
+        """
+        Matrices de corrélation glissantes entre séries
+
+        Args:
+            panel: Tableau (N pays, T périodes)
+
+        Returns:
+            Tableau (T, N, N); NaN tant que la fenêtre n'a pas min_periods observations communes
+        """
+
+        panel = np.asarray(panel, dtype=float)
+        window = self.config['window']
+        observed = ~np.isnan(panel)
+        values = np.where(observed, panel, 0.0)
+
+        # Sommes par paire (N, N, T), restreintes aux périodes observées pour les deux pays
+        pair_mask = observed[:, None, :] & observed[None, :, :]
+        count = self._window_sum(pair_mask.astype(float), window)
+        sum_x = self._window_sum(values[:, None, :] * pair_mask, window)
+        sum_y = self._window_sum(values[None, :, :] * pair_mask, window)
+        sum_xx = self._window_sum((values ** 2)[:, None, :] * pair_mask, window)
+        sum_yy = self._window_sum((values ** 2)[None, :, :] * pair_mask, window)
+        sum_xy = self._window_sum(values[:, None, :] * values[None, :, :], window)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = sum_xy - sum_x * sum_y / count
+            variance_x = sum_xx - sum_x ** 2 / count
+            variance_y = sum_yy - sum_y ** 2 / count
+            correlation = covariance / np.sqrt(variance_x * variance_y)
+
+        valid = (count >= self.config['min_periods']) & (variance_x > 1e-12) & (variance_y > 1e-12)
+        correlation = np.where(valid, np.clip(correlation, -1.0, 1.0), np.nan)
+        return np.moveaxis(correlation, -1, 0)
+
+    def synchronisation_index(self, regime_codes: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Synchronisation des régimes entre pays
+
+        Args:
+            regime_codes: Tableau (N pays, T périodes) d'entiers (code de régime), -1 si inconnu
+
+        Returns:
+            Dict avec 'index' (T,): part des pays dans le régime majoritaire,
+            'rolling_index' (T,): moyenne glissante, 'concordance' (N, N): part des périodes en régime commun
+        """
+
+        codes = np.asarray(regime_codes, dtype=int)
+        known = codes >= 0
+        n_regimes = max(int(codes.max()) + 1, 1) if codes.size else 1
+
+        # Effectifs (régimes × périodes) en une opération
+        counts = (codes[None, :, :] == np.arange(n_regimes)[:, None, None]).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            index = counts.max(axis=0) / known.sum(axis=0)
+        index = np.where(known.sum(axis=0) > 0, index, np.nan)
+
+        both_known = known[:, None, :] & known[None, :, :]
+        same = (codes[:, None, :] == codes[None, :, :]) & both_known
+        with np.errstate(divide='ignore', invalid='ignore'):
+            concordance = same.sum(axis=-1) / both_known.sum(axis=-1)
+
+        observed = ~np.isnan(index)
+        window = self.config['window']
+        sums = self._window_sum(np.where(observed, index, 0.0)[None, :], window)[0]
+        counts_window = self._window_sum(observed.astype(float)[None, :], window)[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rolling_index = np.where(counts_window > 0, sums / counts_window, np.nan)
+
+        return {'index': index, 'rolling_index': rolling_index, 'concordance': concordance}
+
+    def lead_lag(self, panel: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Corrélations croisées décalées entre toutes les paires de pays
+
+        correlations[k, i, j] = corr(x_i(t), x_j(t + lag_k)) avec lag_k dans [-max_lag, max_lag]
+        Un décalage optimal positif signifie que le pays i précède le pays j
+
+        Returns:
+            Dict avec 'lags' (L,), 'correlations' (L, N, N), 'overlaps' (L, N, N),
+            'best_lag' (N, N), 'best_correlation' (N, N), 'best_overlap' (N, N)
+        """
+
+        panel = np.asarray(panel, dtype=float)
+        n_series, n_periods = panel.shape
+        max_lag = min(self.config['max_lag'], max(n_periods - self.config['min_periods'], 0))
+        lags = np.arange(-max_lag, max_lag + 1)
+
+        standardized = self._standardize(panel)
+        observed = ~np.isnan(standardized)
+        values = np.where(observed, standardized, 0.0)
+
+        correlations = np.full((len(lags), n_series, n_series), np.nan)
+        overlaps = np.zeros((len(lags), n_series, n_series), dtype=int)
+        for k, lag in enumerate(lags):
+            # Fenêtres alignées: x_i sur [0, T - lag), x_j sur [lag, T) (et inversement si lag < 0)
+            start_i, start_j = max(-lag, 0), max(lag, 0)
+            length = n_periods - abs(lag)
+            x, y = values[:, start_i:start_i + length], values[:, start_j:start_j + length]
+            mx, my = observed[:, start_i:start_i + length], observed[:, start_j:start_j + length]
+
+            common = mx.astype(float) @ my.T.astype(float)
+            overlaps[k] = common.astype(int)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                correlation = (x @ y.T) / common
+            correlations[k] = np.where(common >= self.config['min_periods'], np.clip(correlation, -1.0, 1.0), np.nan)
+
+        filled = np.where(np.isnan(correlations), -np.inf, correlations)
+        best = np.argmax(filled, axis=0)
+        best_correlation = np.take_along_axis(correlations, best[None, :, :], axis=0)[0]
+        best_lag = np.where(np.isnan(best_correlation), 0, lags[best])
+        best_overlap = np.take_along_axis(overlaps, best[None, :, :], axis=0)[0]
+
+        return {
+            'lags': lags,
+            'correlations': correlations,
+            'overlaps': overlaps,
+            'best_lag': best_lag,
+            'best_correlation': best_correlation,
+            'best_overlap': best_overlap
+        }
+
+    def analyze(self, countries: Sequence[str], indicator_panels: Dict[str, np.ndarray],
+                regime_codes: np.ndarray, regime_labels: Sequence[str]) -> Dict:
+        """
+        Analyse complète sérialisable pour plusieurs pays
+
+        Args:
+            countries: Codes pays (lignes des panels)
+            indicator_panels: {indicateur: tableau (N, T)} en ordre chronologique
+            regime_codes: Tableau (N, T) des codes de régime
+            regime_labels: Libellé de chaque code de régime
+
+        Returns:
+            Dict avec corrélations courantes, tendance de corrélation moyenne, synchronisation et leaders
+        """
+
+        countries = list(countries)
+        upper = np.triu_indices(len(countries), k=1)
+        correlations = {}
+
+        for indicator, panel in indicator_panels.items():
+            rolling = self.rolling_correlations(panel)
+
+            # Corrélation moyenne entre paires distinctes, par période
+            pair_values = rolling[:, upper[0], upper[1]]
+            valid_pairs = ~np.isnan(pair_values)
+            pair_counts = valid_pairs.sum(axis=1)
+            average = np.where(
+                pair_counts > 0,
+                np.where(valid_pairs, pair_values, 0.0).sum(axis=1) / np.maximum(pair_counts, 1),
+                np.nan
+            )
+
+            leads = self.lead_lag(panel)
+            correlations[indicator] = {
+                'current_matrix': self._matrix_to_dict(countries, rolling[-1]),
+                'average_correlation_trend': self._round_list(average),
+                'leaders': self._leaders(countries, leads)
+            }
+
+        synchronisation = self.synchronisation_index(regime_codes)
+        codes = np.asarray(regime_codes, dtype=int)
+        current = {
+            country: regime_labels[code] if code >= 0 else None
+            for country, code in zip(countries, codes[:, -1])
+        } if codes.size else {}
+
+        return {
+            'countries': countries,
+            'indicators': correlations,
+            'regime_synchronisation': {
+                'current_index': self._round_value(synchronisation['index'][-1]) if codes.size else None,
+                'rolling_index': self._round_list(synchronisation['rolling_index']),
+                'concordance': self._matrix_to_dict(countries, synchronisation['concordance']),
+                'current_regimes': current
+            },
+            'config': dict(self.config),
+            'methodology': 'Rolling cross-country correlations + regime synchronisation + lead/lag cross-correlation'
+        }
+
+    # Méthodes privées utilitaires
+
+    def _window_sum(self, values: np.ndarray, window: int) -> np.ndarray:
+        """Somme glissante sur le dernier axe (fenêtres tronquées en début de série)"""
+        cumulative = np.cumsum(values, axis=-1)
+        shifted = np.zeros_like(cumulative)
+        if window < values.shape[-1]:
+            shifted[..., window:] = cumulative[..., :-window]
+        return cumulative - shifted
+
+    def _standardize(self, panel: np.ndarray) -> np.ndarray:
+        """Centre-réduit chaque série (NaN ignorés); séries constantes → NaN"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            observed = ~np.isnan(panel)
+            counts = observed.sum(axis=1, keepdims=True)
+            means = np.where(observed, panel, 0.0).sum(axis=1, keepdims=True) / counts
+            centered = panel - means
+            stds = np.sqrt(np.where(observed, centered ** 2, 0.0).sum(axis=1, keepdims=True) / counts)
+            return np.where(stds > 1e-12, centered / stds, np.nan)
+
+    def _leaders(self, countries: List[str], leads: Dict[str, np.ndarray]) -> List[Dict]:
+        """
+        Classement des pays par nombre de pays qu'ils précèdent significativement
+
+        La meilleure corrélation est choisie parmi L décalages: test unilatéral de Fisher (z = atanh(r)·√(n - 3))
+        au seuil significance / L (Bonferroni), sur au moins min_overlap observations communes
+        """
+        n_lags = len(leads['lags'])
+        overlap = leads['best_overlap']
+        correlation = np.nan_to_num(leads['best_correlation'])
+
+        z_critical = NormalDist().inv_cdf(1 - self.config['significance'] / max(n_lags, 1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            critical_correlation = np.tanh(z_critical / np.sqrt(overlap - 3))
+
+        significant = (
+            (leads['best_lag'] > 0)
+            & (overlap >= max(self.config['min_overlap'], 4))
+            & (correlation >= critical_correlation)
+        )
+        np.fill_diagonal(significant, False)
+        led_counts = significant.sum(axis=1)
+
+        leaders = []
+        for i in np.argsort(-led_counts, kind='stable'):
+            if led_counts[i] == 0:
+                break
+            followers = np.flatnonzero(significant[i])
+            leaders.append({
+                'country': countries[i],
+                'leads': [
+                    {
+                        'country': countries[j],
+                        'lag_periods': int(leads['best_lag'][i, j]),
+                        'correlation': self._round_value(leads['best_correlation'][i, j]),
+                        'overlap': int(overlap[i, j]),
+                        'p_value': self._round_value(self._adjusted_p_value(correlation[i, j], overlap[i, j], n_lags))
+                    }
+                    for j in followers
+                ]
+            })
+        return leaders
+
+    def _adjusted_p_value(self, correlation: float, overlap: int, n_lags: int) -> float:
+        """p-value unilatérale de Fisher corrigée (Bonferroni) du nombre de décalages testés"""
+        z = math.atanh(min(correlation, 1 - 1e-12)) * math.sqrt(overlap - 3)
+        return min(1.0, n_lags * 0.5 * math.erfc(z / math.sqrt(2)))
+
+    def _matrix_to_dict(self, countries: List[str], matrix: np.ndarray) -> Dict[str, Dict[str, float]]:
+        return {
+            row_country: {
+                col_country: self._round_value(matrix[i, j])
+                for j, col_country in enumerate(countries)
+            }
+            for i, row_country in enumerate(countries)
+        }
+
+    def _round_list(self, values: np.ndarray) -> List:
+        return [self._round_value(v) for v in values]
+
+    def _round_value(self, value: float):
+        return None if value is None or np.isnan(value) else round(float(value), 3)
+
+# Fonction utilitaire pour Firebase Functions
+def create_cross_country_analytics():
+    """Factory function pour créer une instance CrossCountryAnalytics"""
+    return CrossCountryAnalytics()
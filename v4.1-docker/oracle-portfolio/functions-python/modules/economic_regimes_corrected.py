@@ -13,6 +13,20 @@ from enum import Enum
 import requests
 import time
 
+import numpy as np
+
+from .country_registry import REGIME_COUNTRIES, canonical_code, countries_for, resolve_country
+from .nowcasting_engine import NowcastingEngine
+from .regime_hmm import GaussianHMMRegimeDetector
+from .regime_history_engine import RegimeHistoryEngine
+from .physical_indicators_manager import get_indicators_manager
+from .regime_state import RegimeStateMachine
+from .cache import BoundedTTLCache
+from .upstream_config import upstream_url
+
+# Dernier PIB trimestriel de référence (valeurs simulées figées): daté une fois pour n'être intégré qu'une fois au nowcast
+SIMULATED_INDICATORS_DATE = datetime(2025, 6, 23)
+
 class UpdateFrequency(Enum):
     """Fréquences de mise à jour réalistes"""
     DAILY = "daily"
@@ -29,13 +43,62 @@ class EconomicRegime(Enum):
     STAGFLATION = "STAGFLATION"
     UNKNOWN = "UNKNOWN"
 
+# Régimes du HMM macro (croissance / inflation / chômage) vers les régimes du détecteur
+HMM_REGIME_MAPPING = {
+    'RECESSION': EconomicRegime.CONTRACTION,
+    'EXPANSION': EconomicRegime.EXPANSION,
+    'STAGFLATION': EconomicRegime.STAGFLATION,
+    'BOOM': EconomicRegime.EXPANSION
+}
+
+REGIME_ENGINES = ('rules', 'hmm')
+
 class RegimeDetectorOptimized:
-    """Détecteur de régimes économiques optimisé avec fréquences réalistes"""
+    """
+    Détecteur de régimes économiques optimisé avec fréquences réalistes
+    Moteur de scores: règles par seuils (défaut) ou HMM gaussien ajusté sur l'historique macro
+    du pays (REGIME_ENGINE=hmm), repli sur les règles si l'historique est insuffisant
+    """
     
-    def __init__(self):
+    def __init__(self, indicators_manager=None, engine: Optional[str] = None):
+        self.engine = engine or os.environ.get('REGIME_ENGINE', 'rules')
+        if self.engine not in REGIME_ENGINES:
+            raise ValueError(f"Moteur de régimes {self.engine} non supporté ({', '.join(REGIME_ENGINES)})")
+        
         self.fred_api_key = os.environ.get('FRED_API_KEY')
-        self.cache = {}
-        self.cache_ttl = {}
+        self.cache = BoundedTTLCache(
+            'regime_detector',
+            max_entries=int(os.environ.get('REGIME_CACHE_MAX_ENTRIES', 256)),
+            default_ttl=self.get_cache_ttl(UpdateFrequency.MONTHLY).total_seconds()
+        )
+        
+        # État persistant des régimes par pays (hystérésis anti-bascule)
+        self.regime_states = RegimeStateMachine(
+            smoothing_alpha=float(os.environ.get('REGIME_SMOOTHING_ALPHA', 0.5)),
+            switch_margin=float(os.environ.get('REGIME_SWITCH_MARGIN', 0.10)),
+            min_dwell_periods=int(os.environ.get('REGIME_MIN_DWELL_PERIODS', 2)),
+            confirmation_periods=int(os.environ.get('REGIME_CONFIRMATION_PERIODS', 2))
+        )
+        # Dernier mois d'observation connu par pays et par série (clé d'observation du régime)
+        self._observed_periods: Dict[str, Dict[str, str]] = {}
+        
+        # Nowcast du PIB à partir des séries haute fréquence (cuivre, pétrole, électricité datés)
+        self.nowcaster = NowcastingEngine()
+        self.indicators_manager = indicators_manager or get_indicators_manager()
+        # Analyses recalculées au rythme des séries quotidiennes du nowcast (pas du PMI mensuel)
+        self.analysis_ttl = self.get_cache_ttl(UpdateFrequency.DAILY)
+        
+        # Moteur HMM: un modèle par pays, réajusté au rythme des publications trimestrielles
+        self.history_engine = RegimeHistoryEngine()
+        self.hmm_models = BoundedTTLCache(
+            'regime_hmm_models',
+            max_entries=len(REGIME_COUNTRIES),
+            default_ttl=self.get_cache_ttl(UpdateFrequency.QUARTERLY).total_seconds()
+        )
+        self.hmm_config = {
+            'min_periods': int(os.environ.get('REGIME_HMM_MIN_PERIODS', 16)),  # Trimestres minimum pour l'ajustement
+            'history_years': 30
+        }
         
         # Configuration sources avec fréquences réalistes
         self.data_sources = {
@@ -61,64 +124,17 @@ class RegimeDetectorOptimized:
             }
         }
         
-        # Configuration pays supportés
+        # Configuration pays supportés (registre unifié)
         self.countries_config = {
-            'FRA': {
-                'name': 'France',
-                'pmi_series': 'OECD_PMI_FRA',
-                'gdp_series': 'NAEXKP01FRQ652S',
-                'unemployment_series': 'LRHUTTTTFRM156S'
-            },
-            'DEU': {
-                'name': 'Germany', 
-                'pmi_series': 'OECD_PMI_DEU',
-                'gdp_series': 'NAEXKP01DEQ652S',
-                'unemployment_series': 'LRHUTTTTDEM156S'
-            },
-            'USA': {
-                'name': 'United States',
-                'pmi_series': 'ISMMAN',
-                'gdp_series': 'GDPC1',
-                'unemployment_series': 'UNRATE'
-            },
-            'GBR': {
-                'name': 'United Kingdom',
-                'pmi_series': 'OECD_PMI_GBR', 
-                'gdp_series': 'NAEXKP01GBQ652S',
-                'unemployment_series': 'LRHUTTTTGBM156S'
-            },
-            'JPN': {
-                'name': 'Japan',
-                'pmi_series': 'OECD_PMI_JPN',
-                'gdp_series': 'NAEXKP01JPQ652S',
-                'unemployment_series': 'LRHUTTTTJPM156S'
-            },
-            'ITA': {
-                'name': 'Italy',
-                'pmi_series': 'OECD_PMI_ITA',
-                'gdp_series': 'NAEXKP01ITQ652S',
-                'unemployment_series': 'LRHUTTTTITM156S'
-            },
-            'ESP': {
-                'name': 'Spain',
-                'pmi_series': 'OECD_PMI_ESP',
-                'gdp_series': 'NAEXKP01ESQ652S',
-                'unemployment_series': 'LRHUTTTTESM156S'
-            },
-            'CAN': {
-                'name': 'Canada',
-                'pmi_series': 'OECD_PMI_CAN',
-                'gdp_series': 'NAEXKP01CAQ652S',
-                'unemployment_series': 'LRHUTTTTCAM156S'
+            info.code: {
+                'name': info.name,
+                'pmi_series': info.series('PMI'),
+                'gdp_series': info.series('GDP'),
+                'unemployment_series': info.series('UNEMPLOYMENT_MONTHLY')
             }
+            for info in countries_for(REGIME_COUNTRIES)
         }
     
-    def is_cache_valid(self, key: str) -> bool:
-        """Vérifier si le cache est valide"""
-        if key not in self.cache or key not in self.cache_ttl:
-            return False
-        return datetime.utcnow() < self.cache_ttl[key]
-    
     def get_cache_ttl(self, frequency: UpdateFrequency) -> timedelta:
         """Calculer TTL selon fréquence des données"""
         ttl_mapping = {
@@ -135,7 +151,7 @@ class RegimeDetectorOptimized:
             return None
             
         try:
-            url = f"https://api.stlouisfed.org/fred/series/observations"
+            url = upstream_url('fred', '/series/observations')
             params = {
                 'series_id': series_id,
                 'api_key': self.fred_api_key,
@@ -155,9 +171,14 @@ class RegimeDetectorOptimized:
     
     def fetch_oecd_pmi(self, country: str) -> Optional[float]:
         """Récupérer PMI OECD (gratuit)"""
+        observation = self.fetch_oecd_pmi_observation(country)
+        return observation[0] if observation else None
+    
+    def fetch_oecd_pmi_observation(self, country: str) -> Optional[Tuple[float, Optional[datetime]]]:
+        """Dernier PMI OECD et sa période d'observation (None si la période n'est pas fournie)"""
         try:
             # URL OECD API pour PMI
-            url = f"https://stats.oecd.org/SDMX-JSON/data/MEI/{country}.BSCICP03.GYSA.M/all"
+            url = upstream_url('oecd', f"/data/MEI/{country}.BSCICP03.GYSA.M/all")
             params = {
                 'startTime': '2023-01',
                 'endTime': '2025-12'
@@ -170,17 +191,28 @@ class RegimeDetectorOptimized:
                 if 'dataSets' in data and len(data['dataSets']) > 0:
                     observations = data['dataSets'][0].get('observations', {})
                     if observations:
-                        # Prendre la dernière observation
-                        latest_key = max(observations.keys())
+                        # Prendre la dernière observation (dernier indice de la clé = période)
+                        latest_key = max(observations.keys(), key=lambda key: int(key.split(':')[-1]))
                         latest_value = observations[latest_key][0]
-                        return float(latest_value) if latest_value else None
+                        if not latest_value:
+                            return None
+                        return float(latest_value), self._oecd_period(data, int(latest_key.split(':')[-1]))
         except Exception as e:
             print(f"Erreur OECD PMI {country}: {e}")
         
         return None
     
-    def calculate_regime_score(self, indicators: Dict[str, float]) -> Tuple[EconomicRegime, float]:
-        """Calculer régime et score de confiance"""
+    def _oecd_period(self, data: Dict, index: int) -> Optional[datetime]:
+        """Période d'observation SDMX (dimension TIME_PERIOD, ex: '2025-06')"""
+        try:
+            dimensions = data['structure']['dimensions']['observation']
+            time_dimension = next(d for d in dimensions if d.get('id') == 'TIME_PERIOD')
+            return datetime.strptime(time_dimension['values'][index]['id'], '%Y-%m')
+        except (KeyError, IndexError, StopIteration, TypeError, ValueError):
+            return None
+    
+    def calculate_regime_scores(self, indicators: Dict[str, float]) -> Dict[EconomicRegime, float]:
+        """Calculer le score normalisé (0-1) de chaque régime"""
         
         # Scores par indicateur
         scores = {}
@@ -222,26 +254,66 @@ class RegimeDetectorOptimized:
                 else:
                     scores[indicator] = (EconomicRegime.CONTRACTION, 0.8 * weight)
         
-        if not scores:
-            return EconomicRegime.UNKNOWN, 0.0
+        if not scores or total_weight <= 0:
+            return {}
         
         # Agrégation des scores
         regime_scores = {}
         for regime, score in scores.values():
             regime_scores[regime] = regime_scores.get(regime, 0) + score
         
+        return {regime: min(score / total_weight, 1.0) for regime, score in regime_scores.items()}
+    
+    def calculate_regime_score(self, indicators: Dict[str, float]) -> Tuple[EconomicRegime, float]:
+        """Calculer régime et score de confiance"""
+        
+        regime_scores = self.calculate_regime_scores(indicators)
+        if not regime_scores:
+            return EconomicRegime.UNKNOWN, 0.0
+        
         # Régime dominant
         best_regime = max(regime_scores.keys(), key=lambda r: regime_scores[r])
-        confidence = min(regime_scores[best_regime] / total_weight, 1.0) if total_weight > 0 else 0.0
+        return best_regime, regime_scores[best_regime]
+    
+    def calculate_hmm_regime_scores(self, country: str, indicators: Dict[str, float]) -> Optional[Dict]:
+        """
+        Scores par régime issus du HMM du pays: probabilités filtrées à la fin de l'historique macro,
+        prolongées par la croissance courante (nowcast); None si le modèle n'a pas pu être ajusté
+        """
         
-        return best_regime, confidence
+        model = self._get_hmm_model(country)
+        if model is None:
+            return None
+        
+        detector = model['detector']
+        gdp = indicators.get('gdp')
+        current = [gdp if gdp is not None else np.nan, np.nan, np.nan]
+        probabilities = detector.filter(np.vstack([model['observations'], current]))[-1]
+        
+        scores = {}
+        for regime, probability in zip(detector.regimes, probabilities):
+            mapped = HMM_REGIME_MAPPING[regime]
+            scores[mapped] = scores.get(mapped, 0.0) + float(probability)
+        
+        return {
+            'scores': scores,
+            'probabilities': {regime: round(float(p), 4) for regime, p in zip(detector.regimes, probabilities)},
+            'periods': len(model['observations']),
+            'history_end': model['dates'][-1],
+            'fitted_at': detector.fitted_at,
+            'log_likelihood': round(detector.log_likelihood, 4),
+            'state_mapping': model['state_mapping'],
+            'rules_agreement': model['rules_agreement']
+        }
     
     def analyze_country_regime_realistic(self, country: str) -> Dict:
         """Analyser régime pays avec fréquences réalistes"""
         
+        country = canonical_code(country) or country
         cache_key = f"regime_analysis_{country}"
-        if self.is_cache_valid(cache_key):
-            return self.cache[cache_key]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         if country not in self.countries_config:
             return {
@@ -251,20 +323,25 @@ class RegimeDetectorOptimized:
         
         country_config = self.countries_config[country]
         indicators = {}
+        # Date d'observation par série (période publiée, pas la date de la requête)
+        observed_dates = {}
         
         # Récupération PMI (priorité OECD gratuit)
-        pmi_value = self.fetch_oecd_pmi(country)
+        pmi_value, pmi_date = self.fetch_oecd_pmi_observation(country) or (None, None)
         if pmi_value is None and country == 'USA':
             # Fallback FRED pour USA
             fred_data = self.fetch_fred_data(country_config['pmi_series'], 1)
             if fred_data and len(fred_data) > 0:
                 try:
                     pmi_value = float(fred_data[0]['value'])
+                    pmi_date = datetime.strptime(fred_data[0]['date'], '%Y-%m-%d')
                 except (ValueError, KeyError):
                     pass
         
         if pmi_value:
             indicators['pmi'] = pmi_value
+            if pmi_date:
+                observed_dates['pmi'] = pmi_date
         
         # Simulation autres indicateurs (en production, utiliser vraies APIs)
         if country == 'FRA':
@@ -298,11 +375,40 @@ class RegimeDetectorOptimized:
                 'electricity': 98.9  # Consommation stable
             })
         
-        # Calcul régime
-        regime, confidence = self.calculate_regime_score(indicators)
+        if 'gdp' in indicators:
+            observed_dates['gdp'] = SIMULATED_INDICATORS_DATE
+        
+        # Nowcast: le PIB trimestriel (publié à +45 jours) est rafraîchi par le PMI et les séries
+        # live du gestionnaire d'indicateurs (cuivre / pétrole quotidiens, électricité mensuelle)
+        # Seules les séries datées sont intégrées: une même publication relue n'est pas recomptée
+        nowcast_inputs = {series: indicators[series] for series in observed_dates}
+        for series, (value, observed_at) in self.indicators_manager.get_nowcast_inputs(country).items():
+            nowcast_inputs[series] = value
+            observed_dates[series] = observed_at
+        
+        nowcast = self.nowcaster.update_from_indicators(country, nowcast_inputs, observed_dates=observed_dates)
+        if nowcast is not None:
+            indicators['gdp'] = nowcast['gdp_nowcast']
+        
+        # Calcul régime: nouvelle observation appliquée à l'état persistant du pays
+        hmm_analysis = self.calculate_hmm_regime_scores(country, indicators) if self.engine == 'hmm' else None
+        regime_scores = hmm_analysis.pop('scores') if hmm_analysis else self.calculate_regime_scores(indicators)
+        if regime_scores:
+            observation_key = self._observation_key(country, observed_dates)
+            state = self.regime_states.update(
+                country,
+                {r.value: score for r, score in regime_scores.items()},
+                observation_key
+            )
+            regime = EconomicRegime(state.regime)
+            confidence = min(state.smoothed_scores.get(state.regime, 0.0), 1.0)
+            regime_state = state.to_dict()
+        else:
+            regime, confidence = EconomicRegime.UNKNOWN, 0.0
+            regime_state = None
         
-        # Calcul prochaine mise à jour (fréquence réaliste)
-        next_update = datetime.utcnow() + timedelta(days=7)  # Hebdomadaire par défaut
+        # Calcul prochaine mise à jour (séries quotidiennes du nowcast)
+        next_update = datetime.utcnow() + self.analysis_ttl
         
         result = {
             'country': country,
@@ -310,22 +416,120 @@ class RegimeDetectorOptimized:
             'current_regime': regime.value,
             'confidence_score': round(confidence, 3),
             'indicators_used': indicators,
-            'update_frequency': 'monthly',
+            'update_frequency': UpdateFrequency.DAILY.value,
             'last_data_update': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
             'next_update_expected': next_update.strftime('%Y-%m-%dT%H:%M:%S'),
+            'regime_state': regime_state,
+            'regime_engine': 'hmm' if hmm_analysis else 'rules',
+            'hmm': hmm_analysis,
+            'gdp_nowcast': nowcast,
             'frequency_correction': {
                 'correction_applied': 'Fréquences réalistes vs temps réel',
-                'regime_inertia_respected': True,
-                'cache_ttl_days': 7
+                'regime_inertia_respected': self.regime_states.hysteresis_enabled,
+                'hysteresis': dict(self.regime_states.config),
+                'cache_ttl_days': round(self.analysis_ttl.total_seconds() / 86400, 2)
             }
         }
         
         # Cache avec TTL approprié
-        self.cache[cache_key] = result
-        self.cache_ttl[cache_key] = datetime.utcnow() + self.get_cache_ttl(UpdateFrequency.MONTHLY)
+        self.cache.set(cache_key, result, ttl=self.analysis_ttl.total_seconds())
         
         return result
     
+    def _get_hmm_model(self, country: str) -> Optional[Dict]:
+        """HMM du pays ajusté sur son historique macro (mis en cache jusqu'au prochain trimestre)"""
+        
+        model = self.hmm_models.get(country)
+        if model is not None:
+            return model
+        
+        history = self._macro_history(country)
+        if history is None or len(history['dates']) < self.hmm_config['min_periods']:
+            return None
+        
+        observations = np.column_stack([history['growth'], history['inflation'], history['unemployment']])
+        detector = GaussianHMMRegimeDetector()
+        try:
+            fit = detector.fit(observations)
+        except ValueError as e:
+            print(f"Erreur ajustement HMM {country}: {e}")
+            return None
+        
+        # Concordance avec la classification macro par seuils sur le même historique
+        rules = self.history_engine.classify_macro(history['growth'], history['inflation'], history['unemployment'])
+        labels = detector.label_history(observations)['regimes']
+        
+        model = {
+            'detector': detector,
+            'observations': observations,
+            'dates': history['dates'],
+            'state_mapping': {str(state): regime for state, regime in fit['state_mapping'].items()},
+            'rules_agreement': round(float(np.mean(labels == rules['regimes'])), 3)
+        }
+        self.hmm_models.set(country, model)
+        return model
+    
+    def _macro_history(self, country: str) -> Optional[Dict]:
+        """
+        Historique trimestriel croissance / inflation / chômage (entrées de RegimeHistoryEngine.classify_macro)
+        Croissance et inflation en glissement annuel des séries FRED du registre; NaN si la série manque
+        """
+        
+        info = resolve_country(country)
+        if info is None or not info.series('GDP'):
+            return None
+        
+        years = self.hmm_config['history_years']
+        gdp = self._fred_series(info.series('GDP'), 4 * years)
+        cpi = self._fred_series(info.series('INFLATION'), 12 * years)
+        unemployment = self._fred_series(info.series('UNEMPLOYMENT_MONTHLY'), 12 * years)
+        
+        dates, growth, inflation, rates = [], [], [], []
+        for date in sorted(gdp):
+            year_ago = f"{int(date[:4]) - 1}{date[4:]}"
+            if year_ago not in gdp:
+                continue
+            dates.append(date)
+            growth.append(100.0 * (gdp[date] / gdp[year_ago] - 1))
+            inflation.append(100.0 * (cpi[date] / cpi[year_ago] - 1) if date in cpi and year_ago in cpi else np.nan)
+            rates.append(unemployment.get(date, np.nan))
+        
+        if not dates:
+            return None
+        return {
+            'dates': dates,
+            'growth': np.array(growth),
+            'inflation': np.array(inflation),
+            'unemployment': np.array(rates)
+        }
+    
+    def _fred_series(self, series_id: Optional[str], limit: int) -> Dict[str, float]:
+        """Observations FRED par date ('YYYY-MM-DD'), valeurs manquantes ignorées"""
+        
+        series = {}
+        for observation in (self.fetch_fred_data(series_id, limit) if series_id else None) or []:
+            try:
+                series[observation['date']] = float(observation['value'])
+            except (KeyError, ValueError):
+                continue
+        return series
+    
+    def _observation_key(self, country: str, observed_dates: Dict[str, datetime]) -> Tuple:
+        """
+        Clé d'observation du régime: mois d'observation de chaque série (PMI, PIB, séries du nowcast)
+        Un nouveau mois publié fait avancer l'état même à valeur inchangée; une série momentanément
+        indisponible conserve son dernier mois connu (un échec de récupération ne compte pas comme observation)
+        """
+        periods = self._observed_periods.setdefault(country, {})
+        for series, observed_at in observed_dates.items():
+            periods[series] = max(periods.get(series, ''), observed_at.strftime('%Y-%m'))
+        return tuple(sorted(periods.items()))
+    
+    def get_current_regime_state(self, country: str) -> Optional[Dict]:
+        """Lecture O(1) de l'état de régime courant d'un pays (sans recalcul)"""
+        state = self.regime_states.get_state(country)
+        return state.to_dict() if state else None
+    
     def get_multi_country_analysis_optimized(self, countries: List[str]) -> Dict:
         """Analyse multi-pays optimisée"""
         
@@ -333,8 +537,9 @@ class RegimeDetectorOptimized:
             return {'error': 'Maximum 10 pays par requête'}
         
         cache_key = f"multi_analysis_{'_'.join(sorted(countries))}"
-        if self.is_cache_valid(cache_key):
-            return self.cache[cache_key]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         results = {}
         regime_distribution = {}
@@ -362,8 +567,7 @@ class RegimeDetectorOptimized:
         }
         
         # Cache résultat
-        self.cache[cache_key] = global_analysis
-        self.cache_ttl[cache_key] = datetime.utcnow() + self.get_cache_ttl(UpdateFrequency.MONTHLY)
+        self.cache.set(cache_key, global_analysis, ttl=self.analysis_ttl.total_seconds())
         
         return global_analysis
 
@@ -9,6 +9,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 
+from .country_registry import REGIME_COUNTRIES, canonical_code, countries_for
+from .regime_history_engine import RegimeHistoryEngine
+from .cross_country_analytics import CrossCountryAnalytics
+
 logger = logging.getLogger(__name__)
 
 class RegimeDetector:
@@ -46,18 +50,17 @@ class RegimeDetector:
             }
         }
         
-        # Mapping pays supportés
+        # Mapping pays supportés (registre unifié)
         self.supported_countries = {
-            'FRA': 'France',
-            'DEU': 'Germany', 
-            'GBR': 'United Kingdom',
-            'USA': 'United States',
-            'JPN': 'Japan',
-            'ITA': 'Italy',
-            'ESP': 'Spain',
-            'CAN': 'Canada'
+            info.code: info.name for info in countries_for(REGIME_COUNTRIES)
         }
         
+        # Moteur de classification vectorisée pour les historiques
+        self.history_engine = RegimeHistoryEngine()
+        
+        # Analyses transversales (corrélations, synchronisation, avance/retard)
+        self.cross_country = CrossCountryAnalytics()
+        
         logger.info(f"RegimeDetector initialisé - {len(self.supported_countries)} pays supportés")
     
     def analyze_country_regime(self, country_code: str) -> Dict:
@@ -71,6 +74,7 @@ class RegimeDetector:
             Dict avec régime détecté, confiance, position matrice, allocations
         """
         
+        country_code = canonical_code(country_code) or country_code
         if country_code not in self.supported_countries:
             logger.warning(f"Pays {country_code} non supporté")
             return self._get_default_regime(country_code)
@@ -333,6 +337,9 @@ class RegimeDetector:
         """
         Récupère l'historique des régimes pour un pays
         
+        Les indicateurs sont récupérés une seule fois puis l'historique complet
+        est classifié en une passe par RegimeHistoryEngine
+        
         Args:
             country_code: Code pays
             months: Nombre de mois d'historique
@@ -341,27 +348,115 @@ class RegimeDetector:
             Liste des régimes historiques
         """
         
-        history = []
+        country_code = canonical_code(country_code) or country_code
         current_date = datetime.utcnow()
+        dates = [current_date - timedelta(days=i * 30) for i in range(months)]
         
-        for i in range(months):
-            month_date = current_date - timedelta(days=i * 30)
-            
-            # Simulation d'historique réaliste
-            # En production: récupérer depuis base de données
-            regime_data = self.analyze_country_regime(country_code)
-            regime_data['analysis_date'] = month_date.isoformat()
-            
-            history.append(regime_data)
+        if country_code not in self.supported_countries:
+            logger.warning(f"Pays {country_code} non supporté")
+            history = []
+            for month_date in dates:
+                regime_data = self._get_default_regime(country_code)
+                regime_data['analysis_date'] = month_date.isoformat()
+                history.append(regime_data)
+            return history
+        
+        # Simulation d'historique réaliste
+        # En production: récupérer les séries depuis base de données
+        pmi_series, electricity_series = self._simulate_indicator_history(country_code, months)
+        
+        periods = self.history_engine.reconstruct_history(dates, pmi_series, electricity_series)
+        
+        # Allocations calculées une fois par régime distinct
+        allocations_by_regime = {
+            regime: self._get_recommended_allocations(regime, country_code)
+            for regime in set(period['regime'] for period in periods)
+        }
+        
+        history = [
+            {
+                'country_code': country_code,
+                'country_name': self.supported_countries[country_code],
+                'current_regime': period['regime'],
+                'confidence_score': period['confidence'],
+                'matrix_position': period['matrix_position'],
+                'recommended_allocations': allocations_by_regime[period['regime']],
+                'indicators': period['indicators'],
+                'analysis_date': period['date'],
+                'methodology': 'PMI + Electricity Growth + Economic Matrix (vectorized history)'
+            }
+            for period in periods
+        ]
         
         return sorted(history, key=lambda x: x['analysis_date'], reverse=True)
     
-    def get_multi_country_analysis(self, country_codes: List[str]) -> Dict:
+    def _simulate_indicator_history(self, country_code: str, months: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Génère des séries PMI / électricité simulées autour des indicateurs actuels
+        (index 0 = mois courant, aligné sur get_regime_history)
+        """
+        
+        latest = self._fetch_economic_indicators(country_code)
+        
+        pmi_series = latest['pmi'] + np.random.uniform(-1.0, 1.0, months)
+        electricity_series = latest['electricity_growth'] + np.random.uniform(-0.5, 0.5, months)
+        pmi_series[0] = latest['pmi']
+        electricity_series[0] = latest['electricity_growth']
+        
+        return pmi_series, electricity_series
+    
+    def get_cross_country_analytics(self, country_codes: List[str], months: int = 24) -> Dict:
+        """
+        Corrélations, synchronisation des régimes et avance/retard entre pays
+        
+        Les historiques de tous les pays sont empilés en panels (pays × mois)
+        et classifiés en une seule passe avant l'analyse par lots
+        
+        Args:
+            country_codes: Liste des codes pays
+            months: Profondeur d'historique en mois
+            
+        Returns:
+            Dict d'analyse transversale (voir CrossCountryAnalytics.analyze)
+        """
+        
+        countries = []
+        for code in country_codes:
+            canonical = canonical_code(code) or code
+            if canonical in self.supported_countries and canonical not in countries:
+                countries.append(canonical)
+        
+        if not countries:
+            return self.cross_country.analyze([], {}, np.empty((0, 0), dtype=int), [])
+        
+        # Panels chronologiques (index 0 de l'historique simulé = mois courant)
+        histories = [self._simulate_indicator_history(country, months) for country in countries]
+        pmi_panel = np.array([pmi[::-1] for pmi, _ in histories])
+        electricity_panel = np.array([electricity[::-1] for _, electricity in histories])
+        
+        matrix = self.history_engine.classify_matrix(pmi_panel.ravel(), electricity_panel.ravel())
+        labels = self.history_engine.matrix_regimes
+        regime_codes = np.array([labels.index(regime) for regime in matrix['regimes']]).reshape(pmi_panel.shape)
+        
+        analysis = self.cross_country.analyze(
+            countries,
+            {'pmi': pmi_panel, 'electricity_growth': electricity_panel},
+            regime_codes,
+            labels
+        )
+        analysis['analysis_date'] = datetime.utcnow().isoformat()
+        analysis['months'] = months
+        # Historiques simulés autour des indicateurs courants: corrélations et leaders non exploitables
+        analysis['simulated'] = True
+        return analysis
+    
+    def get_multi_country_analysis(self, country_codes: List[str], include_cross_country: bool = False) -> Dict:
         """
         Analyse les régimes pour plusieurs pays
         
         Args:
             country_codes: Liste des codes pays
+            include_cross_country: Ajoute corrélations / synchronisation / avance-retard entre pays
             
         Returns:
             Dict avec analyses par pays et synthèse globale
@@ -390,11 +485,16 @@ class RegimeDetector:
             'analysis_date': datetime.utcnow().isoformat()
         }
         
-        return {
+        analysis = {
             'countries': results,
             'global_synthesis': global_synthesis,
             'methodology': 'Multi-country regime analysis'
         }
+        
+        if include_cross_country:
+            analysis['cross_country'] = self.get_cross_country_analytics(list(results))
+        
+        return analysis
 
 # Fonction utilitaire pour Firebase Functions
 def create_regime_detector():
@@ -0,0 +1,419 @@
+"""
+Oracle Portfolio - Normalisation Adaptative des Indicateurs
+Rang percentile (t-digest incrémental) et z-score EWMA par indicateur et par pays
+Remplace les diviseurs fixes: les scores s'adaptent au niveau de prix sans conserver ni trier l'historique
+État résumé (t-digest, EWMA, période couverte) persistable pour survivre aux redémarrages
+"""
+
+import os
+import json
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+NORMALIZATION_SCHEMA_VERSION = 1
+NORMALIZATION_COLLECTION = 'indicator_normalization'
+
+class TDigest:
+    """
+    Sketch de quantiles t-digest (variante fusionnante, fonction d'échelle k1)
+    - Ajout en O(1) dans un tampon, fusion amortie en O(log n) par observation
+    - Mémoire bornée par la compression (environ 2 × compression centroïdes)
+    - Précision renforcée dans les queues de distribution
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+        self._buffer: List[tuple] = []
+        self._buffer_limit = int(compression * 5)
+
+    def add(self, value: float, weight: float = 1.0):
+        """Ajoute une observation"""
+        if value is None or math.isnan(value):
+            return
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valeur au quantile q (0-1), None sans observation"""
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1 or q <= 0:
+            return self.min if q <= 0 else self.means[0]
+        if q >= 1:
+            return self.max
+
+        # Interpolation linéaire entre centres de centroïdes (min / max aux extrémités)
+        target = q * self.count
+        cumulative = 0.0
+        previous_center, previous_mean = 0.0, self.min
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                ratio = (target - previous_center) / span if span > 0 else 0.0
+                return previous_mean + ratio * (mean - previous_mean)
+            cumulative += weight
+            previous_center, previous_mean = center, mean
+
+        span = self.count - previous_center
+        ratio = (target - previous_center) / span if span > 0 else 1.0
+        return previous_mean + ratio * (self.max - previous_mean)
+
+    def cdf(self, value: float) -> Optional[float]:
+        """Rang percentile (0-1) de la valeur, None sans observation"""
+        self._compress()
+        if not self.means:
+            return None
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return 1.0
+        if self.max == self.min:
+            return 0.5
+
+        # Points (poids cumulé au centre, moyenne), bornés par min et max
+        centers = [0.0]
+        values = [self.min]
+        cumulative = 0.0
+        for mean, weight in zip(self.means, self.weights):
+            centers.append(cumulative + weight / 2)
+            values.append(mean)
+            cumulative += weight
+        centers.append(self.count)
+        values.append(self.max)
+
+        # Valeurs égales à un ou plusieurs points: rang milieu
+        low, high = bisect_left(values, value), bisect_right(values, value)
+        if low < high:
+            return (centers[low] + centers[high - 1]) / 2 / self.count
+
+        span = values[low] - values[low - 1]
+        ratio = (value - values[low - 1]) / span if span > 0 else 0.5
+        return (centers[low - 1] + ratio * (centers[low] - centers[low - 1])) / self.count
+
+    def to_dict(self) -> Dict:
+        """État sérialisable (persistance de l'historique résumé)"""
+        self._compress()
+        return {
+            'compression': self.compression,
+            'means': list(self.means),
+            'weights': list(self.weights),
+            'min': self.min if self.means else None,
+            'max': self.max if self.means else None
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'TDigest':
+        digest = cls(state.get('compression', 100.0))
+        digest.means = list(state.get('means', []))
+        digest.weights = list(state.get('weights', []))
+        digest.count = float(sum(digest.weights))
+        if digest.means:
+            digest.min, digest.max = state['min'], state['max']
+        return digest
+
+    # Méthodes privées utilitaires
+
+    def _compress(self):
+        """Fusionne le tampon dans les centroïdes (taille max par centroïde fixée par k1)"""
+        if not self._buffer:
+            return
+
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+
+        means, weights = [], []
+        cumulative = 0.0
+        current_mean, current_weight = points[0]
+        limit = self._q_limit(0.0)
+
+        for mean, weight in points[1:]:
+            if (cumulative + current_weight + weight) / self.count <= limit:
+                # Moyenne pondérée incrémentale
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                means.append(current_mean)
+                weights.append(current_weight)
+                cumulative += current_weight
+                limit = self._q_limit(cumulative / self.count)
+                current_mean, current_weight = mean, weight
+
+        means.append(current_mean)
+        weights.append(current_weight)
+        self.means, self.weights = means, weights
+
+    def _q_limit(self, q: float) -> float:
+        """Quantile maximal couvert par un centroïde commençant en q: k1^-1(k1(q) + 1)"""
+        k = self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1) + 1
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+class EWMAStats:
+    """Moyenne et variance exponentielles (z-score glissant en O(1))"""
+
+    def __init__(self, halflife: float = 30.0):
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.mean: Optional[float] = None
+        self.variance = 0.0
+
+    def update(self, value: float):
+        if self.mean is None:
+            self.mean = value
+            return
+        delta = value - self.mean
+        self.mean += self.alpha * delta
+        self.variance = (1 - self.alpha) * (self.variance + self.alpha * delta * delta)
+
+    def zscore(self, value: float) -> Optional[float]:
+        if self.mean is None:
+            return None
+        if self.variance <= 0:
+            return 0.0
+        return (value - self.mean) / math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict:
+        return {'alpha': self.alpha, 'mean': self.mean, 'variance': self.variance}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'EWMAStats':
+        stats = cls()
+        stats.alpha = state.get('alpha', stats.alpha)
+        stats.mean, stats.variance = state.get('mean'), state.get('variance', 0.0)
+        return stats
+
+class IndicatorNormalizer:
+    """
+    Normalisation par série (clé: indicateur, pays)
+    - Rang percentile sur tout l'historique observé (t-digest)
+    - Z-score EWMA pour la dynamique récente
+    - Série utilisable après min_observations (sinon None: l'appelant garde sa normalisation de repli)
+    - Observations datées: une date déjà couverte par la série (entre première et dernière
+      observation) est ignorée, un historique plus ancien complète le t-digest
+    """
+
+    def __init__(self, min_observations: Optional[int] = None, compression: float = 100.0,
+                 halflife: float = 30.0):
+        self.min_observations = min_observations if min_observations is not None else int(
+            os.environ.get('INDICATOR_NORMALIZATION_MIN_OBSERVATIONS', 30)
+        )
+        self.compression = compression
+        self.halflife = halflife
+
+        self._digests: Dict[Hashable, TDigest] = {}
+        self._ewma: Dict[Hashable, EWMAStats] = {}
+        # Période couverte par série (première, dernière date d'observation)
+        self._coverage: Dict[Hashable, Tuple[datetime, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, key: Hashable, value: float, observed_at: Optional[datetime] = None) -> bool:
+        """
+        Ajoute une observation à la série
+
+        Returns:
+            True si l'observation a été intégrée (False: valeur invalide ou date déjà couverte)
+        """
+        if value is None or math.isnan(value):
+            return False
+        value = float(value)
+        with self._lock:
+            coverage = self._coverage.get(key)
+            if observed_at is not None and coverage and coverage[0] <= observed_at <= coverage[1]:
+                return False
+
+            if key not in self._digests:
+                self._digests[key] = TDigest(self.compression)
+                self._ewma[key] = EWMAStats(self.halflife)
+            self._digests[key].add(value)
+
+            # EWMA: dynamique récente, seules les observations plus récentes que la série l'alimentent
+            if observed_at is None or coverage is None or observed_at > coverage[1]:
+                self._ewma[key].update(value)
+
+            if observed_at is not None:
+                self._coverage[key] = (
+                    min(coverage[0], observed_at) if coverage else observed_at,
+                    max(coverage[1], observed_at) if coverage else observed_at
+                )
+            return True
+
+    def update_many(self, key: Hashable, values: Iterable[float],
+                    observed_dates: Optional[Sequence[datetime]] = None) -> int:
+        """
+        Alimente la série avec un historique (ordre chronologique)
+
+        Returns:
+            Nombre d'observations intégrées
+        """
+        values = list(values)
+        dates = list(observed_dates) if observed_dates is not None else [None] * len(values)
+        return sum(self.update(key, value, observed_at) for value, observed_at in zip(values, dates))
+
+    def observations(self, key: Hashable) -> int:
+        with self._lock:
+            digest = self._digests.get(key)
+            return int(digest.count) if digest else 0
+
+    def is_ready(self, key: Hashable) -> bool:
+        return self.observations(key) >= self.min_observations
+
+    def series_state(self, key: Hashable) -> Optional[Dict]:
+        """État sérialisable d'une série (t-digest, EWMA, période couverte), None si inconnue"""
+        with self._lock:
+            if key not in self._digests:
+                return None
+            coverage = self._coverage.get(key)
+            return {
+                'schema_version': NORMALIZATION_SCHEMA_VERSION,
+                'key': list(key) if isinstance(key, tuple) else key,
+                'digest': self._digests[key].to_dict(),
+                'ewma': self._ewma[key].to_dict(),
+                'coverage': [coverage[0].isoformat(), coverage[1].isoformat()] if coverage else None
+            }
+
+    def load_series_state(self, state: Dict):
+        """Restaure une série persistée (remplace l'état en mémoire de la série)"""
+        key = tuple(state['key']) if isinstance(state['key'], list) else state['key']
+        coverage = state.get('coverage')
+        with self._lock:
+            self._digests[key] = TDigest.from_dict(state['digest'])
+            self._ewma[key] = EWMAStats.from_dict(state['ewma'])
+            if coverage:
+                self._coverage[key] = (datetime.fromisoformat(coverage[0]), datetime.fromisoformat(coverage[1]))
+            else:
+                self._coverage.pop(key, None)
+
+    def percentile_rank(self, key: Hashable, value: float) -> Optional[float]:
+        """Rang percentile (0-1) de la valeur dans l'historique de la série"""
+        with self._lock:
+            digest = self._digests.get(key)
+            return digest.cdf(value) if digest else None
+
+    def zscore(self, key: Hashable, value: float) -> Optional[float]:
+        """Écart à la moyenne EWMA en écarts-types EWMA"""
+        with self._lock:
+            ewma = self._ewma.get(key)
+            return ewma.zscore(value) if ewma else None
+
+    def normalize(self, key: Hashable, value: float) -> Optional[float]:
+        """
+        Valeur normalisée sur l'échelle des scores composites: 0.5 + rang percentile
+        (médiane historique = 1.0, bornes 0.5-1.5), None tant que la série n'est pas prête
+        """
+        if not self.is_ready(key):
+            return None
+        rank = self.percentile_rank(key, value)
+        return None if rank is None else 0.5 + rank
+
+    def describe(self, key: Hashable, value: float) -> Dict:
+        """Détail de normalisation d'une valeur (percentile, z-score, historique)"""
+        rank = self.percentile_rank(key, value)
+        zscore = self.zscore(key, value)
+        return {
+            'percentile': round(rank, 4) if rank is not None else None,
+            'zscore': round(zscore, 3) if zscore is not None else None,
+            'observations': self.observations(key),
+            'adaptive': self.is_ready(key)
+        }
+
+class NormalizerStateStore:
+    """
+    Persistance de l'état des séries de normalisation (un document par série)
+    Backends: Firestore (défaut) ou fichier local (INDICATOR_NORMALIZATION_BACKEND=local)
+    """
+
+    def __init__(self, backend: Optional[str] = None, local_dir: Optional[str] = None):
+        self.backend = backend or os.environ.get('INDICATOR_NORMALIZATION_BACKEND', 'firestore')
+        self.local_dir = local_dir or os.environ.get('INDICATOR_NORMALIZATION_DIR', '/tmp/indicator_normalization')
+        self._lock = threading.Lock()
+
+    def load(self, normalizer: IndicatorNormalizer) -> int:
+        """Restaure toutes les séries persistées dans le normaliseur, retourne le nombre de séries"""
+        try:
+            states = self._read_local() if self.backend == 'local' else self._read_firestore()
+        except Exception as e:
+            print(f"Erreur lecture état normalisation: {e}")
+            return 0
+
+        loaded = 0
+        for state in states.values():
+            if state.get('schema_version') == NORMALIZATION_SCHEMA_VERSION:
+                normalizer.load_series_state(state)
+                loaded += 1
+        return loaded
+
+    def save(self, normalizer: IndicatorNormalizer, keys: Iterable[Hashable]):
+        """Persiste l'état des séries indiquées (erreurs signalées, jamais propagées)"""
+        states = {}
+        for key in keys:
+            state = normalizer.series_state(key)
+            if state is not None:
+                states[self._document_id(key)] = state
+        if not states:
+            return
+
+        try:
+            with self._lock:
+                if self.backend == 'local':
+                    self._write_local(states)
+                else:
+                    self._write_firestore(states)
+        except Exception as e:
+            print(f"Erreur écriture état normalisation: {e}")
+
+    # Méthodes privées utilitaires
+
+    def _document_id(self, key: Hashable) -> str:
+        return '_'.join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+    def _read_firestore(self) -> Dict[str, Dict]:
+        from firebase_admin import firestore
+
+        documents = firestore.client().collection(NORMALIZATION_COLLECTION).stream()
+        return {document.id: document.to_dict() for document in documents}
+
+    def _write_firestore(self, states: Dict[str, Dict]):
+        from firebase_admin import firestore
+
+        client = firestore.client()
+        collection = client.collection(NORMALIZATION_COLLECTION)
+        batch = client.batch()
+        for document_id, state in states.items():
+            batch.set(collection.document(document_id), state)
+        batch.commit()
+
+    def _state_path(self) -> str:
+        return os.path.join(self.local_dir, f'{NORMALIZATION_COLLECTION}.json')
+
+    def _read_local(self) -> Dict[str, Dict]:
+        path = self._state_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_local(self, states: Dict[str, Dict]):
+        os.makedirs(self.local_dir, exist_ok=True)
+
+        stored = self._read_local()
+        stored.update(states)
+
+        # Remplacement atomique du fichier d'état
+        path = self._state_path()
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, path)
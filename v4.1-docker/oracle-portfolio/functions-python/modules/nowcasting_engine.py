@@ -0,0 +1,211 @@
+"""
+Oracle Portfolio - Moteur de Nowcasting
+Estimation courante du PIB à partir d'indicateurs haute fréquence (filtre de Kalman)
+"""
+
+import math
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class NowcastingEngine:
+    """
+    Nowcasting du PIB par filtre de Kalman à fréquences mixtes
+    - État latent: croissance du PIB (%, marche aléatoire)
+    - Observations: PIB trimestriel publié + indicateurs mensuels/quotidiens via équations de liaison
+    - Mise à jour incrémentale O(1) à chaque nouveau point d'une série
+    """
+
+    def __init__(self):
+        # Équations de liaison: observation = intercept + loading × croissance + bruit
+        # transform 'log_ratio': 100 × ln(valeur / baseline) avant liaison
+        self.series_config = {
+            'gdp': {
+                'frequency': 'quarterly',
+                'transform': 'level',
+                'intercept': 0.0,
+                'loading': 1.0,
+                'noise_variance': 0.05
+            },
+            'pmi': {
+                'frequency': 'monthly',
+                'transform': 'level',
+                'intercept': 47.0,   # PMI 50 ↔ croissance 1.5%
+                'loading': 2.0,
+                'noise_variance': 4.0
+            },
+            'electricity': {
+                'frequency': 'monthly',
+                'transform': 'log_ratio',
+                'baseline': 100.0,
+                'intercept': -1.2,
+                'loading': 0.8,
+                'noise_variance': 6.0
+            },
+            'copper': {
+                'frequency': 'daily',
+                'transform': 'log_ratio',
+                'baseline': 8000.0,
+                'intercept': -6.0,
+                'loading': 4.0,
+                'noise_variance': 150.0
+            },
+            'oil': {
+                'frequency': 'daily',
+                'transform': 'log_ratio',
+                'baseline': 70.0,
+                'intercept': -4.5,
+                'loading': 3.0,
+                'noise_variance': 250.0
+            }
+        }
+
+        # Dynamique de l'état latent
+        self.state_config = {
+            'prior_mean': 1.5,                 # Croissance tendancielle (%)
+            'prior_variance': 4.0,
+            'process_variance_per_month': 0.25
+        }
+
+        self._states: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        logger.info(f"NowcastingEngine initialisé - {len(self.series_config)} séries")
+
+    def update(self, country: str, series: str, value: float,
+               observed_at: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        Intègre un nouveau point d'une série dans le nowcast du pays
+
+        Args:
+            country: Code pays
+            series: Nom de la série ('gdp', 'pmi', 'electricity', 'copper', 'oil')
+            value: Valeur observée
+            observed_at: Date d'observation de la valeur (défaut: maintenant)
+
+        Returns:
+            Nowcast mis à jour, ou None si la série est inconnue
+        """
+
+        config = self.series_config.get(series)
+        if config is None or value is None:
+            return None
+
+        observed_at = observed_at or datetime.utcnow()
+        period = self._period_key(observed_at, config['frequency'])
+
+        with self._lock:
+            state = self._get_or_create_state(country, observed_at)
+
+            # Un seul point par période d'observation et par série: une publication relue
+            # ou une observation plus ancienne que la dernière intégrée n'est pas recomptée
+            last_period = state['periods'].get(series)
+            if last_period is not None and period <= last_period:
+                return self._format_nowcast(country, state)
+
+            self._predict(state, observed_at)
+
+            observation = self._transform(value, config)
+            predicted = config['intercept'] + config['loading'] * state['mean']
+            innovation = observation - predicted
+            innovation_variance = config['loading'] ** 2 * state['variance'] + config['noise_variance']
+            gain = config['loading'] * state['variance'] / innovation_variance
+
+            state['mean'] += gain * innovation
+            state['variance'] *= (1 - gain * config['loading'])
+            state['periods'][series] = period
+            state['last_inputs'][series] = {
+                'value': value,
+                'observed_at': observed_at.isoformat(),
+                'contribution': round(gain * innovation, 4)
+            }
+
+            return self._format_nowcast(country, state)
+
+    def update_from_indicators(self, country: str, indicators: Dict[str, Optional[float]],
+                               observed_at: Optional[datetime] = None,
+                               observed_dates: Optional[Dict[str, datetime]] = None) -> Optional[Dict]:
+        """
+        Intègre un lot d'indicateurs (ex: sortie de PhysicalIndicatorsManager)
+        Les séries inconnues ou manquantes sont ignorées
+        observed_dates: date d'observation par série, prioritaire sur observed_at
+        """
+
+        observed_dates = observed_dates or {}
+        nowcast = None
+        for series, value in indicators.items():
+            if series in self.series_config and value is not None:
+                nowcast = self.update(country, series, value, observed_dates.get(series, observed_at))
+        return nowcast if nowcast is not None else self.get_nowcast(country)
+
+    def get_nowcast(self, country: str) -> Optional[Dict]:
+        """Nowcast courant du pays (sans nouvelle observation), None si aucun point reçu"""
+
+        with self._lock:
+            state = self._states.get(country)
+            return self._format_nowcast(country, state) if state else None
+
+    # Méthodes privées utilitaires
+
+    def _get_or_create_state(self, country: str, observed_at: datetime) -> Dict:
+        state = self._states.get(country)
+        if state is None:
+            state = {
+                'mean': self.state_config['prior_mean'],
+                'variance': self.state_config['prior_variance'],
+                'last_time': observed_at,
+                'periods': {},
+                'last_inputs': {}
+            }
+            self._states[country] = state
+        return state
+
+    def _predict(self, state: Dict, observed_at: datetime):
+        """Étape de prédiction: la variance croît avec le temps écoulé depuis le dernier point"""
+
+        elapsed_days = max((observed_at - state['last_time']).total_seconds() / 86400, 0.0)
+        state['variance'] += self.state_config['process_variance_per_month'] * elapsed_days / 30.0
+        state['last_time'] = max(observed_at, state['last_time'])
+
+    def _transform(self, value: float, config: Dict) -> float:
+        if config['transform'] == 'log_ratio':
+            return 100.0 * math.log(max(value, 1e-9) / config['baseline'])
+        return float(value)
+
+    def _period_key(self, observed_at: datetime, frequency: str) -> str:
+        if frequency == 'quarterly':
+            return f"{observed_at.year}-Q{(observed_at.month - 1) // 3 + 1}"
+        if frequency == 'monthly':
+            return observed_at.strftime('%Y-%m')
+        return observed_at.strftime('%Y-%m-%d')
+
+    def _format_nowcast(self, country: str, state: Dict) -> Dict:
+        std = math.sqrt(max(state['variance'], 0.0))
+        return {
+            'country': country,
+            'gdp_nowcast': round(state['mean'], 3),
+            'std_error': round(std, 3),
+            'interval_90': [round(state['mean'] - 1.645 * std, 3), round(state['mean'] + 1.645 * std, 3)],
+            'last_update': state['last_time'].isoformat(),
+            'inputs': dict(state['last_inputs']),
+            'methodology': 'Mixed-frequency Kalman filter (bridge equations)'
+        }
+
+# Fonction utilitaire pour Firebase Functions
+def create_nowcasting_engine():
+    """Factory function pour créer une instance NowcastingEngine"""
+    return NowcastingEngine()
+
+# Test du module
+if __name__ == "__main__":
+    engine = NowcastingEngine()
+
+    engine.update('FRA', 'gdp', 1.2, datetime(2025, 4, 30))
+    engine.update('FRA', 'pmi', 48.5, datetime(2025, 6, 3))
+    engine.update('FRA', 'electricity', 95.2, datetime(2025, 6, 30))
+    nowcast = engine.update('FRA', 'copper', 8600.0, datetime(2025, 7, 10))
+
+    print(f"Nowcast PIB France: {nowcast['gdp_nowcast']}% (± {nowcast['std_error']})")
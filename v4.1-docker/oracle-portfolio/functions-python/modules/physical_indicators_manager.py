@@ -7,10 +7,34 @@ Date: 23 Juin 2025
 
 import os
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
 import requests
 import time
+import threading
+
+import numpy as np
+
+from .country_registry import REGIME_COUNTRIES, canonical_code
+from .cache import BoundedTTLCache
+from .allocation_solver import project_to_simplex, deviation_bounds
+from .indicator_normalization import IndicatorNormalizer, NormalizerStateStore
+from .rate_limit import get_token_bucket
+from .upstream_config import upstream_url
+
+# Séries haute fréquence intégrées au nowcast du PIB (noms de NowcastingEngine.series_config)
+NOWCAST_SERIES = ('copper', 'oil', 'electricity')
+
+# Conversion des cotations vers l'unité des références (cuivre COMEX en $/lb -> $/t)
+COMMODITY_QUOTE_FACTORS = {'copper': 2204.62}
+
+# Historique FRED des commodités (mêmes unités que les cotations live) pour amorcer la normalisation
+HISTORY_FRED_SERIES = {
+    'copper': 'PCOPPUSDM',
+    'oil': 'DCOILWTICO',
+    'natural_gas': 'DHHNGSP',
+    'gold': 'GOLDAMGBD228NLBM'
+}
 
 class PhysicalIndicatorsManager:
     """Gestionnaire allocations basées indicateurs physiques"""
@@ -18,8 +42,28 @@ class PhysicalIndicatorsManager:
     def __init__(self):
         self.alpha_vantage_key = os.environ.get('ALPHA_VANTAGE_API_KEY')
         self.eia_api_key = os.environ.get('EIA_API_KEY')
-        self.cache = {}
-        self.cache_ttl = {}
+        self.fred_api_key = os.environ.get('FRED_API_KEY')
+        self.cache = BoundedTTLCache(
+            'physical_indicators',
+            max_entries=int(os.environ.get('INDICATORS_CACHE_MAX_ENTRIES', 512)),
+            default_ttl=6 * 3600
+        )
+        
+        # Stale-while-revalidate des indicateurs: valeur fraîche pendant ttl_seconds,
+        # puis servie (rafraîchie en arrière-plan) jusqu'à max_staleness_seconds
+        self.freshness_config = {
+            'ttl_seconds': 6 * 3600,
+            'max_staleness_seconds': float(os.environ.get('INDICATOR_MAX_STALENESS_SECONDS', 48 * 3600)),
+            'retry_after_failure_seconds': 300
+        }
+        self._refreshing = set()
+        self._failed_until = {}
+        self._refresh_lock = threading.Lock()
+        
+        # Normalisation adaptative (rang percentile par indicateur et pays): état persisté,
+        # amorcé par l'historique amont puis alimenté par les valeurs live datées
+        self.normalizer = IndicatorNormalizer()
+        self.normalizer_store = NormalizerStateStore()
         
         # Configuration 7 indicateurs physiques
         self.indicators_config = {
@@ -120,15 +164,16 @@ class PhysicalIndicatorsManager:
                 'max_deviation': 0.25
             }
         }
-    
-    def is_cache_valid(self, key: str) -> bool:
-        """Vérifier validité cache"""
-        if key not in self.cache or key not in self.cache_ttl:
-            return False
-        return datetime.utcnow() < self.cache_ttl[key]
+        
+        self._seed_normalizer(REGIME_COUNTRIES)
     
     def fetch_alpha_vantage_commodity(self, symbol: str) -> Optional[float]:
         """Récupérer prix commodité Alpha Vantage"""
+        observation = self.fetch_alpha_vantage_commodity_observation(symbol)
+        return observation[0] if observation else None
+    
+    def fetch_alpha_vantage_commodity_observation(self, symbol: str) -> Optional[Tuple[float, Optional[datetime]]]:
+        """Prix commodité Alpha Vantage et jour de cotation (latest trading day)"""
         if not self.alpha_vantage_key:
             return None
             
@@ -143,19 +188,31 @@ class PhysicalIndicatorsManager:
             }
             
             av_symbol = symbol_mapping.get(symbol, symbol)
-            url = f"https://www.alphavantage.co/query"
+            url = upstream_url('alpha_vantage', '/query')
             params = {
                 'function': 'GLOBAL_QUOTE',
                 'symbol': av_symbol,
                 'apikey': self.alpha_vantage_key
             }
             
+            # Quota par clé (minute / jour): sans jeton, la dernière valeur reste servie (stale)
+            bucket = get_token_bucket(self.alpha_vantage_key)
+            if not bucket.try_acquire():
+                print(f"Quota Alpha Vantage atteint - {symbol} reporté ({bucket.seconds_until_available():.0f}s)")
+                return None
+            
             response = requests.get(url, params=params, timeout=10)
             if response.status_code == 200:
                 data = response.json()
+                if 'Note' in data or 'Information' in data:
+                    # Limitation signalée par Alpha Vantage (Note: minute, Information: jour)
+                    bucket.exhaust(60 if 'Note' in data else 3600)
+                    print(f"Alpha Vantage limite atteinte pour {symbol}")
+                    return None
                 if 'Global Quote' in data:
-                    price_str = data['Global Quote'].get('05. price', '0')
-                    return float(price_str)
+                    quote = data['Global Quote']
+                    price = float(quote.get('05. price', '0')) * COMMODITY_QUOTE_FACTORS.get(symbol, 1.0)
+                    return price, self._parse_period(quote.get('07. latest trading day'))
         except Exception as e:
             print(f"Erreur Alpha Vantage {symbol}: {e}")
         
@@ -163,21 +220,23 @@ class PhysicalIndicatorsManager:
     
     def fetch_eia_electricity(self, country: str) -> Optional[float]:
         """Récupérer consommation électrique EIA"""
+        observation = self.fetch_eia_electricity_observation(country)
+        return observation[0] if observation else None
+    
+    def fetch_eia_electricity_observation(self, country: str) -> Optional[Tuple[float, Optional[datetime]]]:
+        """Consommation électrique EIA et sa période (mois) d'observation"""
+        history = self.fetch_eia_electricity_history(country, months=1)
+        return (history[-1][1], history[-1][0]) if history else None
+    
+    def fetch_eia_electricity_history(self, country: str, months: int = 24) -> List[Tuple[datetime, float]]:
+        """Historique mensuel de consommation électrique EIA, ordre chronologique (vide si indisponible)"""
         if not self.eia_api_key:
-            return None
+            return []
             
         try:
-            # Mapping pays EIA
-            country_mapping = {
-                'FRA': 'FRA',
-                'DEU': 'DEU', 
-                'USA': 'USA',
-                'GBR': 'GBR',
-                'JPN': 'JPN'
-            }
-            
-            eia_country = country_mapping.get(country, country)
-            url = f"https://api.eia.gov/v2/international/data"
+            # Code pays EIA (ISO alpha-3 du registre unifié)
+            eia_country = canonical_code(country) or country
+            url = upstream_url('eia', '/international/data')
             params = {
                 'api_key': self.eia_api_key,
                 'facets[countryRegionId][]': eia_country,
@@ -186,38 +245,122 @@ class PhysicalIndicatorsManager:
                 'frequency': 'monthly',
                 'sort[0][column]': 'period',
                 'sort[0][direction]': 'desc',
-                'length': 1
+                'length': months
             }
             
             response = requests.get(url, params=params, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 if 'response' in data and 'data' in data['response']:
-                    electricity_data = data['response']['data']
-                    if electricity_data and len(electricity_data) > 0:
-                        return float(electricity_data[0]['value'])
+                    history = [
+                        (self._parse_period(row.get('period')), float(row['value']))
+                        for row in data['response']['data']
+                    ]
+                    return sorted((period, value) for period, value in history if period is not None)
         except Exception as e:
             print(f"Erreur EIA électricité {country}: {e}")
         
-        return None
+        return []
+    
+    def fetch_fred_history(self, series_id: str, limit: int = 120) -> List[Tuple[datetime, float]]:
+        """Historique FRED d'une série, ordre chronologique (valeurs manquantes '.' ignorées)"""
+        if not self.fred_api_key:
+            return []
+            
+        try:
+            url = upstream_url('fred', '/series/observations')
+            params = {
+                'series_id': series_id,
+                'api_key': self.fred_api_key,
+                'file_type': 'json',
+                'limit': limit,
+                'sort_order': 'desc'
+            }
+            
+            response = requests.get(url, params=params, timeout=10)
+            if response.status_code == 200:
+                history = []
+                for observation in response.json().get('observations', []):
+                    try:
+                        history.append((datetime.strptime(observation['date'], '%Y-%m-%d'), float(observation['value'])))
+                    except (KeyError, ValueError):
+                        continue
+                return sorted(history)
+        except Exception as e:
+            print(f"Erreur FRED historique {series_id}: {e}")
+        
+        return []
     
     def get_indicator_value(self, indicator: str, country: str = 'USA') -> Tuple[Optional[float], float]:
         """Récupérer valeur indicateur avec score de qualité"""
         
+        entry = self.get_indicator_entry(indicator, country)
+        return entry['value'], entry['quality_score']
+    
+    def get_indicator_entry(self, indicator: str, country: str = 'USA') -> Dict:
+        """
+        Valeur indicateur avec métadonnées de fraîcheur (stale-while-revalidate)
+        
+        - fresh: valeur live de moins de ttl_seconds
+        - stale: dernière valeur live (moins de max_staleness_seconds), rafraîchie en arrière-plan
+        - simulated: aucune valeur live disponible, valeur de simulation
+        """
+        
         cache_key = f"indicator_{indicator}_{country}"
-        if self.is_cache_valid(cache_key):
-            cached_data = self.cache[cache_key]
-            return cached_data['value'], cached_data['quality_score']
+        now = time.time()
+        
+        cached_data = self.cache.get(cache_key)
+        if cached_data is not None:
+            age = now - cached_data['fetched_at']
+            
+            if age < self.freshness_config['ttl_seconds']:
+                return self._with_freshness(cached_data, 'fresh', age)
+            
+            # Dernière bonne valeur servie immédiatement, rafraîchissement hors requête
+            refreshing = self._schedule_refresh(cache_key, indicator, country)
+            return self._with_freshness(cached_data, 'stale', age, refreshing)
+        
+        # Pas de valeur exploitable: appel synchrone (sauf échec récent)
+        if now >= self._failed_until.get(cache_key, 0):
+            cached_data = self._refresh_indicator(cache_key, indicator, country)
+            if cached_data is not None:
+                return self._with_freshness(cached_data, 'fresh', 0.0)
+        
+        return self._simulated_entry(indicator)
+    
+    def get_nowcast_inputs(self, country: str, series: Sequence[str] = NOWCAST_SERIES) -> Dict[str, Tuple[float, datetime]]:
+        """
+        Dernières valeurs live des séries haute fréquence et leur date d'observation (nowcast du PIB)
+        Les valeurs simulées ou sans date d'observation sont exclues
+        """
+        
+        inputs = {}
+        for indicator in series:
+            entry = self.get_indicator_entry(indicator, country)
+            if entry['freshness']['status'] != 'simulated' and entry.get('observed_at'):
+                inputs[indicator] = (entry['value'], datetime.fromisoformat(entry['observed_at']))
+        
+        # Électricité publiée en volume (milliards de kWh): indice 100 = même mois un an plus tôt
+        if 'electricity' in inputs:
+            value, observed_at = inputs.pop('electricity')
+            index = self._electricity_yoy_index(country, value, observed_at)
+            if index is not None:
+                inputs['electricity'] = (index, observed_at)
+        return inputs
+    
+    def _fetch_live_indicator(self, indicator: str, country: str) -> Tuple[Optional[float], float, Optional[datetime]]:
+        """Récupération live d'un indicateur: valeur (None si la source ne répond pas), qualité, date d'observation"""
         
         value = None
         quality_score = 0.0
+        observed_at = None
         
         if indicator == 'electricity':
-            value = self.fetch_eia_electricity(country)
+            value, observed_at = self.fetch_eia_electricity_observation(country) or (None, None)
             quality_score = 0.95 if value else 0.0
             
         elif indicator in ['copper', 'oil', 'natural_gas', 'gold', 'silver']:
-            value = self.fetch_alpha_vantage_commodity(indicator)
+            value, observed_at = self.fetch_alpha_vantage_commodity_observation(indicator) or (None, None)
             quality_score = 0.90 if value else 0.0
             
         elif indicator == 'pmi':
@@ -232,33 +375,130 @@ class PhysicalIndicatorsManager:
             value = pmi_values.get(country, 50.0)
             quality_score = 0.85
         
-        # Simulation valeurs si APIs indisponibles
+        return value, quality_score, observed_at
+    
+    def _refresh_indicator(self, cache_key: str, indicator: str, country: str) -> Optional[Dict]:
+        """
+        Récupère et met en cache une valeur live
+        En cas d'échec, la dernière bonne valeur est conservée (jamais remplacée par une simulation)
+        """
+        
+        value, quality_score, observed_at = self._fetch_live_indicator(indicator, country)
+        
         if value is None:
-            simulation_values = {
-                'electricity': 98.5,
-                'copper': 8250.0,
-                'pmi': 50.5,
-                'oil': 75.2,
-                'natural_gas': 3.45,
-                'gold': 1950.0,
-                'silver': 24.8
-            }
-            value = simulation_values.get(indicator, 100.0)
-            quality_score = 0.60  # Score réduit pour simulation
+            self._failed_until[cache_key] = time.time() + self.freshness_config['retry_after_failure_seconds']
+            print(f"Indicateur {indicator} ({country}) indisponible - nouvel essai dans {self.freshness_config['retry_after_failure_seconds']}s")
+            return None
         
-        # Cache résultat
+        fetched_at = time.time()
         cached_data = {
             'value': value,
             'quality_score': quality_score,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': datetime.utcfromtimestamp(fetched_at).isoformat(),
+            'fetched_at': fetched_at,
+            'observed_at': observed_at.isoformat() if observed_at else None
         }
-        self.cache[cache_key] = cached_data
-        self.cache_ttl[cache_key] = datetime.utcnow() + timedelta(hours=6)
+        # Conservée jusqu'à la staleness maximale (servie en stale au-delà du TTL de fraîcheur)
+        self.cache.set(cache_key, cached_data, ttl=self.freshness_config['max_staleness_seconds'])
+        self._failed_until.pop(cache_key, None)
+        
+        # Seules les valeurs datées alimentent la normalisation (une publication relue n'est pas recomptée)
+        if observed_at is not None and self.normalizer.update((indicator, country), value, observed_at):
+            self.normalizer_store.save(self.normalizer, [(indicator, country)])
         
-        return value, quality_score
+        return cached_data
+    
+    def _schedule_refresh(self, cache_key: str, indicator: str, country: str) -> bool:
+        """Lance un rafraîchissement en arrière-plan (un seul par clé)"""
+        
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return True
+            if time.time() < self._failed_until.get(cache_key, 0):
+                return False
+            self._refreshing.add(cache_key)
+        
+        def refresh():
+            try:
+                self._refresh_indicator(cache_key, indicator, country)
+            except Exception as e:
+                print(f"Erreur rafraîchissement {indicator} ({country}): {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(cache_key)
+        
+        threading.Thread(target=refresh, name=f"refresh-{cache_key}", daemon=True).start()
+        return True
+    
+    def _with_freshness(self, cached_data: Dict, status: str, age: float, refreshing: bool = False) -> Dict:
+        return {
+            'value': cached_data['value'],
+            'quality_score': cached_data['quality_score'],
+            'observed_at': cached_data.get('observed_at'),
+            'freshness': {
+                'status': status,
+                'age_seconds': round(age, 1),
+                'fetched_at': cached_data['timestamp'],
+                'refreshing': refreshing,
+                'max_staleness_seconds': self.freshness_config['max_staleness_seconds']
+            }
+        }
+    
+    def _simulated_entry(self, indicator: str) -> Dict:
+        """Valeur de simulation, signalée comme telle (aucune valeur live récente)"""
+        
+        simulation_values = {
+            'electricity': 98.5,
+            'copper': 8250.0,
+            'pmi': 50.5,
+            'oil': 75.2,
+            'natural_gas': 3.45,
+            'gold': 1950.0,
+            'silver': 24.8
+        }
+        return {
+            'value': simulation_values.get(indicator, 100.0),
+            'quality_score': 0.60,  # Score réduit pour simulation
+            'observed_at': None,
+            'freshness': {
+                'status': 'simulated',
+                'age_seconds': None,
+                'fetched_at': None,
+                'refreshing': False,
+                'max_staleness_seconds': self.freshness_config['max_staleness_seconds']
+            }
+        }
+    
+    def _electricity_yoy_index(self, country: str, value: float, observed_at: datetime) -> Optional[float]:
+        """Consommation rapportée au même mois de l'année précédente (historique EIA mis en cache)"""
+        cache_key = f"electricity_history_{country}"
+        history = self.cache.get(cache_key)
+        if history is None:
+            history = self.fetch_eia_electricity_history(country, months=13)
+            if not history:
+                return None
+            self.cache.set(cache_key, history)
+        
+        previous = dict(history).get(observed_at.replace(year=observed_at.year - 1))
+        return 100.0 * value / previous if previous else None
     
-    def calculate_composite_score(self, indicators_data: Dict[str, Tuple[float, float]]) -> Tuple[float, float]:
-        """Calculer score composite et confiance globale"""
+    def _parse_period(self, period: Optional[str]) -> Optional[datetime]:
+        """Date d'observation amont ('2025-06-30' ou '2025-06'), None si absente ou invalide"""
+        for date_format in ('%Y-%m-%d', '%Y-%m'):
+            try:
+                return datetime.strptime(period, date_format)
+            except (TypeError, ValueError):
+                continue
+        return None
+    
+    def calculate_composite_score(self, indicators_data: Dict[str, Tuple[float, float]],
+                                  country: Optional[str] = None) -> Tuple[float, float]:
+        """
+        Calculer score composite et confiance globale
+        
+        Normalisation par rang percentile de l'historique de la série (indicateur, pays) quand
+        elle compte assez d'observations, sinon par les références fixes (_baseline_normalization)
+        """
         
         total_weighted_score = 0.0
         total_weight = 0.0
@@ -271,23 +511,9 @@ class PhysicalIndicatorsManager:
             config = self.indicators_config.get(indicator, {})
             weight = config.get('weight', 0.1)
             
-            # Normalisation valeur (0-100 scale)
-            if indicator == 'electricity':
-                normalized = min(value / 100.0, 1.5)  # 100 = baseline
-            elif indicator == 'copper':
-                normalized = min(value / 8000.0, 1.5)  # 8000 = baseline
-            elif indicator == 'pmi':
-                normalized = value / 50.0  # 50 = neutral
-            elif indicator == 'oil':
-                normalized = min(value / 70.0, 1.5)  # 70 = baseline
-            elif indicator == 'natural_gas':
-                normalized = min(value / 3.0, 1.5)  # 3 = baseline
-            elif indicator == 'gold':
-                normalized = min(value / 1900.0, 1.2)  # 1900 = baseline
-            elif indicator == 'silver':
-                normalized = min(value / 25.0, 1.2)  # 25 = baseline
-            else:
-                normalized = 1.0
+            normalized = self.normalizer.normalize((indicator, country), value) if country else None
+            if normalized is None:
+                normalized = self._baseline_normalization(indicator, value)
             
             total_weighted_score += normalized * weight
             total_weight += weight
@@ -298,12 +524,72 @@ class PhysicalIndicatorsManager:
         
         return composite_score, confidence_score
     
+    def _baseline_normalization(self, indicator: str, value: float) -> float:
+        """Normalisation par référence fixe (1.0 = baseline), en attendant un historique suffisant"""
+        
+        if indicator == 'electricity':
+            return min(value / 100.0, 1.5)  # 100 = baseline
+        elif indicator == 'copper':
+            return min(value / 8000.0, 1.5)  # 8000 = baseline
+        elif indicator == 'pmi':
+            return value / 50.0  # 50 = neutral
+        elif indicator == 'oil':
+            return min(value / 70.0, 1.5)  # 70 = baseline
+        elif indicator == 'natural_gas':
+            return min(value / 3.0, 1.5)  # 3 = baseline
+        elif indicator == 'gold':
+            return min(value / 1900.0, 1.2)  # 1900 = baseline
+        elif indicator == 'silver':
+            return min(value / 25.0, 1.2)  # 25 = baseline
+        return 1.0
+    
+    def seed_indicator_history(self, indicator: str, country: str, values: List[float],
+                               observed_dates: Optional[List[datetime]] = None) -> int:
+        """
+        Alimente la normalisation avec un historique stocké (ordre chronologique)
+        Retourne le nombre d'observations intégrées (dates déjà couvertes ignorées)
+        """
+        return self.normalizer.update_many((indicator, country), values, observed_dates)
+    
+    def _seed_normalizer(self, countries: Sequence[str]):
+        """
+        Restaure l'état persisté de la normalisation puis amorce les séries encore insuffisantes
+        avec l'historique amont (FRED pour les commodités, EIA pour l'électricité)
+        """
+        
+        loaded = self.normalizer_store.load(self.normalizer)
+        
+        commodity_history = {}
+        seeded = []
+        for indicator in ['electricity'] + list(HISTORY_FRED_SERIES):
+            for country in countries:
+                if self.normalizer.is_ready((indicator, country)):
+                    continue
+                
+                if indicator == 'electricity':
+                    history = self.fetch_eia_electricity_history(country, months=36)
+                else:
+                    # Prix mondial: un seul appel par commodité, partagé entre pays
+                    if indicator not in commodity_history:
+                        commodity_history[indicator] = self.fetch_fred_history(HISTORY_FRED_SERIES[indicator])
+                    history = commodity_history[indicator]
+                
+                if history and self.seed_indicator_history(
+                    indicator, country, [value for _, value in history], [date for date, _ in history]
+                ):
+                    seeded.append((indicator, country))
+        
+        self.normalizer_store.save(self.normalizer, seeded)
+        if loaded or seeded:
+            print(f"Normalisation: {loaded} série(s) restaurée(s), {len(seeded)} amorcée(s) par l'historique")
+    
     def calculate_dynamic_allocations(self, country: str, risk_profile: str) -> Dict:
         """Calculer allocations dynamiques basées indicateurs physiques"""
         
         cache_key = f"allocations_{country}_{risk_profile}"
-        if self.is_cache_valid(cache_key):
-            return self.cache[cache_key]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         if risk_profile not in self.risk_profiles:
             return {'error': f'Profil de risque {risk_profile} non supporté'}
@@ -312,12 +598,14 @@ class PhysicalIndicatorsManager:
         
         # Récupération indicateurs
         indicators_data = {}
+        freshness = {}
         for indicator in self.indicators_config.keys():
-            value, quality = self.get_indicator_value(indicator, country)
-            indicators_data[indicator] = (value, quality)
+            entry = self.get_indicator_entry(indicator, country)
+            indicators_data[indicator] = (entry['value'], entry['quality_score'])
+            freshness[indicator] = entry['freshness']['status']
         
         # Calcul score composite
-        composite_score, confidence_score = self.calculate_composite_score(indicators_data)
+        composite_score, confidence_score = self.calculate_composite_score(indicators_data, country)
         
         # Calcul ajustements basés corrélations
         stocks_adjustment = 0.0
@@ -343,19 +631,14 @@ class PhysicalIndicatorsManager:
             bonds_adjustment += signal_strength * correlations['bonds'] * weight
             commodities_adjustment += signal_strength * correlations['commodities'] * weight
         
-        # Application ajustements avec limites
+        # Projection sur les allocations admissibles: somme = 100% et écart à la base <= max_deviation
+        # (une renormalisation après bornage pourrait sortir de la bande du profil)
         max_deviation = profile_config['max_deviation']
+        base = np.array([profile_config['base_stocks'], profile_config['base_bonds'], profile_config['base_commodities']])
+        targets = base + np.array([stocks_adjustment, bonds_adjustment, commodities_adjustment])
+        lower, upper = deviation_bounds(base, max_deviation)
         
-        stocks_final = profile_config['base_stocks'] + min(max(stocks_adjustment, -max_deviation), max_deviation)
-        bonds_final = profile_config['base_bonds'] + min(max(bonds_adjustment, -max_deviation), max_deviation)
-        commodities_final = profile_config['base_commodities'] + min(max(commodities_adjustment, -max_deviation), max_deviation)
-        
-        # Normalisation pour somme = 100%
-        total = stocks_final + bonds_final + commodities_final
-        if total > 0:
-            stocks_final /= total
-            bonds_final /= total
-            commodities_final /= total
+        stocks_final, bonds_final, commodities_final = (float(w) for w in project_to_simplex(targets, lower, upper))
         
         # Comparaison avec allocations statiques
         static_allocations = {
@@ -375,6 +658,7 @@ class PhysicalIndicatorsManager:
             'composite_score': round(composite_score, 3),
             'confidence_score': round(confidence_score, 3),
             'indicators_used': len([v for v, q in indicators_data.values() if v is not None]),
+            'indicators_freshness': freshness,
             'static_comparison': {
                 'differences': {
                     'stocks': round(stocks_final - static_allocations['stocks'], 3),
@@ -386,8 +670,7 @@ class PhysicalIndicatorsManager:
         }
         
         # Cache résultat
-        self.cache[cache_key] = result
-        self.cache_ttl[cache_key] = datetime.utcnow() + timedelta(hours=6)
+        self.cache.set(cache_key, result, ttl=6 * 3600)
         
         return result
     
@@ -408,15 +691,18 @@ class PhysicalIndicatorsManager:
         available_count = 0
         
         for indicator, config in self.indicators_config.items():
-            value, quality = self.get_indicator_value(indicator, country)
+            entry = self.get_indicator_entry(indicator, country)
+            value, quality = entry['value'], entry['quality_score']
             
             breakdown['indicators_detail'][indicator] = {
                 'value': value,
                 'quality_score': quality,
+                'freshness': entry['freshness'],
                 'weight': config['weight'],
                 'source': config['source'],
                 'description': config['description'],
-                'status': 'available' if value is not None else 'unavailable'
+                'status': 'available' if value is not None else 'unavailable',
+                'normalization': self.normalizer.describe((indicator, country), value) if value is not None else None
             }
             
             if value is not None:
@@ -0,0 +1,347 @@
+"""
+Oracle Portfolio - Moteur de Régimes à Changement d'État (HMM Gaussien)
+Alternative probabiliste aux seuils fixes de détection des régimes
+"""
+
+import numpy as np
+from datetime import datetime
+from itertools import permutations
+from typing import Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+class GaussianHMMRegimeDetector:
+    """
+    Détecteur de régimes par modèle de Markov caché gaussien (covariance diagonale)
+    - Apprentissage Baum-Welch sur l'historique stocké (forward-backward en log)
+    - Probabilités filtrées mises à jour incrémentalement: O(K²) par nouvelle observation
+    - États ré-étiquetés après apprentissage selon leurs moyennes ajustées (l'EM peut permuter les régimes)
+    """
+
+    def __init__(self, regime_frequencies: Optional[Dict[str, float]] = None,
+                 features: Optional[List[str]] = None, persistence: float = 0.90):
+        # Fréquences historiques (1970-2024) - mêmes priors que EconomicRegimesDetector
+        self.regime_frequencies = regime_frequencies or {
+            'RECESSION': 0.15,
+            'EXPANSION': 0.65,
+            'STAGFLATION': 0.08,
+            'BOOM': 0.12
+        }
+        self.regimes = list(self.regime_frequencies.keys())
+        self.features = features or ['growth', 'inflation', 'unemployment']
+        self.persistence = persistence
+
+        # Moyennes initiales par régime (croissance %, inflation %, chômage %)
+        self.initial_means = {
+            'RECESSION': [-1.5, 1.5, 8.0],
+            'EXPANSION': [2.5, 2.5, 5.5],
+            'STAGFLATION': [-0.5, 6.0, 8.5],
+            'BOOM': [4.5, 3.0, 4.0]
+        }
+
+        # Configuration de l'apprentissage
+        self.fit_config = {
+            'max_iterations': 100,
+            'tolerance': 1e-4,
+            'min_variance': 1e-3
+        }
+
+        self.start_log_prob = None
+        self.transition_log_prob = None
+        self.means = None
+        self.variances = None
+        self.log_likelihood = None
+        self.fitted_at = None
+
+        # État filtré courant (log-probabilités normalisées)
+        self._filtered_log_prob = None
+        self._observations_seen = 0
+
+        self._initialize_from_priors()
+
+        logger.info(f"GaussianHMMRegimeDetector initialisé - {len(self.regimes)} régimes")
+
+    def fit(self, observations: Sequence[Sequence[float]]) -> Dict:
+        """
+        Ajuste le modèle sur un historique d'indicateurs
+
+        Args:
+            observations: Tableau (périodes × indicateurs), NaN autorisés pour les valeurs manquantes
+
+        Returns:
+            Dict avec log-vraisemblance, itérations et paramètres appris
+        """
+
+        obs = np.atleast_2d(np.asarray(observations, dtype=float))
+        if obs.shape[1] != len(self.features):
+            raise ValueError(f"{len(self.features)} indicateurs attendus, {obs.shape[1]} reçus")
+        if obs.shape[0] < 2:
+            raise ValueError("Au moins 2 observations requises pour l'apprentissage")
+
+        observed = ~np.isnan(obs)
+        filled = np.where(observed, obs, 0.0)
+
+        previous_ll = -np.inf
+        iterations = 0
+
+        for iterations in range(1, self.fit_config['max_iterations'] + 1):
+            log_emission = self._log_emission(obs)
+            log_alpha, log_likelihood = self._forward(log_emission)
+            log_beta = self._backward(log_emission)
+
+            # Posteriors d'état (gamma) et de transition (xi agrégé sur le temps)
+            log_gamma = log_alpha + log_beta - log_likelihood
+            gamma = np.exp(log_gamma)
+
+            log_xi = (
+                log_alpha[:-1, :, None] + self.transition_log_prob[None, :, :] +
+                (log_emission[1:] + log_beta[1:])[:, None, :] - log_likelihood
+            )
+            xi_sum = np.exp(self._logsumexp(log_xi, axis=0))
+
+            # Étape M
+            self.start_log_prob = np.log(np.maximum(gamma[0], 1e-12))
+            transitions = xi_sum / np.maximum(xi_sum.sum(axis=1, keepdims=True), 1e-12)
+            self.transition_log_prob = np.log(np.maximum(transitions, 1e-12))
+
+            weights = gamma[:, :, None] * observed[:, None, :]
+            weight_sum = np.maximum(weights.sum(axis=0), 1e-12)
+            self.means = (weights * filled[:, None, :]).sum(axis=0) / weight_sum
+            squared = (filled[:, None, :] - self.means[None, :, :]) ** 2
+            self.variances = np.maximum(
+                (weights * squared).sum(axis=0) / weight_sum,
+                self.fit_config['min_variance']
+            )
+
+            if abs(log_likelihood - previous_ll) < self.fit_config['tolerance']:
+                break
+            previous_ll = log_likelihood
+
+        state_mapping = self._relabel_states(observed.any(axis=0))
+
+        # Passe forward finale: vraisemblance et état filtré des paramètres issus de la dernière étape M
+        log_alpha, log_likelihood = self._forward(self._log_emission(obs))
+
+        self.log_likelihood = float(log_likelihood)
+        self.fitted_at = datetime.utcnow().isoformat()
+
+        # L'état filtré repart de la fin de l'historique appris
+        self._filtered_log_prob = log_alpha[-1] - self._logsumexp(log_alpha[-1])
+        self._observations_seen = obs.shape[0]
+
+        logger.info(f"HMM ajusté sur {obs.shape[0]} périodes en {iterations} itérations (LL={self.log_likelihood:.2f})")
+
+        return {
+            'log_likelihood': round(self.log_likelihood, 4),
+            'iterations': iterations,
+            'periods': obs.shape[0],
+            'state_mapping': state_mapping,
+            'parameters': self.get_parameters()
+        }
+
+    def update(self, observation: Sequence[float]) -> Dict:
+        """
+        Intègre une nouvelle observation sans réapprentissage (une étape forward)
+
+        Args:
+            observation: Valeurs des indicateurs pour la nouvelle période (NaN autorisés)
+
+        Returns:
+            Dict avec régime le plus probable et probabilités filtrées
+        """
+
+        obs = np.asarray(observation, dtype=float).reshape(1, -1)
+        log_emission = self._log_emission(obs)[0]
+
+        if self._filtered_log_prob is None:
+            log_prior = self.start_log_prob
+        else:
+            log_prior = self._logsumexp(self._filtered_log_prob[:, None] + self.transition_log_prob, axis=0)
+
+        log_posterior = log_prior + log_emission
+        self._filtered_log_prob = log_posterior - self._logsumexp(log_posterior)
+        self._observations_seen += 1
+
+        return self.current_state()
+
+    def current_state(self) -> Dict:
+        """Retourne le régime filtré courant et ses probabilités"""
+
+        log_prob = self.start_log_prob if self._filtered_log_prob is None else self._filtered_log_prob
+        probabilities = np.exp(log_prob)
+        best = int(np.argmax(probabilities))
+
+        return {
+            'regime': self.regimes[best],
+            'confidence': round(float(probabilities[best]), 3),
+            'probabilities': {regime: round(float(p), 4) for regime, p in zip(self.regimes, probabilities)},
+            'observations_seen': self._observations_seen,
+            'methodology': 'Gaussian HMM (filtered probabilities)'
+        }
+
+    def filter(self, observations: Sequence[Sequence[float]]) -> np.ndarray:
+        """Probabilités filtrées P(état_t | obs_1..t) pour chaque période (périodes × régimes)"""
+
+        obs = np.atleast_2d(np.asarray(observations, dtype=float))
+        log_alpha, _ = self._forward(self._log_emission(obs))
+        return np.exp(log_alpha - self._logsumexp(log_alpha, axis=1)[:, None])
+
+    def smooth(self, observations: Sequence[Sequence[float]]) -> np.ndarray:
+        """Probabilités lissées P(état_t | obs_1..T) pour chaque période (périodes × régimes)"""
+
+        obs = np.atleast_2d(np.asarray(observations, dtype=float))
+        log_emission = self._log_emission(obs)
+        log_alpha, log_likelihood = self._forward(log_emission)
+        log_beta = self._backward(log_emission)
+        return np.exp(log_alpha + log_beta - log_likelihood)
+
+    def label_history(self, observations: Sequence[Sequence[float]], smoothed: bool = True) -> Dict:
+        """
+        Étiquette un historique complet
+
+        Returns:
+            Dict avec 'regimes' (libellés) et 'confidence' par période
+        """
+
+        probabilities = self.smooth(observations) if smoothed else self.filter(observations)
+        best = np.argmax(probabilities, axis=1)
+        return {
+            'regimes': np.asarray(self.regimes)[best],
+            'confidence': probabilities[np.arange(len(best)), best],
+            'probabilities': probabilities
+        }
+
+    def get_parameters(self) -> Dict:
+        """Paramètres courants du modèle, sérialisables"""
+
+        return {
+            'regimes': self.regimes,
+            'features': self.features,
+            'start_probabilities': np.round(np.exp(self.start_log_prob), 4).tolist(),
+            'transition_matrix': np.round(np.exp(self.transition_log_prob), 4).tolist(),
+            'means': np.round(self.means, 4).tolist(),
+            'variances': np.round(self.variances, 4).tolist(),
+            'fitted_at': self.fitted_at
+        }
+
+    # Méthodes privées utilitaires
+
+    def _initialize_from_priors(self):
+        """Initialise les paramètres à partir des fréquences historiques des régimes"""
+
+        frequencies = np.array([self.regime_frequencies[r] for r in self.regimes], dtype=float)
+        frequencies = frequencies / frequencies.sum()
+
+        # Transitions: persistance sur la diagonale, sorties réparties selon les fréquences
+        k = len(self.regimes)
+        off_diagonal = np.tile(frequencies, (k, 1))
+        np.fill_diagonal(off_diagonal, 0.0)
+        off_diagonal = off_diagonal / off_diagonal.sum(axis=1, keepdims=True)
+        transitions = self.persistence * np.eye(k) + (1 - self.persistence) * off_diagonal
+
+        self.start_log_prob = np.log(frequencies)
+        self.transition_log_prob = np.log(transitions)
+
+        # Moyennes a priori si disponibles pour les indicateurs configurés, sinon zéro
+        n_features = len(self.features)
+        means = []
+        for regime in self.regimes:
+            prior_means = self.initial_means.get(regime, [])
+            means.append(prior_means[:n_features] if len(prior_means) >= n_features else [0.0] * n_features)
+        self.means = np.array(means, dtype=float)
+        self.variances = np.ones((k, len(self.features)), dtype=float) * 2.0
+
+    def _relabel_states(self, observed_features: np.ndarray) -> Dict[int, str]:
+        """
+        Associe chaque état appris au régime dont la moyenne a priori est la plus proche
+        (affectation optimale sur les indicateurs observés, écarts réduits par la dispersion des priors)
+        et réordonne les paramètres en conséquence
+
+        Returns:
+            Régime attribué à chaque état issu de l'EM (identité si aucun prior exploitable)
+        """
+
+        k, n_features = self.means.shape
+        identity = {state: regime for state, regime in enumerate(self.regimes)}
+        if any(len(self.initial_means.get(r, [])) < n_features for r in self.regimes) or not observed_features.any():
+            return identity
+
+        priors = np.array([self.initial_means[r][:n_features] for r in self.regimes], dtype=float)[:, observed_features]
+        scale = np.maximum(priors.std(axis=0), 1e-6)
+        fitted = self.means[:, observed_features]
+        cost = (((fitted[:, None, :] - priors[None, :, :]) / scale) ** 2).sum(axis=2)
+
+        # K! affectations (K = 4 régimes: 24), coût minimal retenu
+        assignment = min(permutations(range(k)), key=lambda perm: cost[np.arange(k), perm].sum())
+        order = np.argsort(assignment)
+
+        self.means = self.means[order]
+        self.variances = self.variances[order]
+        self.start_log_prob = self.start_log_prob[order]
+        self.transition_log_prob = self.transition_log_prob[np.ix_(order, order)]
+
+        return {state: self.regimes[regime] for state, regime in enumerate(assignment)}
+
+    def _log_emission(self, obs: np.ndarray) -> np.ndarray:
+        """Log-densités gaussiennes diagonales (périodes × régimes), dimensions NaN ignorées"""
+
+        observed = ~np.isnan(obs)
+        diff = np.where(observed[:, None, :], obs[:, None, :] - self.means[None, :, :], 0.0)
+        log_terms = -0.5 * (np.log(2 * np.pi * self.variances)[None, :, :] + diff ** 2 / self.variances[None, :, :])
+        return np.where(observed[:, None, :], log_terms, 0.0).sum(axis=2)
+
+    def _forward(self, log_emission: np.ndarray):
+        """Récursion forward en log, vectorisée sur les états"""
+
+        periods = log_emission.shape[0]
+        log_alpha = np.empty_like(log_emission)
+        log_alpha[0] = self.start_log_prob + log_emission[0]
+
+        for t in range(1, periods):
+            log_alpha[t] = self._logsumexp(log_alpha[t - 1][:, None] + self.transition_log_prob, axis=0) + log_emission[t]
+
+        return log_alpha, float(self._logsumexp(log_alpha[-1]))
+
+    def _backward(self, log_emission: np.ndarray) -> np.ndarray:
+        """Récursion backward en log, vectorisée sur les états"""
+
+        periods = log_emission.shape[0]
+        log_beta = np.zeros_like(log_emission)
+
+        for t in range(periods - 2, -1, -1):
+            log_beta[t] = self._logsumexp(
+                self.transition_log_prob + (log_emission[t + 1] + log_beta[t + 1])[None, :], axis=1
+            )
+
+        return log_beta
+
+    @staticmethod
+    def _logsumexp(values: np.ndarray, axis: Optional[int] = None):
+        """log(sum(exp(values))) numériquement stable"""
+
+        peak = np.max(values, axis=axis, keepdims=True)
+        peak = np.where(np.isfinite(peak), peak, 0.0)
+        result = np.log(np.sum(np.exp(values - peak), axis=axis, keepdims=True)) + peak
+        return np.squeeze(result, axis=axis) if axis is not None else result.item()
+
+# Fonction utilitaire pour Firebase Functions
+def create_regime_hmm_detector(regime_frequencies: Optional[Dict[str, float]] = None):
+    """Factory function pour créer une instance GaussianHMMRegimeDetector"""
+    return GaussianHMMRegimeDetector(regime_frequencies)
+
+# Test du module
+if __name__ == "__main__":
+    rng = np.random.default_rng(7)
+
+    # Historique simulé: alternance expansion / récession / expansion
+    expansion = rng.normal([2.5, 2.5, 5.5], [0.8, 0.6, 0.5], size=(120, 3))
+    recession = rng.normal([-1.5, 1.5, 8.0], [0.8, 0.6, 0.5], size=(24, 3))
+    history = np.vstack([expansion, recession, expansion[:60]])
+
+    detector = GaussianHMMRegimeDetector()
+    fit_result = detector.fit(history)
+    print(f"HMM ajusté: LL={fit_result['log_likelihood']} en {fit_result['iterations']} itérations")
+
+    state = detector.update([-2.0, 1.2, 8.4])
+    print(f"Nouvelle observation → {state['regime']} ({state['confidence']})")
@@ -0,0 +1,161 @@
+"""
+Oracle Portfolio - Machine à États des Régimes
+État persistant par pays avec hystérésis pour éviter les bascules intempestives
+"""
+
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RegimeState:
+    """État courant du régime d'un pays"""
+    country: str
+    regime: str
+    dwell_periods: int
+    smoothed_scores: Dict[str, float]
+    raw_regime: str
+    candidate_regime: Optional[str] = None
+    candidate_periods: int = 0
+    switches: int = 0
+    observations: int = 1
+    last_observation_key: Optional[Hashable] = None
+    last_update: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    def to_dict(self) -> Dict:
+        """Représentation sérialisable de l'état"""
+        return {
+            'regime': self.regime,
+            'raw_regime': self.raw_regime,
+            'dwell_periods': self.dwell_periods,
+            'smoothed_scores': {k: round(v, 4) for k, v in self.smoothed_scores.items()},
+            'candidate_regime': self.candidate_regime,
+            'candidate_periods': self.candidate_periods,
+            'switches': self.switches,
+            'observations': self.observations,
+            'last_update': self.last_update
+        }
+
+class RegimeStateMachine:
+    """
+    Machine à états des régimes par pays
+    - Applique uniquement les nouvelles observations (clé d'observation déjà vue = no-op)
+    - Lissage exponentiel des scores par régime
+    - Hystérésis: marge de score, durée minimale de séjour et confirmation avant bascule
+    """
+
+    def __init__(self, smoothing_alpha: float = 0.5, switch_margin: float = 0.10,
+                 min_dwell_periods: int = 2, confirmation_periods: int = 2):
+        self.config = {
+            'smoothing_alpha': smoothing_alpha,        # Poids de la nouvelle observation
+            'switch_margin': switch_margin,            # Avance de score requise pour basculer
+            'min_dwell_periods': min_dwell_periods,    # Séjour minimal dans un régime
+            'confirmation_periods': confirmation_periods  # Observations consécutives du challenger
+        }
+        self._states: Dict[str, RegimeState] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hysteresis_enabled(self) -> bool:
+        """Vrai si une inertie de régime est effectivement appliquée"""
+        return (
+            self.config['switch_margin'] > 0 or
+            self.config['min_dwell_periods'] > 1 or
+            self.config['confirmation_periods'] > 1
+        )
+
+    def get_state(self, country: str) -> Optional[RegimeState]:
+        """Lecture O(1) de l'état courant d'un pays"""
+        return self._states.get(country)
+
+    def update(self, country: str, scores: Dict[str, float],
+               observation_key: Optional[Hashable] = None) -> RegimeState:
+        """
+        Applique une nouvelle observation de scores par régime
+
+        Args:
+            country: Code pays
+            scores: Score (0-1) par régime pour la nouvelle observation
+            observation_key: Identifiant de l'observation (ex: dates des données); ignorée si déjà appliquée
+
+        Returns:
+            RegimeState mis à jour
+        """
+
+        raw_regime = max(scores, key=scores.get)
+
+        with self._lock:
+            state = self._states.get(country)
+
+            if state is None:
+                state = RegimeState(
+                    country=country,
+                    regime=raw_regime,
+                    dwell_periods=1,
+                    smoothed_scores=dict(scores),
+                    raw_regime=raw_regime,
+                    last_observation_key=observation_key
+                )
+                self._states[country] = state
+                return state
+
+            if observation_key is not None and observation_key == state.last_observation_key:
+                return state
+
+            alpha = self.config['smoothing_alpha']
+            regimes = set(state.smoothed_scores) | set(scores)
+            state.smoothed_scores = {
+                regime: alpha * scores.get(regime, 0.0) + (1 - alpha) * state.smoothed_scores.get(regime, 0.0)
+                for regime in regimes
+            }
+            state.raw_regime = raw_regime
+            state.observations += 1
+            state.last_observation_key = observation_key
+            state.last_update = datetime.utcnow().isoformat()
+
+            self._apply_transition(state)
+            return state
+
+    def reset(self, country: Optional[str] = None):
+        """Réinitialise l'état d'un pays (ou de tous les pays)"""
+        with self._lock:
+            if country is None:
+                self._states.clear()
+            else:
+                self._states.pop(country, None)
+
+    # Méthodes privées utilitaires
+
+    def _apply_transition(self, state: RegimeState):
+        """Décide du maintien ou de la bascule du régime selon les règles d'hystérésis"""
+
+        challenger = max(state.smoothed_scores, key=state.smoothed_scores.get)
+        current_score = state.smoothed_scores.get(state.regime, 0.0)
+        lead = state.smoothed_scores[challenger] - current_score
+
+        if challenger == state.regime or lead < self.config['switch_margin']:
+            state.dwell_periods += 1
+            state.candidate_regime = None
+            state.candidate_periods = 0
+            return
+
+        if challenger == state.candidate_regime:
+            state.candidate_periods += 1
+        else:
+            state.candidate_regime = challenger
+            state.candidate_periods = 1
+
+        if (state.dwell_periods >= self.config['min_dwell_periods'] and
+                state.candidate_periods >= self.config['confirmation_periods']):
+            logger.info(f"Bascule régime {state.country}: {state.regime} → {challenger}")
+            state.regime = challenger
+            state.dwell_periods = 1
+            state.candidate_regime = None
+            state.candidate_periods = 0
+            state.switches += 1
+        else:
+            state.dwell_periods += 1
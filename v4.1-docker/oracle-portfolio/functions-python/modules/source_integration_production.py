@@ -19,6 +19,10 @@ import aiohttp
 from functools import lru_cache
 import time
 
+from .country_registry import COUNTRIES, canonical_code
+from .cache import BoundedTTLCache
+from .upstream_config import upstream_url
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -53,15 +57,14 @@ class SourceIntegrationManager:
     def __init__(self):
         self.sources = self._initialize_sources()
         self.country_mappings = self._initialize_country_mappings()
-        self.cache = {}
-        self.cache_ttl = 3600  # 1 heure
+        self.cache = BoundedTTLCache('source_integration', max_entries=256, default_ttl=3600)  # 1 heure
         
     def _initialize_sources(self) -> Dict[str, DataSource]:
         """Initialisation des sources de données par priorité"""
         return {
             'eia': DataSource(
                 name='EIA International',
-                url='https://api.eia.gov/v2',
+                url=upstream_url('eia'),
                 api_key=None,  # À configurer en production
                 priority=1,
                 timeout=30,
@@ -69,7 +72,7 @@ class SourceIntegrationManager:
             ),
             'entso': DataSource(
                 name='ENTSO-E Transparency',
-                url='https://web-api.tp.entsoe.eu/api',
+                url=upstream_url('entsoe'),
                 api_key=None,  # À configurer en production
                 priority=1,
                 timeout=30,
@@ -77,7 +80,7 @@ class SourceIntegrationManager:
             ),
             'oecd': DataSource(
                 name='OECD SDMX',
-                url='https://stats.oecd.org/SDMX-JSON',
+                url=upstream_url('oecd'),
                 api_key=None,  # Gratuit, pas de clé requise
                 priority=2,
                 timeout=20,
@@ -85,7 +88,7 @@ class SourceIntegrationManager:
             ),
             'fred': DataSource(
                 name='FRED Economic Data',
-                url='https://api.stlouisfed.org/fred',
+                url=upstream_url('fred'),
                 api_key=None,  # À configurer en production
                 priority=2,
                 timeout=20,
@@ -93,45 +96,14 @@ class SourceIntegrationManager:
             )
         }
     
-    def _initialize_country_mappings(self) -> List[CountryMapping]:
-        """Mapping complet pays avec codes sources multiples"""
-        return [
-            # Europe ENTSO-E + OECD
-            CountryMapping('DEU', 'Germany', 'INTL.2-12-DEU-BKWH.A', '10Y1001A1001A83F', 'DEU', None),
-            CountryMapping('FRA', 'France', 'INTL.2-12-FRA-BKWH.A', '10Y1001A1001A92E', 'FRA', None),
-            CountryMapping('GBR', 'United Kingdom', 'INTL.2-12-GBR-BKWH.A', '10Y1001A1001A92E', 'GBR', None),
-            CountryMapping('ITA', 'Italy', 'INTL.2-12-ITA-BKWH.A', '10Y1001A1001A70O', 'ITA', None),
-            CountryMapping('ESP', 'Spain', 'INTL.2-12-ESP-BKWH.A', '10Y1001A1001A85B', 'ESP', None),
-            CountryMapping('NLD', 'Netherlands', 'INTL.2-12-NLD-BKWH.A', '10Y1001A1001A92K', 'NLD', None),
-            CountryMapping('BEL', 'Belgium', 'INTL.2-12-BEL-BKWH.A', '10Y1001A1001A82H', 'BEL', None),
-            CountryMapping('AUT', 'Austria', 'INTL.2-12-AUT-BKWH.A', '10Y1001A1001A83F', 'AUT', None),
-            CountryMapping('CHE', 'Switzerland', 'INTL.2-12-CHE-BKWH.A', '10Y1001A1001A68B', 'CHE', None),
-            CountryMapping('POL', 'Poland', 'INTL.2-12-POL-BKWH.A', '10Y1001A1001A51S', 'POL', None),
-            CountryMapping('CZE', 'Czech Republic', 'INTL.2-12-CZE-BKWH.A', '10Y1001A1001A51S', 'CZE', None),
-            CountryMapping('SVK', 'Slovakia', 'INTL.2-12-SVK-BKWH.A', '10Y1001A1001A51S', 'SVK', None),
-            CountryMapping('HUN', 'Hungary', 'INTL.2-12-HUN-BKWH.A', '10Y1001A1001A51S', 'HUN', None),
-            CountryMapping('DNK', 'Denmark', 'INTL.2-12-DNK-BKWH.A', '10Y1001A1001A65H', 'DNK', None),
-            CountryMapping('SWE', 'Sweden', 'INTL.2-12-SWE-BKWH.A', '10Y1001A1001A44P', 'SWE', None),
-            CountryMapping('NOR', 'Norway', 'INTL.2-12-NOR-BKWH.A', '10Y1001A1001A48H', 'NOR', None),
-            CountryMapping('FIN', 'Finland', 'INTL.2-12-FIN-BKWH.A', '10Y1001A1001A47J', 'FIN', None),
-            
-            # Amérique du Nord
-            CountryMapping('USA', 'United States', 'INTL.2-12-USA-BKWH.A', None, 'USA', 'ELEC'),
-            CountryMapping('CAN', 'Canada', 'INTL.2-12-CAN-BKWH.A', None, 'CAN', None),
-            CountryMapping('MEX', 'Mexico', 'INTL.2-12-MEX-BKWH.A', None, 'MEX', None),
-            
-            # Asie-Pacifique
-            CountryMapping('JPN', 'Japan', 'INTL.2-12-JPN-BKWH.A', None, 'JPN', None),
-            CountryMapping('KOR', 'South Korea', 'INTL.2-12-KOR-BKWH.A', None, 'KOR', None),
-            CountryMapping('AUS', 'Australia', 'INTL.2-12-AUS-BKWH.A', None, 'AUS', None),
-            CountryMapping('NZL', 'New Zealand', 'INTL.2-12-NZL-BKWH.A', None, 'NZL', None),
-            
-            # Autres
-            CountryMapping('CHN', 'China', 'INTL.2-12-CHN-BKWH.A', None, 'CHN', None),
-            CountryMapping('IND', 'India', 'INTL.2-12-IND-BKWH.A', None, 'IND', None),
-            CountryMapping('BRA', 'Brazil', 'INTL.2-12-BRA-BKWH.A', None, 'BRA', None),
-            CountryMapping('RUS', 'Russia', 'INTL.2-12-RUS-BKWH.A', None, 'RUS', None),
-        ]
+    def _initialize_country_mappings(self) -> Dict[str, CountryMapping]:
+        """Mapping complet pays avec codes sources multiples (registre unifié, indexé par code)"""
+        return {
+            info.code: CountryMapping(
+                info.code, info.name, info.eia_code, info.entso_code, info.oecd_code, info.fred_electricity_code
+            )
+            for info in COUNTRIES.values()
+        }
     
     async def get_electricity_data(self, country_code: str, start_date: str, end_date: str) -> Dict:
         """
@@ -142,13 +114,21 @@ class SourceIntegrationManager:
         if not country:
             return self._generate_fallback_data(country_code, start_date, end_date)
         
+        # Réponses des sources primaires mises en cache (jamais les données simulées)
+        cache_key = ('electricity', country.country_code, start_date, end_date)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Tentative EIA (priorité 1)
         if country.eia_code:
             try:
                 data = await self._fetch_eia_data(country.eia_code, start_date, end_date)
                 if data['status'] == 'success':
                     logger.info(f"EIA data retrieved successfully for {country_code}")
-                    return self._format_response(data, 'EIA', country_code, 95)
+                    response = self._format_response(data, 'EIA', country_code, 95)
+                    self.cache.set(cache_key, response)
+                    return response
             except Exception as e:
                 logger.warning(f"EIA failed for {country_code}: {e}")
         
@@ -158,7 +138,9 @@ class SourceIntegrationManager:
                 data = await self._fetch_entso_data(country.entso_code, start_date, end_date)
                 if data['status'] == 'success':
                     logger.info(f"ENTSO-E data retrieved successfully for {country_code}")
-                    return self._format_response(data, 'ENTSO-E', country_code, 95)
+                    response = self._format_response(data, 'ENTSO-E', country_code, 95)
+                    self.cache.set(cache_key, response)
+                    return response
             except Exception as e:
                 logger.warning(f"ENTSO-E failed for {country_code}: {e}")
         
@@ -168,7 +150,9 @@ class SourceIntegrationManager:
                 data = await self._fetch_oecd_data(country.oecd_code, start_date, end_date)
                 if data['status'] == 'success':
                     logger.info(f"OECD data retrieved successfully for {country_code}")
-                    return self._format_response(data, 'OECD', country_code, 90)
+                    response = self._format_response(data, 'OECD', country_code, 90)
+                    self.cache.set(cache_key, response)
+                    return response
             except Exception as e:
                 logger.warning(f"OECD failed for {country_code}: {e}")
         
@@ -389,11 +373,8 @@ class SourceIntegrationManager:
         }
     
     def _get_country_mapping(self, country_code: str) -> Optional[CountryMapping]:
-        """Récupération mapping pays"""
-        for mapping in self.country_mappings:
-            if mapping.country_code == country_code:
-                return mapping
-        return None
+        """Récupération mapping pays (O(1), alias acceptés)"""
+        return self.country_mappings.get(canonical_code(country_code))
     
     def _get_country_name(self, country_code: str) -> str:
         """Récupération nom pays"""
@@ -404,7 +385,7 @@ class SourceIntegrationManager:
         """Liste pays supportés avec métadonnées sources"""
         countries = []
         
-        for mapping in self.country_mappings:
+        for mapping in self.country_mappings.values():
             sources = []
             if mapping.eia_code:
                 sources.append('EIA')
@@ -0,0 +1,32 @@
+"""
+Oracle Portfolio - URLs des Sources Amont
+URLs de base configurables par variable d'environnement (ex: serveur simulé local des tests de charge)
+- <SOURCE>_BASE_URL: URL d'une source
+- UPSTREAM_BASE_URL: préfixe commun, chaque source servie sous /<source> (ex: http://localhost:8099/fred)
+"""
+
+import os
+
+# Source: (variable d'environnement, URL de production)
+UPSTREAM_SOURCES = {
+    'fred': ('FRED_BASE_URL', 'https://api.stlouisfed.org/fred'),
+    'eia': ('EIA_BASE_URL', 'https://api.eia.gov/v2'),
+    'alpha_vantage': ('ALPHA_VANTAGE_BASE_URL', 'https://www.alphavantage.co'),
+    'oecd': ('OECD_BASE_URL', 'https://stats.oecd.org/SDMX-JSON'),
+    'entsoe': ('ENTSOE_BASE_URL', 'https://web-api.tp.entsoe.eu/api')
+}
+
+def upstream_url(source: str, path: str = '') -> str:
+    """
+    URL d'un endpoint amont (lue à chaque appel: changement d'environnement pris en compte sans redémarrage)
+
+    Args:
+        source: Clé de UPSTREAM_SOURCES
+        path: Chemin relatif à l'URL de base (ex: '/series/observations')
+    """
+    env_var, default = UPSTREAM_SOURCES[source]
+    base_url = os.environ.get(env_var)
+    if not base_url:
+        prefix = os.environ.get('UPSTREAM_BASE_URL')
+        base_url = f"{prefix.rstrip('/')}/{source}" if prefix else default
+    return base_url.rstrip('/') + path
@@ -0,0 +1,161 @@
+"""
+Oracle Portfolio 3.0 - Allocation Batch Module
+Matrice d'allocations pays × profils de risque × classes d'actifs
+calculée en une opération sur tableaux, à partir d'une seule collecte d'indicateurs
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from indicator_signal_engine import ASSET_CLASSES
+from allocation_solver import project_to_simplex
+
+RISK_PROFILES = ('conservative', 'moderate', 'aggressive')
+
+# Ajustements par profil de risque (appliqués après les ajustements des indicateurs physiques)
+RISK_PROFILE_ADJUSTMENTS = {
+    'conservative': {'stocks': -0.15, 'bonds': +0.10, 'cash': +0.05},
+    'moderate': {'stocks': 0.0, 'bonds': 0.0, 'cash': 0.0},
+    'aggressive': {'stocks': +0.10, 'bonds': -0.05, 'commodities': +0.05, 'cash': -0.10}
+}
+
+# Plafond actions par profil (equity_max), respecté exactement par la projection
+RISK_PROFILE_EQUITY_MAX = {'conservative': 0.40, 'moderate': 0.70, 'aggressive': 0.90}
+
+def risk_profile_upper_bounds(risk_profile: str) -> np.ndarray:
+    """Bornes hautes par actif (ordre ASSET_CLASSES) du profil"""
+    return np.array([
+        RISK_PROFILE_EQUITY_MAX[risk_profile] if asset == 'stocks' else 1.0 for asset in ASSET_CLASSES
+    ])
+
+def adjust_for_risk_profile(allocations: Dict[str, float], risk_profile: str) -> Dict[str, float]:
+    """
+    Ajustement d'une allocation selon le profil de risque (profil inconnu → moderate)
+
+    Args:
+        allocations: {actif: poids}
+        risk_profile: conservative, moderate ou aggressive
+
+    Returns:
+        {actif: poids} pour les actifs de l'allocation d'entrée
+    """
+    if risk_profile not in RISK_PROFILES:
+        risk_profile = 'moderate'
+
+    base = np.array([allocations.get(asset, 0.0) for asset in ASSET_CLASSES])
+    adjustments = np.array([RISK_PROFILE_ADJUSTMENTS[risk_profile].get(asset, 0.0) for asset in ASSET_CLASSES])
+
+    # Actifs absents de l'allocation d'entrée maintenus à 0
+    upper = np.where([asset in allocations for asset in ASSET_CLASSES], risk_profile_upper_bounds(risk_profile), 0.0)
+    adjusted = np.round(project_to_simplex(base + adjustments, 0.0, upper), 3)
+
+    return {asset: float(adjusted[i]) for i, asset in enumerate(ASSET_CLASSES) if asset in allocations}
+
+class AllocationBatchEngine:
+    """
+    Moteur d'allocations en lot
+    - Allocations de base par régime: (régimes, actifs)
+    - Ajustements physiques: communs à tous les pays (indicateurs mondiaux, une seule collecte)
+    - Ajustements de risque: (profils, actifs), diffusés sur (pays, profils, actifs)
+    Chaque étape est projetée sur les poids admissibles (plafond actions du profil) comme le calcul unitaire
+    """
+
+    def __init__(self, manager):
+        """
+        Args:
+            manager: PhysicalIndicatorsManager (allocations de base et moteur de signaux)
+        """
+        self.manager = manager
+        self.engine = manager.signal_engine
+
+        self.regimes: List[str] = list(manager.base_allocations)
+        self.regime_index = {regime: i for i, regime in enumerate(self.regimes)}
+        self.base_matrix = np.array([
+            [manager.base_allocations[regime].get(asset, 0.0) for asset in ASSET_CLASSES]
+            for regime in self.regimes
+        ])
+        self.risk_matrix = np.array([
+            [RISK_PROFILE_ADJUSTMENTS[profile].get(asset, 0.0) for asset in ASSET_CLASSES]
+            for profile in RISK_PROFILES
+        ])
+        self.risk_upper = np.array([risk_profile_upper_bounds(profile) for profile in RISK_PROFILES])
+
+    def compute(self, country_regimes: Dict[str, str], indicators: Dict[str, float],
+                risk_profiles: Optional[Sequence[str]] = None) -> Dict:
+        """
+        Calcule toute la matrice d'allocations
+
+        Args:
+            country_regimes: {pays: régime} (régime inconnu → EXPANSION)
+            indicators: Indicateurs physiques collectés une fois pour tous les pays
+            risk_profiles: Profils demandés (défaut: tous)
+
+        Returns:
+            Dict avec axes ('countries', 'risk_profiles', 'asset_classes'), tableau 'matrix'
+            (pays × profils × actifs) et signaux physiques
+        """
+        countries = list(country_regimes)
+        profiles = [p for p in (risk_profiles or RISK_PROFILES) if p in RISK_PROFILES]
+
+        # (pays, actifs): allocation de base du régime de chaque pays
+        default = self.regime_index['EXPANSION']
+        rows = np.array([self.regime_index.get(country_regimes[c], default) for c in countries], dtype=int)
+        base = self.base_matrix[rows]
+
+        # Ajustements physiques (actifs,) appliqués à tous les pays
+        signals = self.engine.signals(self.engine.to_array(indicators))
+        physical = self.engine.allocations(base, self.engine.adjustments(signals))
+
+        # (pays, profils, actifs)
+        selected = [RISK_PROFILES.index(p) for p in profiles]
+        matrix = self.engine.allocations(
+            physical[:, None, :], self.risk_matrix[selected][None, :, :], upper=self.risk_upper[selected][None, :, :]
+        )
+
+        return {
+            'countries': countries,
+            'risk_profiles': profiles,
+            'asset_classes': list(ASSET_CLASSES),
+            'matrix': matrix,
+            'signals': self.engine.signal_labels(signals, [n for n in indicators if n in self.engine.index])
+        }
+
+    def to_nested(self, result: Dict) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Matrice → {pays: {profil: {actif: poids}}}"""
+        matrix = result['matrix'].tolist()
+        return {
+            country: {
+                profile: dict(zip(result['asset_classes'], matrix[i][j]))
+                for j, profile in enumerate(result['risk_profiles'])
+            }
+            for i, country in enumerate(result['countries'])
+        }
+
+def get_allocations_batch(country_regimes: Dict[str, str], fred_api_key: str, eia_api_key: str,
+                          risk_profiles: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Allocations de tous les pays × profils avec une seule collecte d'indicateurs physiques
+    """
+    from physical_indicators_manager import PhysicalIndicatorsManager
+
+    manager = PhysicalIndicatorsManager(fred_api_key, eia_api_key)
+    indicators = manager.get_all_indicators()
+
+    batch_engine = AllocationBatchEngine(manager)
+    result = batch_engine.compute(country_regimes, indicators, risk_profiles)
+
+    return {
+        'allocations': batch_engine.to_nested(result),
+        'matrix': result['matrix'].tolist(),
+        'axes': {
+            'countries': result['countries'],
+            'risk_profiles': result['risk_profiles'],
+            'asset_classes': result['asset_classes']
+        },
+        'regimes': dict(country_regimes),
+        'indicators_used': indicators,
+        'signals': result['signals'],
+        'timestamp': datetime.now().isoformat()
+    }
@@ -0,0 +1,218 @@
+"""
+Oracle Portfolio 3.0 - Dashboard Pipeline Module
+Composition asynchrone des données du dashboard intégré
+- Graphe de dépendances: séries → indicateurs → signaux → allocations / stress, régime et cotations en parallèle
+- Chaque nœud démarre dès que ses dépendances sont résolues, chaque série n'est récupérée qu'une fois
+- Latence bornée par le chemin critique du graphe au lieu de la somme des appels amont
+- Pool de threads borné propre à chaque requête: pas d'attente derrière les appels des autres requêtes
+- Séries en secours journalisées et signalées dans la réponse
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from physical_indicators_manager import PhysicalIndicatorsManager
+
+# Configuration logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pas de valeur de secours: l'erreur du nœud est propagée à ses dépendants
+_NO_FALLBACK = object()
+
+class TaskGraph:
+    """
+    Graphe de tâches exécuté sur une boucle asyncio
+    - Tâches bloquantes (appels amont, lectures de store) dans un pool de threads propre à l'exécution,
+      un thread par tâche bloquante (borné par max_workers)
+    - Tâches de calcul légères (blocking=False) directement sur la boucle
+    - Timeout et valeur de secours optionnels par nœud (timeout décompté à partir du démarrage
+      effectif dans un thread, pas de l'attente dans la file du pool)
+    """
+
+    def __init__(self, max_workers: int = 16):
+        self.max_workers = max_workers
+        self.nodes: Dict[str, Dict] = {}
+        self.timings: Dict[str, float] = {}
+        self.fallbacks: List[str] = []
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = (), blocking: bool = True,
+            timeout: Optional[float] = None, fallback: Any = _NO_FALLBACK):
+        """
+        Ajoute un nœud
+
+        Args:
+            name: Nom unique du nœud
+            fn: Fonction appelée avec les résultats des dépendances (dans l'ordre de deps)
+            deps: Nœuds dont le résultat est requis
+            blocking: Exécution dans le pool de threads (True) ou sur la boucle (calcul court)
+            timeout: Durée max (s) avant d'utiliser fallback
+            fallback: Résultat en cas d'erreur ou de timeout
+        """
+        if name in self.nodes:
+            raise ValueError(f"Nœud déjà défini: {name}")
+        self.nodes[name] = {
+            'fn': fn, 'deps': list(deps), 'blocking': blocking, 'timeout': timeout, 'fallback': fallback
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        """Exécute le graphe, retourne les résultats par nœud (première erreur non rattrapée propagée)"""
+        loop = asyncio.get_running_loop()
+        tasks: Dict[str, asyncio.Future] = {}
+
+        blocking = sum(1 for node in self.nodes.values() if node['blocking'])
+        executor = ThreadPoolExecutor(max_workers=max(1, min(blocking, self.max_workers)),
+                                      thread_name_prefix='task-graph')
+
+        async def execute(name: str) -> Any:
+            node = self.nodes[name]
+            args = [await tasks[dep] for dep in node['deps']]
+            started = time.perf_counter()
+            try:
+                if node['blocking']:
+                    result = await self._run_blocking(loop, executor, node, args)
+                else:
+                    result = node['fn'](*args)
+            except Exception as e:
+                if node['fallback'] is _NO_FALLBACK:
+                    raise
+                logger.warning(f"Nœud {name} en secours ({type(e).__name__}: {e})")
+                self.fallbacks.append(name)
+                result = node['fallback']
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 1)
+            return result
+
+        for name in self._topological_order():
+            tasks[name] = asyncio.ensure_future(execute(name))
+
+        # Toutes les tâches terminées avant de propager une erreur (pas de tâche orpheline)
+        try:
+            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        finally:
+            # Les appels expirés terminent en arrière-plan, la réponse ne les attend pas
+            executor.shutdown(wait=False)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(tasks, results))
+
+    # Méthodes privées utilitaires
+
+    async def _run_blocking(self, loop: asyncio.AbstractEventLoop, executor: ThreadPoolExecutor,
+                            node: Dict, args: List[Any]) -> Any:
+        """Exécute le nœud dans le pool; le timeout démarre quand un thread prend la tâche"""
+        started = loop.create_future()
+
+        def call():
+            loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+            return node['fn'](*args)
+
+        future = loop.run_in_executor(executor, call)
+        if not node['timeout']:
+            return await future
+
+        await asyncio.wait([started, future], return_when=asyncio.FIRST_COMPLETED)
+        # Au timeout le thread termine sa requête en arrière-plan, sans bloquer la réponse
+        return await asyncio.wait_for(future, node['timeout'])
+
+    def _topological_order(self) -> List[str]:
+        """Ordre de création des tâches (dépendances d'abord), erreur si cycle ou dépendance inconnue"""
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: List[str]):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Cycle dans le graphe: {' -> '.join(path + [name])}")
+            if name not in self.nodes:
+                raise ValueError(f"Dépendance inconnue: {name} (requise par {path[-1] if path else '?'})")
+            state[name] = 'visiting'
+            for dep in self.nodes[name]['deps']:
+                visit(dep, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, [])
+        return order
+
+def build_dashboard_graph(country: str, regime_lookup: Callable[[str], tuple],
+                          etf_lookup: Callable[[List[str]], Dict], fred_api_key: str, eia_api_key: str,
+                          etf_symbols: Sequence[str] = ('SPY', 'VTI', 'VEA')) -> TaskGraph:
+    """
+    Graphe des données du dashboard
+
+    Args:
+        country: Code pays
+        regime_lookup: country -> (régime, version du snapshot)
+        etf_lookup: symboles -> cotations
+        fred_api_key, eia_api_key: Clés des sources des indicateurs physiques
+        etf_symbols: Cotations affichées
+    """
+    manager = PhysicalIndicatorsManager(fred_api_key, eia_api_key)
+    graph = TaskGraph(max_workers=int(os.environ.get('DASHBOARD_MAX_WORKERS', 16)))
+    deadline = manager.collection_config['deadline_seconds']
+
+    # Séries amont (une fois chacune, partagées par allocations et stress)
+    names = list(manager.indicators_config)
+    for name in names:
+        graph.add(
+            f'series:{name}', partial(manager.fetch_indicator, name),
+            timeout=deadline, fallback=manager.fallback_values.get(name, 100.0)
+        )
+
+    # Sources indépendantes des indicateurs
+    graph.add('regime', partial(regime_lookup, country))
+    graph.add('etf_prices', partial(etf_lookup, list(etf_symbols)))
+
+    # Calculs dérivés
+    graph.add('indicators', lambda *values: dict(zip(names, values)),
+              deps=[f'series:{name}' for name in names], blocking=False)
+    graph.add('signals', manager.analyze_indicator_signals, deps=['indicators'], blocking=False)
+    graph.add(
+        'allocations',
+        lambda regime, indicators, signals: manager.generate_dynamic_allocations(regime[0]['regime'], indicators, signals),
+        deps=['regime', 'indicators', 'signals'], blocking=False
+    )
+    graph.add('stress', manager.get_indicators_breakdown, deps=['indicators', 'signals'], blocking=False)
+
+    return graph
+
+def get_dashboard_data(country: str, regime_lookup: Callable[[str], tuple],
+                       etf_lookup: Callable[[List[str]], Dict], fred_api_key: str, eia_api_key: str) -> Dict:
+    """
+    Données du dashboard intégré (point d'entrée synchrone des fonctions HTTP)
+
+    Returns:
+        Dict avec regime, snapshot_version, allocations, etf_prices, stress (analyse des indicateurs)
+        et fallback_series (séries remplacées par leur valeur de secours)
+    """
+    graph = build_dashboard_graph(country, regime_lookup, etf_lookup, fred_api_key, eia_api_key)
+
+    started = time.perf_counter()
+    results = asyncio.run(graph.run())
+    logger.debug(
+        f"Dashboard {country} en {(time.perf_counter() - started) * 1000:.0f} ms - "
+        f"{', '.join(f'{name} {ms:.0f}' for name, ms in graph.timings.items())}"
+    )
+
+    # Séries en secours: valeurs de repli dans les indicateurs, signalées au client
+    fallback_series = [name.split(':', 1)[1] for name in graph.fallbacks if name.startswith('series:')]
+    if fallback_series:
+        logger.warning(f"Dashboard {country}: séries en secours {', '.join(fallback_series)}")
+
+    regime_data, snapshot_version = results['regime']
+    return {
+        'regime': regime_data,
+        'snapshot_version': snapshot_version,
+        'allocations': results['allocations'],
+        'etf_prices': results['etf_prices'],
+        'stress': results['stress'],
+        'fallback_series': fallback_series
+    }
@@ -3,14 +3,24 @@ Oracle Portfolio 3.0 - Economic Regimes Detection Module
 Détection sophistiquée des régimes économiques avec fréquences réalistes
 """
 
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import requests
 import logging
-from typing import Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
 import json
 
+from country_registry import get_series
+import indicator_transforms
+from regime_confidence import RegimeConfidenceEngine, DATA_QUALITY_NOISE
+from single_flight import single_flight, request_key
+from upstream_config import upstream_url
+from regime_snapshot import generate_global_summary
+
+# pandas n'est importé qu'à la première récupération FRED (coût de démarrage à froid)
+if TYPE_CHECKING:
+    import pandas as pd
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,7 +33,7 @@ class EconomicRegimesDetector:
     
     def __init__(self, fred_api_key: str):
         self.fred_api_key = fred_api_key
-        self.base_url = "https://api.stlouisfed.org/fred/series/observations"
+        self.base_url = upstream_url('fred', '/series/observations')
         
         # Seuils calibrés sur données historiques (1970-2024)
         self.thresholds = {
@@ -39,37 +49,23 @@ class EconomicRegimesDetector:
             'STAGFLATION': 0.08,    # 8% du temps (années 1970s principalement)
             'BOOM': 0.12           # 12% du temps (fin 1990s, milieu 2000s, 2010s)
         }
+        
+        # Décalages (en observations) des taux calculés, identiques aux calculs unitaires
+        # calculate_growth_rate (iloc[-4]) et calculate_inflation_rate (iloc[-12])
+        self.rate_lags = {'growth': 3, 'inflation': 11}
+        
+        # Probabilités de régime par perturbation bootstrap des indicateurs
+        self.confidence_engine = RegimeConfidenceEngine(self.thresholds, self.regime_frequencies)
     
-    def fetch_fred_data(self, series_id: str, country_code: str = 'US') -> Optional[pd.DataFrame]:
+    def fetch_fred_data(self, series_id: str, country_code: str = 'US') -> Optional['pd.DataFrame']:
         """
         Récupère les données FRED pour un indicateur donné
         """
         try:
-            # Mapping des codes pays vers les séries FRED
-            country_series = {
-                'US': {
-                    'GDP_GROWTH': 'GDPC1',
-                    'INFLATION': 'CPIAUCSL',
-                    'UNEMPLOYMENT': 'UNRATE'
-                },
-                'FRA': {
-                    'GDP_GROWTH': 'NAEXKP01FRQ657S',
-                    'INFLATION': 'FRACPIALLMINMEI',
-                    'UNEMPLOYMENT': 'LRHUTTTTFRQ156S'
-                },
-                'DEU': {
-                    'GDP_GROWTH': 'NAEXKP01DEQ657S',
-                    'INFLATION': 'DEUCPIALLMINMEI',
-                    'UNEMPLOYMENT': 'LRHUTTTTDEQ156S'
-                },
-                'GBR': {
-                    'GDP_GROWTH': 'NAEXKP01GBQ657S',
-                    'INFLATION': 'GBRCPIALLMINMEI',
-                    'UNEMPLOYMENT': 'LRHUTTTTGBQ156S'
-                }
-            }
+            import pandas as pd
             
-            fred_series = country_series.get(country_code, {}).get(series_id)
+            # Série FRED du pays (registre unifié, alias 'US' → 'USA' acceptés)
+            fred_series = get_series(country_code, series_id)
             if not fred_series:
                 logger.warning(f"Série FRED non trouvée pour {series_id} - {country_code}")
                 return None
@@ -82,10 +78,11 @@ class EconomicRegimesDetector:
                 'sort_order': 'desc'
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            # Appels simultanés sur la même série regroupés en une requête amont
+            data = single_flight(
+                request_key('fred', fred_series, params),
+                lambda: self._get_json(params)
+            )
             observations = data.get('observations', [])
             
             if not observations:
@@ -103,7 +100,15 @@ class EconomicRegimesDetector:
             logger.error(f"Erreur récupération FRED {series_id}: {e}")
             return None
     
-    def calculate_growth_rate(self, df: pd.DataFrame) -> float:
+    def _get_json(self, params: Dict) -> Dict:
+        """
+        Requête FRED amont (réponse JSON)
+        """
+        response = requests.get(self.base_url, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    
+    def calculate_growth_rate(self, df: 'pd.DataFrame') -> float:
         """
         Calcule le taux de croissance annualisé
         """
@@ -124,7 +129,7 @@ class EconomicRegimesDetector:
             logger.error(f"Erreur calcul croissance: {e}")
             return 0.0
     
-    def calculate_inflation_rate(self, df: pd.DataFrame) -> float:
+    def calculate_inflation_rate(self, df: 'pd.DataFrame') -> float:
         """
         Calcule le taux d'inflation annuel
         """
@@ -145,7 +150,7 @@ class EconomicRegimesDetector:
             logger.error(f"Erreur calcul inflation: {e}")
             return 2.0
     
-    def get_unemployment_rate(self, df: pd.DataFrame) -> float:
+    def get_unemployment_rate(self, df: 'pd.DataFrame') -> float:
         """
         Récupère le taux de chômage le plus récent
         """
@@ -178,10 +183,14 @@ class EconomicRegimesDetector:
             
             # Calcul de l'indice de confiance
             confidence = self._calculate_confidence(growth_rate, inflation_rate, unemployment_rate, regime)
+            data_quality = self._assess_data_quality(gdp_data, inflation_data, unemployment_data)
             
             return {
                 'regime': regime,
                 'confidence': confidence,
+                'regime_probabilities': self.confidence_engine.regime_probabilities(
+                    growth_rate, inflation_rate, unemployment_rate, DATA_QUALITY_NOISE[data_quality]
+                ),
                 'indicators': {
                     'growth': growth_rate,
                     'inflation': inflation_rate,
@@ -189,13 +198,98 @@ class EconomicRegimesDetector:
                 },
                 'timestamp': datetime.now().isoformat(),
                 'country': country_code,
-                'data_quality': self._assess_data_quality(gdp_data, inflation_data, unemployment_data)
+                'data_quality': data_quality
             }
             
         except Exception as e:
             logger.error(f"Erreur détection régime pour {country_code}: {e}")
             return self._get_fallback_regime(country_code)
     
+    def compute_indicators_batch(self, gdp_frames: List[Optional['pd.DataFrame']],
+                                 inflation_frames: List[Optional['pd.DataFrame']],
+                                 unemployment_frames: List[Optional['pd.DataFrame']]) -> Dict[str, np.ndarray]:
+        """
+        Calcule croissance, inflation et chômage pour N pays en une seule passe vectorisée
+        Mêmes résultats et valeurs par défaut que calculate_growth_rate / calculate_inflation_rate /
+        get_unemployment_rate, sans surcoût pandas par série
+        
+        Args:
+            gdp_frames, inflation_frames, unemployment_frames: Une DataFrame (ou None) par pays
+        
+        Returns:
+            {'growth': array(N), 'inflation': array(N), 'unemployment': array(N)}
+        """
+        def values(frames):
+            return [df['value'].to_numpy() if df is not None else None for df in frames]
+        
+        # Panel (2 × N séries) × temps: croissance et inflation partagent le même calcul de variation
+        rates_panel = indicator_transforms.build_panel(values(gdp_frames) + values(inflation_frames))
+        n_countries = len(gdp_frames)
+        lags = np.repeat([self.rate_lags['growth'], self.rate_lags['inflation']], n_countries)
+        rates = indicator_transforms.pct_change(rates_panel, lags)[:, -1]
+        
+        unemployment = indicator_transforms.latest(indicator_transforms.build_panel(values(unemployment_frames)))
+        
+        return {
+            'growth': np.round(np.nan_to_num(rates[:n_countries], nan=0.0), 2),
+            'inflation': np.round(np.nan_to_num(rates[n_countries:], nan=2.0), 2),
+            'unemployment': np.round(np.nan_to_num(unemployment, nan=5.0), 2)
+        }
+    
+    def detect_regimes_batch(self, country_codes: List[str]) -> Dict[str, Dict]:
+        """
+        Détecte les régimes de plusieurs pays avec un calcul d'indicateurs groupé
+        """
+        frames = {
+            indicator: [self.fetch_fred_data(indicator, country) for country in country_codes]
+            for indicator in ('GDP_GROWTH', 'INFLATION', 'UNEMPLOYMENT')
+        }
+        
+        try:
+            indicators = self.compute_indicators_batch(
+                frames['GDP_GROWTH'], frames['INFLATION'], frames['UNEMPLOYMENT']
+            )
+        except Exception as e:
+            logger.error(f"Erreur calcul groupé des indicateurs: {e}")
+            return {country: self.detect_regime(country) for country in country_codes}
+        
+        data_quality = [
+            self._assess_data_quality(frames['GDP_GROWTH'][i], frames['INFLATION'][i], frames['UNEMPLOYMENT'][i])
+            for i in range(len(country_codes))
+        ]
+        
+        # Probabilités de tous les pays en une seule opération (N pays × tirages)
+        probabilities = self.confidence_engine.probabilities_to_dicts(
+            self.confidence_engine.probabilities_batch(
+                indicators['growth'], indicators['inflation'], indicators['unemployment'],
+                np.array([DATA_QUALITY_NOISE[quality] for quality in data_quality])
+            )
+        )
+        
+        results = {}
+        for i, country in enumerate(country_codes):
+            growth_rate = float(indicators['growth'][i])
+            inflation_rate = float(indicators['inflation'][i])
+            unemployment_rate = float(indicators['unemployment'][i])
+            
+            regime = self._classify_regime(growth_rate, inflation_rate, unemployment_rate)
+            
+            results[country] = {
+                'regime': regime,
+                'confidence': self._calculate_confidence(growth_rate, inflation_rate, unemployment_rate, regime),
+                'regime_probabilities': probabilities[i],
+                'indicators': {
+                    'growth': growth_rate,
+                    'inflation': inflation_rate,
+                    'unemployment': unemployment_rate
+                },
+                'timestamp': datetime.now().isoformat(),
+                'country': country,
+                'data_quality': data_quality[i]
+            }
+        
+        return results
+    
     def _classify_regime(self, growth: float, inflation: float, unemployment: float) -> str:
         """
         Classifie le régime économique basé sur les indicateurs
@@ -283,6 +377,9 @@ class EconomicRegimesDetector:
         return {
             'regime': 'EXPANSION',
             'confidence': 0.60,
+            'regime_probabilities': self.confidence_engine.regime_probabilities(
+                2.5, 2.8, 7.5, DATA_QUALITY_NOISE['FALLBACK']
+            ),
             'indicators': {
                 'growth': 2.5,
                 'inflation': 2.8,
@@ -305,36 +402,10 @@ def get_multi_country_regimes(country_codes: List[str], fred_api_key: str) -> Di
     Obtient les régimes pour plusieurs pays
     """
     detector = EconomicRegimesDetector(fred_api_key)
-    results = {}
-    
-    for country in country_codes:
-        results[country] = detector.detect_regime(country)
+    results = detector.detect_regimes_batch(country_codes)
     
     return {
         'regimes': results,
         'timestamp': datetime.now().isoformat(),
-        'summary': _generate_global_summary(results)
+        'summary': generate_global_summary(results)
     }
-
-def _generate_global_summary(regimes: Dict) -> Dict:
-    """
-    Génère un résumé global des régimes
-    """
-    regime_counts = {}
-    total_confidence = 0
-    
-    for country_data in regimes.values():
-        regime = country_data['regime']
-        regime_counts[regime] = regime_counts.get(regime, 0) + 1
-        total_confidence += country_data['confidence']
-    
-    dominant_regime = max(regime_counts, key=regime_counts.get) if regime_counts else 'EXPANSION'
-    avg_confidence = total_confidence / len(regimes) if regimes else 0.75
-    
-    return {
-        'dominant_regime': dominant_regime,
-        'regime_distribution': regime_counts,
-        'average_confidence': round(avg_confidence, 2),
-        'countries_analyzed': len(regimes)
-    }
-
@@ -0,0 +1,176 @@
+"""
+Oracle Portfolio 3.0 - HTTP Cache Module
+Cache des réponses des fonctions de lecture
+- ETag faible calculé sur le contenu hors horodatages de génération (revalidation navigateur / CDN)
+- Cache-Control par fonction, Last-Modified = première apparition du contenu dans l'instance
+- Réponses 304 sur If-None-Match / If-Modified-Since
+- Cache LRU des réponses rendues (octets) par fonction et paramètres: pas de recalcul ni de réencodage
+"""
+
+import os
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+from serialization import dumps
+
+# Configuration logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Clés régénérées à chaque calcul sans changement de contenu (exclues de l'ETag)
+VOLATILE_KEYS = frozenset({'timestamp'})
+
+# Durées de fraîcheur par fonction (s): client / CDN et cache de l'instance
+CACHE_POLICIES = {
+    'getRegime': {'max_age': 300, 'stale_while_revalidate': 600},
+    'getMultiRegime': {'max_age': 300, 'stale_while_revalidate': 600},
+    'getAllocations': {'max_age': 300, 'stale_while_revalidate': 600},
+    'getAllocationsBatch': {'max_age': 300, 'stale_while_revalidate': 600},
+    'getIndicatorsBreakdown': {'max_age': 300, 'stale_while_revalidate': 600},
+    'getMarketData': {'max_age': 60, 'stale_while_revalidate': 120},
+    'getIntegratedDashboard': {'max_age': 60, 'stale_while_revalidate': 120},
+    'getCountries': {'max_age': 86400, 'stale_while_revalidate': 86400},
+    'getStressIndexHistory': {'max_age': 3600, 'stale_while_revalidate': 3600}
+}
+
+DEFAULT_POLICY = {'max_age': 60, 'stale_while_revalidate': 60}
+
+def strip_volatile(value: Any) -> Any:
+    """Copie du payload sans les clés volatiles (à tous les niveaux)"""
+    if isinstance(value, dict):
+        return {k: strip_volatile(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [strip_volatile(v) for v in value]
+    return value
+
+def content_etag(payload: Any) -> str:
+    """
+    ETag faible du contenu: identique tant que seules les clés volatiles changent
+    (encodage canonique: clés triées, indépendant de l'instance)
+    """
+    canonical = dumps(strip_volatile(payload), sort_keys=True)
+    return 'W/"' + hashlib.blake2b(canonical, digest_size=16).hexdigest() + '"'
+
+class CachedResponse:
+    """Réponse rendue et ses validateurs"""
+
+    def __init__(self, body: bytes, etag: str, last_modified: float, max_age: float,
+                 stale_while_revalidate: float, cacheable: bool = True):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.cacheable = cacheable
+        self.stored_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.stored_at < self.max_age
+
+    def headers(self) -> Dict[str, str]:
+        if not self.cacheable:
+            return {'Cache-Control': 'no-store'}
+        return {
+            'ETag': self.etag,
+            'Last-Modified': formatdate(self.last_modified, usegmt=True),
+            'Cache-Control': f"public, max-age={int(self.max_age)}, stale-while-revalidate={int(self.stale_while_revalidate)}"
+        }
+
+    def render(self, request_headers: Mapping[str, str]) -> Tuple[int, bytes, Dict[str, str]]:
+        """Statut, corps et headers selon les validateurs de la requête (304 si non modifié)"""
+        headers = self.headers()
+        if self.cacheable and self.not_modified(request_headers):
+            return 304, b'', headers
+        return 200, self.body, {**headers, 'Content-Type': 'application/json; charset=utf-8'}
+
+    def not_modified(self, request_headers: Mapping[str, str]) -> bool:
+        """If-None-Match (comparaison faible) prioritaire sur If-Modified-Since"""
+        if_none_match = request_headers.get('If-None-Match')
+        if if_none_match:
+            if if_none_match.strip() == '*':
+                return True
+            candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return self.etag.removeprefix('W/') in candidates
+
+        if_modified_since = request_headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                # Résolution HTTP: la seconde
+                return int(self.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+class ResponseCache:
+    """
+    Cache LRU des réponses rendues de l'instance, par (fonction, paramètres résolus)
+    Les entrées expirées restent consultables pour conserver Last-Modified quand le contenu n'a pas changé
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.environ.get('HTTP_CACHE_MAX_ENTRIES', 256)
+        )
+        self._entries: 'OrderedDict[Tuple, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, endpoint: str, params: Optional[Mapping[str, Any]] = None) -> Optional[CachedResponse]:
+        """Réponse fraîche pour ces paramètres, None sinon"""
+        key = self._key(endpoint, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.is_fresh():
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, endpoint: str, params: Optional[Mapping[str, Any]], payload: Dict, body: bytes) -> CachedResponse:
+        """
+        Enregistre la réponse rendue (payload: contenu ayant produit body)
+        Les réponses en échec (success: false) sont rendues sans être mises en cache
+        """
+        policy = CACHE_POLICIES.get(endpoint, DEFAULT_POLICY)
+        etag = content_etag(payload)
+
+        if payload.get('success') is False or payload.get('fallback'):
+            return CachedResponse(body, etag, time.time(), 0, 0, cacheable=False)
+
+        key = self._key(endpoint, params)
+        with self._lock:
+            previous = self._entries.get(key)
+            # Contenu inchangé: la date de modification est conservée
+            last_modified = previous.last_modified if previous and previous.etag == etag else time.time()
+            entry = CachedResponse(body, etag, last_modified, policy['max_age'], policy['stale_while_revalidate'])
+
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Méthodes privées utilitaires
+
+    def _key(self, endpoint: str, params: Optional[Mapping[str, Any]]) -> Tuple[str, Hashable]:
+        if not params:
+            return endpoint, ()
+        return endpoint, tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value) for name, value in params.items()
+        ))
+
+_response_cache = ResponseCache()
+
+def get_response_cache() -> ResponseCache:
+    """Cache partagé des réponses (un par instance de fonction)"""
+    return _response_cache
@@ -0,0 +1,145 @@
+"""
+Oracle Portfolio 3.0 - Indicator Signal Engine
+Signaux, score de stress et ajustements d'allocation évalués sur tableaux
+(pays × dates × indicateurs) en une seule opération vectorisée
+"""
+
+import numpy as np
+from typing import Dict, List, Sequence
+
+from allocation_solver import project_to_simplex
+
+# Codes de signal
+SIGNAL_LOW, SIGNAL_NEUTRAL, SIGNAL_HIGH = -1, 0, 1
+SIGNAL_LABELS = {SIGNAL_LOW: 'LOW', SIGNAL_NEUTRAL: 'NEUTRAL', SIGNAL_HIGH: 'HIGH'}
+
+ASSET_CLASSES = ('stocks', 'bonds', 'commodities', 'cash')
+
+# Contribution au stress (× poids) par interprétation: (LOW, NEUTRAL, HIGH)
+STRESS_FACTORS = {
+    'safe_haven': (0.2, 0.2, 0.8),         # Or élevé = stress
+    'energy_inflation': (0.2, 0.2, 0.7),   # Pétrole élevé = inflation
+    'economic_activity': (0.6, 0.2, 0.2),  # Cuivre bas = récession
+    'global_trade': (0.5, 0.2, 0.2)        # Baltic bas = commerce faible
+}
+DEFAULT_STRESS_FACTORS = (0.2, 0.2, 0.2)   # Conditions normales
+
+# Règles d'ajustement: déclenchées si au moins un indicateur de la règle porte le signal
+ADJUSTMENT_RULES = [
+    # 1. Safe-haven (or élevé)
+    (['gold_price'], SIGNAL_HIGH, {'stocks': -0.05, 'bonds': +0.03, 'cash': +0.02}),
+    # 2. Inflation (pétrole, agriculture élevés)
+    (['oil_price', 'agricultural_index'], SIGNAL_HIGH, {'commodities': +0.08, 'bonds': -0.05, 'stocks': -0.03}),
+    # 3. Récession (cuivre, baltic bas)
+    (['copper_price', 'baltic_dry_index'], SIGNAL_LOW, {'stocks': -0.10, 'bonds': +0.07, 'cash': +0.03}),
+    # 4. Croissance (indicateurs industriels élevés)
+    (['steel_price', 'lumber_price'], SIGNAL_HIGH, {'stocks': +0.08, 'bonds': -0.05, 'commodities': -0.03})
+]
+
+class IndicatorSignalEngine:
+    """
+    Moteur de signaux sur tableaux
+    - Seuils, poids et facteurs de stress stockés en vecteurs (ordre de indicators_config)
+    - Entrées de forme (..., n_indicateurs): un pays, N pays, N pays × T dates
+    - Valeurs manquantes (NaN) traitées comme signal NEUTRAL
+    """
+
+    def __init__(self, indicators_config: Dict[str, Dict]):
+        self.names: List[str] = list(indicators_config)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.threshold_high = np.array([c['threshold_high'] for c in indicators_config.values()], dtype=float)
+        self.threshold_low = np.array([c['threshold_low'] for c in indicators_config.values()], dtype=float)
+        self.weights = np.array([c['weight'] for c in indicators_config.values()], dtype=float)
+
+        # (n_indicateurs, 3): facteur de stress indexé par signal + 1
+        self.stress_factors = np.array([
+            STRESS_FACTORS.get(c['interpretation'], DEFAULT_STRESS_FACTORS)
+            for c in indicators_config.values()
+        ])
+
+        # Règles: masque (règles × indicateurs), signal attendu (règles,), ajustements (règles × actifs)
+        self.rule_masks = np.array([
+            [name in rule_names for name in self.names] for rule_names, _, _ in ADJUSTMENT_RULES
+        ])
+        self.rule_signals = np.array([signal for _, signal, _ in ADJUSTMENT_RULES])
+        self.rule_adjustments = np.array([
+            [adjustment.get(asset, 0.0) for asset in ASSET_CLASSES] for _, _, adjustment in ADJUSTMENT_RULES
+        ])
+
+    def to_array(self, indicators: Dict[str, float]) -> np.ndarray:
+        """Dict d'indicateurs → vecteur (n_indicateurs,), NaN pour les indicateurs absents"""
+        values = np.full(len(self.names), np.nan)
+        for name, value in indicators.items():
+            if name in self.index and value is not None:
+                values[self.index[name]] = value
+        return values
+
+    def signals(self, values: np.ndarray) -> np.ndarray:
+        """Codes de signal (-1, 0, 1) de même forme que values"""
+        values = np.asarray(values, dtype=float)
+        return np.select(
+            [values >= self.threshold_high, values <= self.threshold_low],
+            [SIGNAL_HIGH, SIGNAL_LOW],
+            default=SIGNAL_NEUTRAL
+        )
+
+    def stress_scores(self, signals: np.ndarray, present: np.ndarray = None) -> np.ndarray:
+        """
+        Score de stress 0-100 (forme signals[..., 0]), arrondi à 0.1
+        present: masque optionnel des indicateurs à inclure (défaut: tous)
+        """
+        signals = np.asarray(signals, dtype=int)
+        factors = np.take_along_axis(
+            np.broadcast_to(self.stress_factors, signals.shape + (3,)),
+            (signals + 1)[..., None], axis=-1
+        )[..., 0]
+        weights = self.weights if present is None else self.weights * present
+        raw = (factors * weights).sum(axis=-1) * 100
+        return np.round(np.clip(raw, 0, 100), 1)
+
+    def adjustments(self, signals: np.ndarray) -> np.ndarray:
+        """Ajustements d'allocation (forme (..., n_actifs), ordre ASSET_CLASSES)"""
+        signals = np.asarray(signals, dtype=int)
+        matches = signals[..., None, :] == self.rule_signals[:, None]
+        triggered = (matches & self.rule_masks).any(axis=-1)
+        return triggered.astype(float) @ self.rule_adjustments
+
+    def allocations(self, base: np.ndarray, adjustments: np.ndarray, lower=0.0, upper=1.0) -> np.ndarray:
+        """
+        Allocation de base + ajustements projetée sur les poids admissibles (arrondi 0.001)
+        lower / upper: bornes par actif (scalaires ou diffusables, ordre ASSET_CLASSES)
+        """
+        targets = np.asarray(base, dtype=float) + adjustments
+        return np.round(project_to_simplex(targets, lower, upper), 3)
+
+    def evaluate(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Évaluation complète en une passe
+
+        Args:
+            values: Tableau (..., n_indicateurs), ex: (pays, dates, indicateurs)
+
+        Returns:
+            Dict avec 'signals', 'stress_scores' et 'adjustments'
+        """
+        signals = self.signals(values)
+        return {
+            'signals': signals,
+            'stress_scores': self.stress_scores(signals),
+            'adjustments': self.adjustments(signals)
+        }
+
+    def signal_labels(self, signals: np.ndarray, names: Sequence[str] = None) -> Dict[str, str]:
+        """Vecteur de signaux → {indicateur: 'HIGH' | 'LOW' | 'NEUTRAL'}"""
+        names = names if names is not None else self.names
+        return {name: SIGNAL_LABELS[int(signals[self.index[name]])] for name in names}
+
+    def signal_codes(self, signals: Dict[str, str]) -> np.ndarray:
+        """{indicateur: libellé} → vecteur de codes (NEUTRAL pour les absents)"""
+        codes = {label: code for code, label in SIGNAL_LABELS.items()}
+        vector = np.zeros(len(self.names), dtype=int)
+        for name, label in signals.items():
+            if name in self.index:
+                vector[self.index[name]] = codes.get(label, SIGNAL_NEUTRAL)
+        return vector
@@ -0,0 +1,111 @@
+"""
+Oracle Portfolio 3.0 - Indicator Transforms Module
+Transformations vectorisées sur panels d'indicateurs (séries × temps)
+"""
+
+import numpy as np
+from typing import Optional, Sequence, Union
+
+# Un panel est un tableau 2-D (séries × périodes), aligné à droite:
+# la dernière colonne contient l'observation la plus récente de chaque série,
+# les séries plus courtes sont complétées par NaN à gauche.
+
+Lags = Union[int, Sequence[int], np.ndarray]
+
+def build_panel(series: Sequence[Optional[Sequence[float]]], width: Optional[int] = None) -> np.ndarray:
+    """
+    Construit un panel aligné à droite à partir de séries de longueurs différentes
+
+    Args:
+        series: Liste de séries (ordre chronologique), None pour une série indisponible
+        width: Nombre de périodes conservées (défaut: longueur de la plus longue série)
+    """
+    lengths = [len(s) if s is not None else 0 for s in series]
+    width = width or max(lengths + [1])
+    panel = np.full((len(series), width), np.nan)
+
+    for row, values in enumerate(series):
+        if values is None or len(values) == 0:
+            continue
+        tail = np.asarray(values, dtype=float)[-width:]
+        panel[row, width - len(tail):] = tail
+
+    return panel
+
+def lagged(panel: np.ndarray, lags: Lags) -> np.ndarray:
+    """
+    Panel décalé de lags périodes par série (un décalage par ligne pour les fréquences mixtes)
+    Les positions sans historique suffisant valent NaN
+    """
+    panel = np.asarray(panel, dtype=float)
+    n_series, width = panel.shape
+    lags = np.broadcast_to(np.asarray(lags, dtype=int), (n_series,))
+
+    source = np.arange(width)[None, :] - lags[:, None]
+    valid = source >= 0
+    shifted = np.take_along_axis(panel, np.clip(source, 0, width - 1), axis=1)
+    return np.where(valid, shifted, np.nan)
+
+def pct_change(panel: np.ndarray, lags: Lags) -> np.ndarray:
+    """Variation en % sur lags périodes; NaN si la valeur de référence est manquante ou <= 0"""
+    base = lagged(panel, lags)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (panel / base - 1) * 100
+    return np.where(base > 0, change, np.nan)
+
+def yoy(panel: np.ndarray, periods_per_year: Lags) -> np.ndarray:
+    """Glissement annuel en %, periods_per_year par série (12 mensuel, 4 trimestriel)"""
+    return pct_change(panel, periods_per_year)
+
+def qoq_annualised(panel: np.ndarray, periods_per_year: Lags) -> np.ndarray:
+    """Variation trimestrielle annualisée en % (décalage d'un trimestre selon la fréquence de chaque série)"""
+    periods_per_year = np.asarray(periods_per_year, dtype=int)
+    quarter_lags = np.maximum(periods_per_year // 4, 1)
+    base = lagged(panel, quarter_lags)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annualised = ((panel / base) ** 4 - 1) * 100
+    return np.where(base > 0, annualised, np.nan)
+
+def rolling_mean(panel: np.ndarray, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """Moyenne glissante par série en ignorant les NaN (somme cumulée, O(séries × périodes))"""
+    panel = np.asarray(panel, dtype=float)
+    min_periods = min_periods or window
+    observed = ~np.isnan(panel)
+
+    sums = _window_sum(np.where(observed, panel, 0.0), window)
+    counts = _window_sum(observed.astype(float), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / counts
+    return np.where(counts >= min_periods, means, np.nan)
+
+def rolling_zscore(panel: np.ndarray, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """Z-score de chaque observation par rapport à sa fenêtre glissante (NaN ignorés)"""
+    panel = np.asarray(panel, dtype=float)
+    min_periods = min_periods or window
+    observed = ~np.isnan(panel)
+    filled = np.where(observed, panel, 0.0)
+
+    counts = _window_sum(observed.astype(float), window)
+    sums = _window_sum(filled, window)
+    squares = _window_sum(filled ** 2, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / counts
+        variances = np.maximum(squares / counts - means ** 2, 0.0) * counts / (counts - 1)
+        zscores = (panel - means) / np.sqrt(variances)
+    return np.where((counts >= max(min_periods, 2)) & (variances > 0), zscores, np.nan)
+
+def latest(panel: np.ndarray) -> np.ndarray:
+    """Dernière valeur non manquante de chaque série (NaN si aucune)"""
+    panel = np.asarray(panel, dtype=float)
+    observed = ~np.isnan(panel)
+    last_index = panel.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1)
+    values = panel[np.arange(panel.shape[0]), last_index]
+    return np.where(observed.any(axis=1), values, np.nan)
+
+def _window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Somme glissante sur l'axe temporel (fenêtres tronquées en début de série)"""
+    cumulative = np.cumsum(values, axis=1)
+    shifted = np.zeros_like(cumulative)
+    if window < values.shape[1]:
+        shifted[:, window:] = cumulative[:, :-window]
+    return cumulative - shifted
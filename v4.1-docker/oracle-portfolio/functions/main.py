@@ -10,13 +10,19 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import requests
 
-from firebase_functions import https_fn, options
-from firebase_admin import initialize_app, firestore
+from firebase_functions import https_fn, options, scheduler_fn
+from firebase_admin import initialize_app
 import firebase_admin
 
-# Import des modules locaux
-from economic_regimes_corrected import EconomicRegimesDetector, get_regime_for_country, get_multi_country_regimes
-from physical_indicators_manager import PhysicalIndicatorsManager, get_physical_allocations, get_market_stress_analysis
+# Import des modules locaux légers
+# Les modules lourds (numpy / pandas) sont importés dans les fonctions qui les utilisent,
+# voir _ENDPOINT_MODULES et profile_startup.py
+from regime_snapshot import generate_global_summary, get_snapshot_store
+from country_registry import resolve_country
+from single_flight import single_flight, request_key
+from upstream_config import upstream_url
+from http_cache import get_response_cache
+from serialization import dumps, get_static_json
 
 # Initialisation Firebase
 if not firebase_admin._apps:
@@ -31,6 +37,9 @@ FRED_API_KEY = os.environ.get('FRED_API_KEY', '26bbc1665befd935b8d8c55ae6e08ba8'
 ALPHA_VANTAGE_API_KEY = os.environ.get('ALPHA_VANTAGE_API_KEY', 'LFEDR3B5DPK3FFSP')
 EIA_API_KEY = os.environ.get('EIA_API_KEY', 'pjb9RIJRDtDmi78xwZyy7Hjvyv6yfuUg0V8gdtvZ')
 
+# Pays supportés
+SUPPORTED_COUNTRIES = ['FRA', 'US', 'DEU', 'GBR', 'JPN', 'CAN', 'AUS', 'CHE']
+
 # Configuration CORS
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
@@ -39,6 +48,36 @@ CORS_HEADERS = {
     'Access-Control-Max-Age': '3600'
 }
 
+# Modules lourds requis par chaque fonction (frontières d'import par endpoint)
+_ENDPOINT_MODULES = {
+    'getRegime': [],
+    'getMultiRegime': ['economic_regimes_corrected'],
+    'getAllocations': ['physical_indicators_manager', 'allocation_batch'],
+    'getAllocationsBatch': ['physical_indicators_manager', 'allocation_batch', 'economic_regimes_corrected'],
+    'getIndicatorsBreakdown': ['physical_indicators_manager'],
+    'getMarketData': ['physical_indicators_manager', 'market_quotes'],
+    'getIntegratedDashboard': ['physical_indicators_manager', 'market_quotes', 'dashboard_pipeline'],
+    'getSystemHealth': ['market_quotes'],
+    'getCountries': [],
+    'precomputeRegimeSnapshot': ['economic_regimes_corrected'],
+    'updateStressIndex': ['stress_index', 'physical_indicators_manager'],
+    'getStressIndexHistory': ['stress_index'],
+    'refreshMarketQuotes': ['market_quotes']
+}
+
+def _prewarm_endpoint_modules(target: Optional[str]):
+    """
+    Précharge pendant le démarrage à froid les modules lourds de la fonction servie
+    (FUNCTION_TARGET), pour que la première requête ne paie pas leur import
+    """
+    for module_name in _ENDPOINT_MODULES.get(target, []):
+        try:
+            __import__(module_name)
+        except Exception as e:
+            logger.error(f"Erreur préchargement {module_name}: {e}")
+
+_prewarm_endpoint_modules(os.environ.get('FUNCTION_TARGET'))
+
 def add_cors_headers(response_data: Dict) -> tuple:
     """Ajoute les headers CORS à la réponse"""
     return response_data, 200, CORS_HEADERS
@@ -66,12 +105,16 @@ def getRegime(req: https_fn.Request) -> https_fn.Response:
         country = req.args.get('country', 'FRA')
         
         # Validation du pays
-        supported_countries = ['FRA', 'US', 'DEU', 'GBR', 'JPN', 'CAN', 'AUS', 'CHE']
-        if country not in supported_countries:
+        if country not in SUPPORTED_COUNTRIES:
             country = 'FRA'
         
-        # Détection du régime
-        regime_data = get_regime_for_country(country, FRED_API_KEY)
+        # Réponse déjà rendue dans l'instance (304 si le client a déjà cette version)
+        cached = _cached_response(req, 'getRegime', {'country': country})
+        if cached:
+            return cached
+        
+        # Régime précalculé (détection live uniquement si absent du snapshot)
+        regime_data, snapshot_version = _get_country_regime(country)
         
         # Enrichissement avec métadonnées
         response_data = {
@@ -82,15 +125,12 @@ def getRegime(req: https_fn.Request) -> https_fn.Response:
                 'version': '3.0.0',
                 'timestamp': datetime.now().isoformat(),
                 'country_requested': country,
-                'supported_countries': supported_countries
+                'supported_countries': SUPPORTED_COUNTRIES,
+                'snapshot_version': snapshot_version
             }
         }
         
-        return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=200,
-            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return _json_response(req, 'getRegime', {'country': country}, response_data)
         
     except Exception as e:
         logger.error(f"Erreur getRegime: {e}")
@@ -135,12 +175,17 @@ def getMultiRegime(req: https_fn.Request) -> https_fn.Response:
         
         if countries_param:
             countries = [c.strip().upper() for c in countries_param.split(',')]
-            countries = [c for c in countries if c in ['FRA', 'US', 'DEU', 'GBR', 'JPN', 'CAN', 'AUS', 'CHE']]
+            countries = [c for c in countries if c in SUPPORTED_COUNTRIES]
         else:
             countries = default_countries
         
-        # Analyse multi-pays
-        multi_regime_data = get_multi_country_regimes(countries, FRED_API_KEY)
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getMultiRegime', {'countries': countries})
+        if cached:
+            return cached
+        
+        # Analyse multi-pays depuis le snapshot précalculé
+        multi_regime_data, snapshot_version = _get_multi_country_regimes(countries)
         
         response_data = {
             'success': True,
@@ -149,15 +194,12 @@ def getMultiRegime(req: https_fn.Request) -> https_fn.Response:
                 'function': 'getMultiRegime',
                 'version': '3.0.0',
                 'countries_analyzed': len(countries),
+                'snapshot_version': snapshot_version,
                 'timestamp': datetime.now().isoformat()
             }
         }
         
-        return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=200,
-            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return _json_response(req, 'getMultiRegime', {'countries': countries}, response_data)
         
     except Exception as e:
         logger.error(f"Erreur getMultiRegime: {e}")
@@ -189,11 +231,17 @@ def getAllocations(req: https_fn.Request) -> https_fn.Response:
         country = req.args.get('country', 'FRA')
         risk_level = req.args.get('risk', 'moderate')  # conservative, moderate, aggressive
         
-        # Détection du régime
-        regime_data = get_regime_for_country(country, FRED_API_KEY)
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getAllocations', {'country': country, 'risk': risk_level})
+        if cached:
+            return cached
+        
+        # Régime précalculé
+        regime_data, _ = _get_country_regime(country)
         regime = regime_data['regime']
         
         # Allocations basées sur indicateurs physiques
+        from physical_indicators_manager import get_physical_allocations
         allocations_data = get_physical_allocations(regime, FRED_API_KEY, EIA_API_KEY)
         
         # Ajustement selon le profil de risque
@@ -217,11 +265,7 @@ def getAllocations(req: https_fn.Request) -> https_fn.Response:
             }
         }
         
-        return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=200,
-            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return _json_response(req, 'getAllocations', {'country': country, 'risk': risk_level}, response_data)
         
     except Exception as e:
         logger.error(f"Erreur getAllocations: {e}")
@@ -236,6 +280,76 @@ def getAllocations(req: https_fn.Request) -> https_fn.Response:
             headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
         )
 
+# ============================================================================
+# FUNCTION 3b: getAllocationsBatch - Grille d'allocations pays × profils
+# ============================================================================
+
+@https_fn.on_request(
+    cors=options.CorsOptions(
+        cors_origins=["*"],
+        cors_methods=["GET", "POST", "OPTIONS"]
+    )
+)
+def getAllocationsBatch(req: https_fn.Request) -> https_fn.Response:
+    """
+    Allocations de tous les pays × profils de risque en un appel
+    (une seule collecte d'indicateurs, calcul matriciel)
+    """
+    try:
+        if req.method == 'OPTIONS':
+            return https_fn.Response('', status=200, headers=CORS_HEADERS)
+        
+        from allocation_batch import RISK_PROFILES, get_allocations_batch
+        
+        # Paramètres (défaut: tous les pays supportés et tous les profils)
+        countries_param = req.args.get('countries', '')
+        if countries_param:
+            countries = [c.strip().upper() for c in countries_param.split(',')]
+            countries = [c for c in countries if c in SUPPORTED_COUNTRIES]
+        else:
+            countries = SUPPORTED_COUNTRIES
+        
+        risks_param = req.args.get('risks', '')
+        if risks_param:
+            risk_profiles = [r.strip().lower() for r in risks_param.split(',')]
+            risk_profiles = [r for r in risk_profiles if r in RISK_PROFILES] or list(RISK_PROFILES)
+        else:
+            risk_profiles = list(RISK_PROFILES)
+        
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getAllocationsBatch', {'countries': countries, 'risks': risk_profiles})
+        if cached:
+            return cached
+        
+        # Régimes précalculés de tous les pays
+        multi_regime_data, snapshot_version = _get_multi_country_regimes(countries)
+        country_regimes = {c: multi_regime_data['regimes'][c]['regime'] for c in countries}
+        
+        batch_data = get_allocations_batch(country_regimes, FRED_API_KEY, EIA_API_KEY, risk_profiles)
+        
+        response_data = {
+            'success': True,
+            'data': batch_data,
+            'metadata': {
+                'function': 'getAllocationsBatch',
+                'version': '3.0.0',
+                'countries_count': len(countries),
+                'risk_profiles_count': len(risk_profiles),
+                'snapshot_version': snapshot_version,
+                'timestamp': datetime.now().isoformat()
+            }
+        }
+        
+        return _json_response(req, 'getAllocationsBatch', {'countries': countries, 'risks': risk_profiles}, response_data)
+        
+    except Exception as e:
+        logger.error(f"Erreur getAllocationsBatch: {e}")
+        return https_fn.Response(
+            json.dumps({'success': False, 'error': str(e)}),
+            status=500,
+            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
+        )
+
 # ============================================================================
 # FUNCTION 4: getIndicatorsBreakdown - Détail indicateurs physiques
 # ============================================================================
@@ -254,7 +368,13 @@ def getIndicatorsBreakdown(req: https_fn.Request) -> https_fn.Response:
         if req.method == 'OPTIONS':
             return https_fn.Response('', status=200, headers=CORS_HEADERS)
         
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getIndicatorsBreakdown', None)
+        if cached:
+            return cached
+        
         # Analyse complète des indicateurs
+        from physical_indicators_manager import get_market_stress_analysis
         breakdown_data = get_market_stress_analysis(FRED_API_KEY, EIA_API_KEY)
         
         response_data = {
@@ -268,11 +388,7 @@ def getIndicatorsBreakdown(req: https_fn.Request) -> https_fn.Response:
             }
         }
         
-        return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=200,
-            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return _json_response(req, 'getIndicatorsBreakdown', None, response_data)
         
     except Exception as e:
         logger.error(f"Erreur getIndicatorsBreakdown: {e}")
@@ -300,10 +416,16 @@ def getMarketData(req: https_fn.Request) -> https_fn.Response:
         if req.method == 'OPTIONS':
             return https_fn.Response('', status=200, headers=CORS_HEADERS)
         
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getMarketData', None)
+        if cached:
+            return cached
+        
         # Récupération des données ETF via Alpha Vantage
         etf_data = _get_etf_prices(['SPY', 'VTI', 'VEA'])
         
         # Indicateurs de stress de marché
+        from physical_indicators_manager import get_market_stress_analysis
         stress_data = get_market_stress_analysis(FRED_API_KEY, EIA_API_KEY)
         
         # VIX et spreads
@@ -329,11 +451,7 @@ def getMarketData(req: https_fn.Request) -> https_fn.Response:
             }
         }
         
-        return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=200,
-            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return _json_response(req, 'getMarketData', None, response_data)
         
     except Exception as e:
         logger.error(f"Erreur getMarketData: {e}")
@@ -363,20 +481,26 @@ def getIntegratedDashboard(req: https_fn.Request) -> https_fn.Response:
         
         country = req.args.get('country', 'FRA')
         
-        # Régime économique
-        regime_data = get_regime_for_country(country, FRED_API_KEY)
-        
-        # Allocations
-        allocations_data = get_physical_allocations(regime_data['regime'], FRED_API_KEY, EIA_API_KEY)
-        
-        # Données de marché
-        etf_data = _get_etf_prices(['SPY', 'VTI', 'VEA'])
-        stress_data = get_market_stress_analysis(FRED_API_KEY, EIA_API_KEY)
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getIntegratedDashboard', {'country': country})
+        if cached:
+            return cached
+        
+        # Régime, cotations et séries des indicateurs en parallèle,
+        # allocations et stress calculés sur les mêmes séries (voir dashboard_pipeline.py)
+        from dashboard_pipeline import get_dashboard_data
+        pipeline_data = get_dashboard_data(country, _get_country_regime, _get_etf_prices, FRED_API_KEY, EIA_API_KEY)
+        regime_data = pipeline_data['regime']
+        snapshot_version = pipeline_data['snapshot_version']
+        allocations = pipeline_data['allocations']
+        etf_data = pipeline_data['etf_prices']
+        stress_data = pipeline_data['stress']
+        fallback_series = pipeline_data['fallback_series']
         
         # Dashboard intégré
         dashboard_data = {
             'regime': regime_data,
-            'allocations': allocations_data['allocations'],
+            'allocations': allocations,
             'market_data': {
                 'etf_prices': etf_data,
                 'stress_score': stress_data.get('market_stress_score', 25.0),
@@ -387,7 +511,7 @@ def getIntegratedDashboard(req: https_fn.Request) -> https_fn.Response:
                 'country': country,
                 'regime': regime_data['regime'],
                 'confidence': regime_data['confidence'],
-                'recommended_allocation': allocations_data['allocations'],
+                'recommended_allocation': allocations,
                 'market_stress': stress_data.get('stress_level', 'MODERATE')
             }
         }
@@ -399,15 +523,16 @@ def getIntegratedDashboard(req: https_fn.Request) -> https_fn.Response:
                 'function': 'getIntegratedDashboard',
                 'version': '3.0.0',
                 'country': country,
+                'snapshot_version': snapshot_version,
+                'fallback_series': fallback_series,
                 'timestamp': datetime.now().isoformat()
             }
         }
+        if fallback_series:
+            # Réponse dégradée: non mise en cache
+            response_data['fallback'] = True
         
-        return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=200,
-            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return _json_response(req, 'getIntegratedDashboard', {'country': country}, response_data)
         
     except Exception as e:
         logger.error(f"Erreur getIntegratedDashboard: {e}")
@@ -470,7 +595,7 @@ def getSystemHealth(req: https_fn.Request) -> https_fn.Response:
         }
         
         return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
+            dumps(response_data),
             status=200,
             headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
         )
@@ -501,115 +626,265 @@ def getCountries(req: https_fn.Request) -> https_fn.Response:
         if req.method == 'OPTIONS':
             return https_fn.Response('', status=200, headers=CORS_HEADERS)
         
-        countries_data = {
-            'FRA': {'name': 'France', 'currency': 'EUR', 'region': 'Europe', 'data_quality': 'HIGH'},
-            'US': {'name': 'United States', 'currency': 'USD', 'region': 'North America', 'data_quality': 'HIGH'},
-            'DEU': {'name': 'Germany', 'currency': 'EUR', 'region': 'Europe', 'data_quality': 'HIGH'},
-            'GBR': {'name': 'United Kingdom', 'currency': 'GBP', 'region': 'Europe', 'data_quality': 'HIGH'},
-            'JPN': {'name': 'Japan', 'currency': 'JPY', 'region': 'Asia', 'data_quality': 'MEDIUM'},
-            'CAN': {'name': 'Canada', 'currency': 'CAD', 'region': 'North America', 'data_quality': 'MEDIUM'},
-            'AUS': {'name': 'Australia', 'currency': 'AUD', 'region': 'Oceania', 'data_quality': 'MEDIUM'},
-            'CHE': {'name': 'Switzerland', 'currency': 'CHF', 'region': 'Europe', 'data_quality': 'MEDIUM'}
-        }
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getCountries', None)
+        if cached:
+            return cached
+        
+        # Liste statique: payload construit et encodé une fois par instance
+        response_data, body = get_static_json('getCountries', _build_countries_response)
+        
+        return _json_response(req, 'getCountries', None, response_data, body)
+        
+    except Exception as e:
+        logger.error(f"Erreur getCountries: {e}")
+        return https_fn.Response(
+            json.dumps({'success': False, 'error': str(e)}),
+            status=500,
+            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
+        )
+
+# ============================================================================
+# FUNCTION 9: precomputeRegimeSnapshot - Précalcul planifié des régimes
+# ============================================================================
+
+@scheduler_fn.on_schedule(schedule="every 6 hours")
+def precomputeRegimeSnapshot(event: scheduler_fn.ScheduledEvent) -> None:
+    """
+    Précalcule régime, confiance et indicateurs de tous les pays supportés
+    et publie un snapshot versionné lu par les fonctions HTTP
+    """
+    try:
+        from regime_snapshot import refresh_regime_snapshot
+        snapshot = refresh_regime_snapshot(SUPPORTED_COUNTRIES, FRED_API_KEY)
+        logger.info(f"Snapshot régimes {snapshot['version']} précalculé")
+    except Exception as e:
+        logger.error(f"Erreur precomputeRegimeSnapshot: {e}")
+
+# ============================================================================
+# FUNCTION 10: updateStressIndex - Mise à jour quotidienne de l'indice de stress
+# ============================================================================
+
+@scheduler_fn.on_schedule(schedule="every day 06:00")
+def updateStressIndex(event: scheduler_fn.ScheduledEvent) -> None:
+    """
+    Ajoute le point du jour à la série historique de l'indice de stress
+    (agrégat mensuel mis à jour de façon incrémentale)
+    """
+    try:
+        from stress_index import record_stress_observation
+        point = record_stress_observation(FRED_API_KEY, EIA_API_KEY)
+        logger.info(f"Indice de stress {point['period']}: {point['stress_score']} ({point['stress_level']})")
+    except Exception as e:
+        logger.error(f"Erreur updateStressIndex: {e}")
+
+# ============================================================================
+# FUNCTION 11: getStressIndexHistory - Série historique de l'indice de stress
+# ============================================================================
+
+@https_fn.on_request(
+    cors=options.CorsOptions(
+        cors_origins=["*"],
+        cors_methods=["GET", "POST", "OPTIONS"]
+    )
+)
+def getStressIndexHistory(req: https_fn.Request) -> https_fn.Response:
+    """
+    Série persistée de l'indice de stress (daily ou monthly), bornée par start / end
+    """
+    try:
+        if req.method == 'OPTIONS':
+            return https_fn.Response('', status=200, headers=CORS_HEADERS)
+        
+        from stress_index import STRESS_FREQUENCIES, get_stress_index_store
+        
+        # Paramètres (fréquence invalide -> daily, limite par défaut 365 points)
+        frequency = req.args.get('frequency', 'daily')
+        if frequency not in STRESS_FREQUENCIES:
+            frequency = 'daily'
+        start = req.args.get('start')
+        end = req.args.get('end')
+        try:
+            limit = max(1, int(req.args.get('limit', 365)))
+        except ValueError:
+            limit = 365
+        
+        # Réponse en cache de l'instance
+        cached = _cached_response(req, 'getStressIndexHistory', {'frequency': frequency, 'start': start, 'end': end, 'limit': limit})
+        if cached:
+            return cached
+        
+        series = get_stress_index_store().get_series(frequency, start=start, end=end, limit=limit)
         
         response_data = {
             'success': True,
             'data': {
-                'countries': countries_data,
-                'total_countries': len(countries_data),
-                'default_country': 'FRA',
-                'supported_regions': list(set(c['region'] for c in countries_data.values()))
+                'frequency': frequency,
+                'points': series,
+                'latest': series[-1] if series else None
             },
             'metadata': {
-                'function': 'getCountries',
+                'function': 'getStressIndexHistory',
                 'version': '3.0.0',
+                'points_count': len(series),
+                'start': start,
+                'end': end,
                 'timestamp': datetime.now().isoformat()
             }
         }
         
-        return https_fn.Response(
-            json.dumps(response_data, ensure_ascii=False),
-            status=200,
-            headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
-        )
+        return _json_response(req, 'getStressIndexHistory', {'frequency': frequency, 'start': start, 'end': end, 'limit': limit}, response_data)
         
     except Exception as e:
-        logger.error(f"Erreur getCountries: {e}")
+        logger.error(f"Erreur getStressIndexHistory: {e}")
         return https_fn.Response(
             json.dumps({'success': False, 'error': str(e)}),
             status=500,
             headers={**CORS_HEADERS, 'Content-Type': 'application/json; charset=utf-8'}
         )
 
+# ============================================================================
+# FUNCTION 12: refreshMarketQuotes - Rafraîchissement planifié des cotations
+# ============================================================================
+
+@scheduler_fn.on_schedule(schedule="every 10 minutes")
+def refreshMarketQuotes(event: scheduler_fn.ScheduledEvent) -> None:
+    """
+    Rafraîchit les cotations échues (SPY / VTI / VEA et symboles demandés)
+    dans le quota Alpha Vantage, hors chemin des requêtes HTTP
+    """
+    try:
+        from market_quotes import get_quote_scheduler
+        refreshed = get_quote_scheduler(ALPHA_VANTAGE_API_KEY).refresh_due()
+        logger.info(f"refreshMarketQuotes: {len(refreshed)} cotation(s) rafraîchie(s)")
+    except Exception as e:
+        logger.error(f"Erreur refreshMarketQuotes: {e}")
+
 # ============================================================================
 # FONCTIONS UTILITAIRES
 # ============================================================================
 
-def _adjust_for_risk_profile(base_allocations: Dict[str, float], risk_level: str) -> Dict[str, float]:
-    """Ajuste les allocations selon le profil de risque"""
-    adjustments = {
-        'conservative': {'stocks': -0.15, 'bonds': +0.10, 'cash': +0.05},
-        'moderate': {'stocks': 0.0, 'bonds': 0.0, 'cash': 0.0},
-        'aggressive': {'stocks': +0.10, 'bonds': -0.05, 'commodities': +0.05, 'cash': -0.10}
-    }
+def _build_countries_response() -> Dict:
+    """Réponse de getCountries (indépendante de la requête)"""
+    countries_data = {}
+    for code in SUPPORTED_COUNTRIES:
+        info = resolve_country(code)
+        countries_data[code] = {
+            'name': info.name,
+            'currency': info.currency,
+            'region': info.region,
+            'data_quality': info.data_quality
+        }
     
-    risk_adj = adjustments.get(risk_level, adjustments['moderate'])
-    adjusted = base_allocations.copy()
+    response_data = {
+        'success': True,
+        'data': {
+            'countries': countries_data,
+            'total_countries': len(countries_data),
+            'default_country': 'FRA',
+            'supported_regions': sorted(set(c['region'] for c in countries_data.values()))
+        },
+        'metadata': {
+            'function': 'getCountries',
+            'version': '3.0.0',
+            'timestamp': datetime.now().isoformat()
+        }
+    }
     
-    for asset, adj in risk_adj.items():
-        if asset in adjusted:
-            adjusted[asset] = max(0.0, min(1.0, adjusted[asset] + adj))
+    return response_data
+
+def _cached_response(req: https_fn.Request, endpoint: str, params: Optional[Dict]) -> Optional[https_fn.Response]:
+    """Réponse rendue encore fraîche pour ces paramètres, None si elle doit être recalculée"""
+    entry = get_response_cache().get(endpoint, params)
+    return _render_response(req, entry) if entry else None
+
+def _json_response(req: https_fn.Request, endpoint: str, params: Optional[Dict], response_data: Dict,
+                   body: Optional[bytes] = None) -> https_fn.Response:
+    """
+    Encode et met en cache la réponse (ETag, Last-Modified, Cache-Control, 304 si non modifiée)
+    body: encodage déjà disponible de response_data (payload statique)
+    """
+    if body is None:
+        body = dumps(response_data)
+    entry = get_response_cache().put(endpoint, params, response_data, body)
+    return _render_response(req, entry)
+
+def _render_response(req: https_fn.Request, entry) -> https_fn.Response:
+    status, body, headers = entry.render(req.headers)
+    return https_fn.Response(body, status=status, headers={**CORS_HEADERS, **headers})
+
+def _get_country_regime(country: str) -> tuple:
+    """Régime d'un pays depuis le snapshot précalculé, détection live en secours (absent ou périmé)"""
+    snapshot = get_snapshot_store().read_fresh()
+    if snapshot and country in snapshot['regimes']:
+        return snapshot['regimes'][country], snapshot['version']
     
-    # Normalisation
-    total = sum(adjusted.values())
-    if total > 0:
-        for asset in adjusted:
-            adjusted[asset] = round(adjusted[asset] / total, 3)
+    logger.warning(f"Snapshot absent ou périmé pour {country} - détection live")
+    from economic_regimes_corrected import get_regime_for_country
+    return get_regime_for_country(country, FRED_API_KEY), None
+
+def _get_multi_country_regimes(countries: List[str]) -> tuple:
+    """Régimes multi-pays depuis le snapshot précalculé, détection live en secours (incomplet ou périmé)"""
+    snapshot = get_snapshot_store().read_fresh()
+    if not snapshot or any(c not in snapshot['regimes'] for c in countries):
+        logger.warning("Snapshot incomplet ou périmé - analyse multi-pays live")
+        from economic_regimes_corrected import get_multi_country_regimes
+        return get_multi_country_regimes(countries, FRED_API_KEY), None
     
-    return adjusted
+    regimes = {c: snapshot['regimes'][c] for c in countries}
+    return {
+        'regimes': regimes,
+        'timestamp': snapshot['generated_at'],
+        'summary': generate_global_summary(regimes)
+    }, snapshot['version']
+
+def _adjust_for_risk_profile(base_allocations: Dict[str, float], risk_level: str) -> Dict[str, float]:
+    """Ajuste les allocations selon le profil de risque (plafond actions respecté)"""
+    from allocation_batch import adjust_for_risk_profile
+    return adjust_for_risk_profile(base_allocations, risk_level)
 
 def _get_etf_prices(symbols: List[str]) -> Dict:
-    """Récupère les prix ETF via Alpha Vantage"""
+    """
+    Prix ETF depuis le cache partagé des cotations Alpha Vantage
+    (rafraîchi par refreshMarketQuotes dans le quota de la clé, voir market_quotes.py)
+    """
+    from market_quotes import get_quote_scheduler
+    
     etf_data = {}
+    try:
+        quotes = get_quote_scheduler(ALPHA_VANTAGE_API_KEY).get_quotes(symbols)
+    except Exception as e:
+        logger.error(f"Erreur cotations ETF: {e}")
+        quotes = {}
+    
+    # Données de fallback (cotation jamais récupérée)
+    fallback_prices = {'SPY': 622.08, 'VTI': 306.00, 'VEA': 56.83}
     
     for symbol in symbols:
-        try:
-            url = f"https://www.alphavantage.co/query"
-            params = {
-                'function': 'GLOBAL_QUOTE',
-                'symbol': symbol,
-                'apikey': ALPHA_VANTAGE_API_KEY
+        quote = quotes.get(symbol)
+        if quote:
+            etf_data[symbol] = {
+                'price': quote['price'],
+                'change_percent': quote['change_percent'],
+                'volume': quote['volume'],
+                'as_of': quote['fetched_at'],
+                'source': 'alpha_vantage'
+            }
+        else:
+            etf_data[symbol] = {
+                'price': fallback_prices.get(symbol, 100.0),
+                'change_percent': '+0.50%',
+                'volume': '1000000',
+                'as_of': None,
+                'source': 'fallback'
             }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if 'Global Quote' in data:
-                quote = data['Global Quote']
-                etf_data[symbol] = {
-                    'price': float(quote.get('05. price', 0)),
-                    'change_percent': quote.get('10. change percent', '0%'),
-                    'volume': quote.get('06. volume', '0')
-                }
-            else:
-                # Données de fallback
-                fallback_prices = {'SPY': 622.08, 'VTI': 306.00, 'VEA': 56.83}
-                etf_data[symbol] = {
-                    'price': fallback_prices.get(symbol, 100.0),
-                    'change_percent': '+0.50%',
-                    'volume': '1000000'
-                }
-                
-        except Exception as e:
-            logger.error(f"Erreur ETF {symbol}: {e}")
-            etf_data[symbol] = {'price': 100.0, 'change_percent': '0%', 'volume': '0'}
     
     return etf_data
 
 def _get_fred_indicator(series_id: str) -> Optional[float]:
     """Récupère un indicateur FRED"""
     try:
-        url = "https://api.stlouisfed.org/fred/series/observations"
+        url = upstream_url('fred', '/series/observations')
         params = {
             'series_id': series_id,
             'api_key': FRED_API_KEY,
@@ -618,8 +893,11 @@ def _get_fred_indicator(series_id: str) -> Optional[float]:
             'sort_order': 'desc'
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        # Appels simultanés sur la même série regroupés en une requête amont
+        data = single_flight(
+            request_key('fred', series_id, params),
+            lambda: requests.get(url, params=params, timeout=10).json()
+        )
         
         observations = data.get('observations', [])
         if observations:
@@ -642,7 +920,7 @@ def _test_fred_api() -> bool:
 def _test_eia_api() -> bool:
     """Test de santé EIA API"""
     try:
-        url = "https://api.eia.gov/v2/petroleum/pri/spt/data"
+        url = upstream_url('eia', '/petroleum/pri/spt/data')
         params = {'api_key': EIA_API_KEY, 'frequency': 'daily', 'data[0]': 'value', 'length': 1}
         response = requests.get(url, params=params, timeout=5)
         return response.status_code == 200
@@ -650,13 +928,21 @@ def _test_eia_api() -> bool:
         return False
 
 def _test_alpha_vantage_api() -> bool:
-    """Test de santé Alpha Vantage API"""
+    """
+    Santé Alpha Vantage depuis le cache des cotations (aucun appel: le quota est réservé aux données)
+    Sain si une cotation suivie date de moins de deux intervalles de rafraîchissement
+    """
     try:
-        url = "https://www.alphavantage.co/query"
-        params = {'function': 'GLOBAL_QUOTE', 'symbol': 'SPY', 'apikey': ALPHA_VANTAGE_API_KEY}
-        response = requests.get(url, params=params, timeout=5)
-        data = response.json()
-        return 'Global Quote' in data
+        from market_quotes import get_quote_scheduler
+        scheduler = get_quote_scheduler(ALPHA_VANTAGE_API_KEY)
+        quotes = scheduler.store.read().get('quotes', {})
+        
+        max_age = 2 * scheduler.refresh_interval()
+        now = datetime.utcnow()
+        return any(
+            (now - datetime.fromisoformat(quote['fetched_at'])).total_seconds() < max_age
+            for symbol, quote in quotes.items() if symbol in scheduler.hot_symbols
+        )
     except:
         return False
 
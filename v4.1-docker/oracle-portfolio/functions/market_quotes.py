@@ -0,0 +1,370 @@
+"""
+Oracle Portfolio 3.0 - Market Quotes Module
+Cotations Alpha Vantage rafraîchies hors chemin des requêtes, dans le quota de la clé
+- Token bucket par clé (minute / jour), usage journalier partagé via le store
+- File de priorité des rafraîchissements (symboles suivis en continu, symboles demandés en priorité)
+- Cache partagé des dernières cotations (Firestore ou fichier local)
+- Publications fusionnées avec l'état stocké (transaction): pas d'écrasement par un état mémorisé périmé
+"""
+
+import os
+import json
+import heapq
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+from rate_limit import get_token_bucket
+from single_flight import single_flight, request_key
+from upstream_config import upstream_url
+
+# Configuration logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUOTES_COLLECTION = 'market_quotes'
+QUOTES_LATEST_DOC = 'latest'
+
+# Symboles suivis en continu (dashboard)
+HOT_SYMBOLS = ('SPY', 'VTI', 'VEA')
+
+# Priorités (plus petit = plus urgent)
+PRIORITY_REQUESTED = 0
+PRIORITY_HOT = 1
+
+class QuoteStore:
+    """
+    Dernières cotations et usage journalier du quota, partagés entre instances
+    Backends: Firestore (défaut) ou fichier local (MARKET_QUOTES_BACKEND=local)
+    Écritures par fusion avec l'état stocké relu dans la même transaction (jamais depuis le mémo)
+    """
+
+    def __init__(self, backend: Optional[str] = None, local_dir: Optional[str] = None,
+                 memo_ttl: Optional[float] = None):
+        self.backend = backend or os.environ.get('MARKET_QUOTES_BACKEND', 'firestore')
+        self.local_dir = local_dir or os.environ.get('MARKET_QUOTES_DIR', '/tmp/market_quotes')
+        self.memo_ttl = memo_ttl if memo_ttl is not None else float(os.environ.get('MARKET_QUOTES_MEMO_TTL', 60))
+
+        self._state = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def read(self, force: bool = False) -> Dict:
+        """État {'quotes': {symbole: cotation}, 'usage': {'day', 'calls'}} (mémo de l'instance)"""
+        now = datetime.utcnow().timestamp()
+        with self._lock:
+            if not force and self._state is not None and now - self._loaded_at < self.memo_ttl:
+                return self._state
+
+            try:
+                state = self._read_local() if self.backend == 'local' else self._read_firestore()
+            except Exception as e:
+                logger.error(f"Erreur lecture cotations: {e}")
+                state = None
+
+            if state is not None or self._state is None:
+                self._state = state or {'quotes': {}, 'usage': {}}
+                self._loaded_at = now
+            return self._state
+
+    def merge(self, refreshed: Dict[str, Dict], requested: Sequence[str], calls: int, day: str) -> Dict:
+        """
+        Fusionne une publication dans l'état stocké et retourne le nouvel état
+
+        Args:
+            refreshed: Cotations récupérées (la plus récente par symbole est conservée)
+            requested: Symboles à demander au prochain rafraîchissement (les symboles rafraîchis en sont retirés)
+            calls: Appels consommés depuis la dernière publication (ajoutés à l'usage du jour)
+            day: Jour du quota (ISO)
+        """
+        def apply(current: Optional[Dict]) -> Dict:
+            return self._merge_state(current or {}, refreshed, requested, calls, day)
+
+        state = self._merge_local(apply) if self.backend == 'local' else self._merge_firestore(apply)
+
+        with self._lock:
+            self._state = state
+            self._loaded_at = datetime.utcnow().timestamp()
+        return state
+
+    # Méthodes privées utilitaires
+
+    def _merge_state(self, current: Dict, refreshed: Dict[str, Dict], requested: Sequence[str],
+                     calls: int, day: str) -> Dict:
+        quotes = dict(current.get('quotes', {}))
+        for symbol, quote in refreshed.items():
+            # Une autre instance a pu publier une cotation plus récente entre-temps
+            stored = quotes.get(symbol)
+            if stored is None or stored.get('fetched_at', '') <= quote['fetched_at']:
+                quotes[symbol] = quote
+
+        usage = current.get('usage', {})
+        day_calls = (usage.get('calls', 0) if usage.get('day') == day else 0) + calls
+
+        return {
+            'quotes': quotes,
+            'requested': sorted((set(current.get('requested', [])) | set(requested)) - set(refreshed)),
+            'usage': {'day': day, 'calls': day_calls},
+            'updated_at': datetime.utcnow().isoformat()
+        }
+
+    # Backends
+
+    def _read_firestore(self) -> Optional[Dict]:
+        from firebase_admin import firestore
+
+        document = firestore.client().collection(QUOTES_COLLECTION).document(QUOTES_LATEST_DOC).get()
+        return document.to_dict() if document.exists else None
+
+    def _merge_firestore(self, apply) -> Dict:
+        from firebase_admin import firestore
+
+        client = firestore.client()
+        reference = client.collection(QUOTES_COLLECTION).document(QUOTES_LATEST_DOC)
+
+        # Lecture et écriture dans la même transaction (rejouée en cas d'écriture concurrente)
+        @firestore.transactional
+        def update(transaction) -> Dict:
+            document = reference.get(transaction=transaction)
+            state = apply(document.to_dict() if document.exists else None)
+            transaction.set(reference, state)
+            return state
+
+        return update(client.transaction())
+
+    def _read_local(self) -> Optional[Dict]:
+        path = os.path.join(self.local_dir, f'{QUOTES_LATEST_DOC}.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _merge_local(self, apply) -> Dict:
+        os.makedirs(self.local_dir, exist_ok=True)
+
+        with self._write_lock:
+            state = apply(self._read_local())
+
+            # Remplacement atomique
+            path = os.path.join(self.local_dir, f'{QUOTES_LATEST_DOC}.json')
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        return state
+
+class QuoteScheduler:
+    """
+    Ordonnanceur des appels Alpha Vantage
+    - Le chemin des requêtes lit le cache; un symbole absent est récupéré seulement si un jeton
+      est disponible, sinon demandé en priorité au prochain rafraîchissement planifié
+    - refresh_due() (fonction planifiée) rafraîchit les symboles échus tant que le quota le permet,
+      avec un intervalle calculé pour tenir dans le quota journalier
+    """
+
+    def __init__(self, api_key: str, store: Optional[QuoteStore] = None,
+                 hot_symbols: Sequence[str] = HOT_SYMBOLS):
+        self.api_key = api_key
+        self.store = store or QuoteStore()
+        self.bucket = get_token_bucket(api_key)
+        self.hot_symbols = list(hot_symbols)
+
+        self.config = {
+            'min_refresh_seconds': float(os.environ.get('ALPHA_VANTAGE_REFRESH_SECONDS', 900)),
+            # Part du quota journalier réservée aux symboles suivis (le reste: symboles demandés)
+            'hot_quota_share': float(os.environ.get('ALPHA_VANTAGE_HOT_QUOTA_SHARE', 0.8)),
+            'throttle_backoff_seconds': 60.0
+        }
+
+        self._queue: List[tuple] = []
+        self._due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self._schedule_hot_symbols()
+
+    def refresh_interval(self) -> float:
+        """Intervalle de rafraîchissement des symboles suivis tenant dans le quota journalier"""
+        calls_per_day = max(self.bucket.per_day * self.config['hot_quota_share'], 1)
+        return max(self.config['min_refresh_seconds'], 86400 * len(self.hot_symbols) / calls_per_day)
+
+    def get_quotes(self, symbols: Sequence[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Dernières cotations connues (None si jamais récupérée), lues depuis le cache partagé
+        Un symbole absent (ou non suivi et périmé) est récupéré immédiatement si un jeton est
+        disponible, sinon demandé au prochain rafraîchissement planifié
+        """
+        state = self.store.read()
+        quotes = dict(state.get('quotes', {}))
+        usage = state.get('usage', {})
+        self.bucket.sync_daily_usage(usage.get('day'), usage.get('calls', 0))
+
+        refreshed, requested, attempted = {}, [], 0
+        for symbol in symbols:
+            if not self._needs_fetch(symbol, quotes.get(symbol)):
+                continue
+            quote = None
+            if self.bucket.try_acquire():
+                attempted += 1
+                quote = self._fetch_quote(symbol)
+            if quote is not None:
+                refreshed[symbol] = quote
+            else:
+                requested.append(symbol)
+
+        if attempted or (set(requested) - set(state.get('requested', []))):
+            quotes.update(self._publish(refreshed, requested, attempted).get('quotes', {}))
+
+        return {symbol: quotes.get(symbol) for symbol in symbols}
+
+    def schedule(self, symbol: str, priority: int = PRIORITY_HOT, due_at: Optional[float] = None):
+        """Met un symbole en file (une entrée active par symbole, la plus urgente)"""
+        due_at = due_at if due_at is not None else datetime.utcnow().timestamp()
+        with self._lock:
+            if symbol in self._due and self._due[symbol] <= due_at:
+                return
+            self._due[symbol] = due_at
+            heapq.heappush(self._queue, (due_at, priority, symbol))
+
+    def refresh_due(self, limit: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Rafraîchit les symboles échus dans l'ordre (échéance, priorité), sans dépasser le quota
+        À échéance égale, les symboles demandés par les requêtes passent avant les symboles suivis
+
+        Returns:
+            {symbole: cotation} des symboles rafraîchis
+        """
+        state = self.store.read(force=True)
+        usage = state.get('usage', {})
+        self.bucket.sync_daily_usage(usage.get('day'), usage.get('calls', 0))
+
+        now = datetime.utcnow().timestamp()
+        for symbol in state.get('requested', []):
+            self.schedule(symbol, PRIORITY_REQUESTED, now)
+
+        refreshed, attempted = {}, 0
+        while limit is None or len(refreshed) < limit:
+            symbol = self._pop_due(now)
+            if symbol is None:
+                break
+
+            if not self.bucket.try_acquire():
+                # Quota atteint: reporté à la disponibilité du prochain jeton
+                self.schedule(symbol, PRIORITY_REQUESTED, now + self.bucket.seconds_until_available())
+                break
+
+            attempted += 1
+            quote = self._fetch_quote(symbol)
+            if quote is not None:
+                refreshed[symbol] = quote
+
+            if symbol in self.hot_symbols:
+                self.schedule(symbol, PRIORITY_HOT, now + self.refresh_interval())
+
+        if attempted:
+            self._publish(refreshed, [], attempted)
+
+        return refreshed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            queued = sorted(self._due.items(), key=lambda item: item[1])
+        return {
+            'bucket': self.bucket.stats(),
+            'refresh_interval_seconds': round(self.refresh_interval()),
+            'queue': [{'symbol': s, 'due_at': datetime.utcfromtimestamp(t).isoformat()} for s, t in queued]
+        }
+
+    # Méthodes privées utilitaires
+
+    def _schedule_hot_symbols(self):
+        """Échéances initiales depuis l'âge des cotations partagées (reprise après démarrage à froid)"""
+        quotes = self.store.read().get('quotes', {})
+        interval = self.refresh_interval()
+        for symbol in self.hot_symbols:
+            fetched_at = quotes.get(symbol, {}).get('fetched_at')
+            due_at = datetime.fromisoformat(fetched_at).timestamp() + interval if fetched_at else 0.0
+            self.schedule(symbol, PRIORITY_HOT, due_at)
+
+    def _needs_fetch(self, symbol: str, quote: Optional[Dict]) -> bool:
+        """Absent du cache, ou hors suivi et plus ancien que l'intervalle de rafraîchissement"""
+        if quote is None:
+            return True
+        if symbol in self.hot_symbols:
+            return False
+        age = datetime.utcnow().timestamp() - datetime.fromisoformat(quote['fetched_at']).timestamp()
+        return age > self.refresh_interval()
+
+    def _publish(self, refreshed: Dict[str, Dict], requested: List[str], calls: int) -> Dict:
+        """
+        Fusionne cotations, symboles demandés et appels consommés dans le store partagé
+        (retourne l'état publié, usage du jour réaligné sur le compteur partagé)
+        """
+        bucket_stats = self.bucket.stats()
+        state = self.store.merge(refreshed, requested, calls, bucket_stats['day'])
+
+        usage = state['usage']
+        self.bucket.sync_daily_usage(usage['day'], usage['calls'])
+        if refreshed:
+            logger.info(f"Cotations rafraîchies: {', '.join(refreshed)} ({usage['calls']}/{bucket_stats['per_day']} appels du jour)")
+        return state
+
+    def _pop_due(self, now: float) -> Optional[str]:
+        """Symbole échu le plus urgent (entrées remplacées ignorées), None si rien d'échu"""
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now:
+                due_at, _, symbol = heapq.heappop(self._queue)
+                if self._due.get(symbol) == due_at:
+                    del self._due[symbol]
+                    return symbol
+            return None
+
+    def _fetch_quote(self, symbol: str) -> Optional[Dict]:
+        """Appel GLOBAL_QUOTE (regroupé entre appelants simultanés)"""
+        params = {'function': 'GLOBAL_QUOTE', 'symbol': symbol, 'apikey': self.api_key}
+
+        def fetch():
+            response = requests.get(upstream_url('alpha_vantage', '/query'), params=params, timeout=10)
+            return response.json()
+
+        try:
+            data = single_flight(request_key('alphavantage', symbol, params), fetch)
+        except Exception as e:
+            logger.error(f"Erreur cotation {symbol}: {e}")
+            return None
+
+        if 'Note' in data or 'Information' in data:
+            # Limitation signalée par Alpha Vantage: quota bloqué, symbole remis en file
+            self.bucket.exhaust(self.config['throttle_backoff_seconds'])
+            logger.warning(f"Alpha Vantage limite atteinte ({symbol})")
+            self.schedule(symbol, PRIORITY_REQUESTED,
+                          datetime.utcnow().timestamp() + self.config['throttle_backoff_seconds'])
+            return None
+
+        quote = data.get('Global Quote')
+        if not quote:
+            return None
+
+        return {
+            'price': float(quote.get('05. price', 0)),
+            'change_percent': quote.get('10. change percent', '0%'),
+            'volume': quote.get('06. volume', '0'),
+            'latest_trading_day': quote.get('07. latest trading day'),
+            'fetched_at': datetime.utcnow().isoformat()
+        }
+
+_quote_scheduler = None
+_quote_scheduler_lock = threading.Lock()
+
+def get_quote_scheduler(api_key: str) -> QuoteScheduler:
+    """
+    Instance partagée de l'ordonnanceur (une par instance de fonction)
+    """
+    global _quote_scheduler
+    with _quote_scheduler_lock:
+        if _quote_scheduler is None:
+            _quote_scheduler = QuoteScheduler(api_key)
+        return _quote_scheduler
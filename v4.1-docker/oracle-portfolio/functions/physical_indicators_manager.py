@@ -3,14 +3,21 @@ Oracle Portfolio 3.0 - Physical Indicators Manager
 Gestionnaire d'allocations basé sur 7 indicateurs physiques institutionnels
 """
 
-import pandas as pd
+import os
+import math
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 import requests
 import logging
 from typing import Dict, List, Tuple, Optional
 import json
 
+from single_flight import single_flight, request_key
+from upstream_config import upstream_url
+from indicator_signal_engine import IndicatorSignalEngine, ASSET_CLASSES
+
 # Configuration logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,8 +33,8 @@ class PhysicalIndicatorsManager:
         self.eia_api_key = eia_api_key
         
         # URLs des APIs
-        self.fred_url = "https://api.stlouisfed.org/fred/series/observations"
-        self.eia_url = "https://api.eia.gov/v2/petroleum/pri/spt/data"
+        self.fred_url = upstream_url('fred', '/series/observations')
+        self.eia_url = upstream_url('eia', '/petroleum/pri/spt/data')
         
         # Configuration des 7 indicateurs physiques
         self.indicators_config = {
@@ -89,6 +96,26 @@ class PhysicalIndicatorsManager:
             'STAGFLATION': {'stocks': 0.40, 'bonds': 0.20, 'commodities': 0.35, 'cash': 0.05},
             'BOOM': {'stocks': 0.75, 'bonds': 0.15, 'commodities': 0.05, 'cash': 0.05}
         }
+        
+        # Valeurs de fallback réalistes
+        self.fallback_values = {
+            'copper_price': 3.2,
+            'oil_price': 65.0,
+            'gold_price': 1800.0,
+            'baltic_dry_index': 1200.0,
+            'steel_price': 600.0,
+            'agricultural_index': 105.0,
+            'lumber_price': 450.0
+        }
+        
+        # Moteur vectorisé des signaux / stress / ajustements (seuils et poids en tableaux)
+        self.signal_engine = IndicatorSignalEngine(self.indicators_config)
+        
+        # Collecte concurrente: parallélisme borné et échéance globale
+        self.collection_config = {
+            'max_workers': int(os.environ.get('INDICATORS_MAX_WORKERS', 7)),
+            'deadline_seconds': float(os.environ.get('INDICATORS_DEADLINE_SECONDS', 8.0))
+        }
     
     def fetch_fred_indicator(self, series_id: str) -> Optional[float]:
         """
@@ -103,16 +130,17 @@ class PhysicalIndicatorsManager:
                 'sort_order': 'desc'
             }
             
-            response = requests.get(self.fred_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            # Appels simultanés sur la même série regroupés en une requête amont
+            data = single_flight(
+                request_key('fred', series_id, params),
+                lambda: self._get_json(self.fred_url, params)
+            )
             observations = data.get('observations', [])
             
             for obs in observations:
                 try:
                     value = float(obs['value'])
-                    if not np.isnan(value):
+                    if not math.isnan(value):
                         return value
                 except (ValueError, TypeError):
                     continue
@@ -139,10 +167,10 @@ class PhysicalIndicatorsManager:
                 'length': 5
             }
             
-            response = requests.get(self.eia_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = single_flight(
+                request_key('eia', 'RBRTE', params),
+                lambda: self._get_json(self.eia_url, params)
+            )
             if 'response' in data and 'data' in data['response']:
                 for item in data['response']['data']:
                     try:
@@ -156,88 +184,92 @@ class PhysicalIndicatorsManager:
             logger.error(f"Erreur EIA oil price: {e}")
             return None
     
+    def _get_json(self, url: str, params: Dict) -> Dict:
+        """
+        Requête HTTP GET amont (réponse JSON)
+        """
+        response = requests.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    
     def get_all_indicators(self) -> Dict[str, float]:
         """
         Récupère tous les indicateurs physiques
+        
+        Les séries sont récupérées en parallèle (max_workers) sous une échéance globale:
+        la latence est bornée par la série la plus lente, et seules les séries
+        qui manquent l'échéance utilisent leur valeur de fallback
         """
+        max_workers = min(self.collection_config['max_workers'], len(self.indicators_config))
+        if max_workers <= 1:
+            return {name: self._fetch_indicator(name, config) for name, config in self.indicators_config.items()}
+        
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='indicators')
+        try:
+            futures = {
+                executor.submit(self._fetch_indicator, name, config): name
+                for name, config in self.indicators_config.items()
+            }
+            done, pending = wait(futures, timeout=self.collection_config['deadline_seconds'])
+        finally:
+            # Les requêtes en retard ne bloquent pas la réponse
+            executor.shutdown(wait=False, cancel_futures=True)
+        
         indicators = {}
+        for future, name in futures.items():
+            indicators[name] = future.result() if future in done else self.fallback_values.get(name, 100.0)
         
-        for name, config in self.indicators_config.items():
-            try:
-                if 'fred_series' in config:
-                    value = self.fetch_fred_indicator(config['fred_series'])
-                elif 'eia_series' in config and name == 'oil_price':
-                    value = self.fetch_eia_oil_price()
-                else:
-                    value = None
-                
-                # Valeurs de fallback réalistes
-                fallback_values = {
-                    'copper_price': 3.2,
-                    'oil_price': 65.0,
-                    'gold_price': 1800.0,
-                    'baltic_dry_index': 1200.0,
-                    'steel_price': 600.0,
-                    'agricultural_index': 105.0,
-                    'lumber_price': 450.0
-                }
-                
-                indicators[name] = value if value is not None else fallback_values.get(name, 100.0)
-                
-            except Exception as e:
-                logger.error(f"Erreur indicateur {name}: {e}")
-                indicators[name] = 100.0
+        if pending:
+            late = sorted(futures[future] for future in pending)
+            logger.warning(
+                f"Échéance collecte indicateurs dépassée ({time.monotonic() - started:.1f}s) - "
+                f"fallback pour: {', '.join(late)}"
+            )
         
-        return indicators
+        # Ordre de configuration conservé
+        return {name: indicators[name] for name in self.indicators_config}
+    
+    def fetch_indicator(self, name: str) -> float:
+        """
+        Récupère un indicateur configuré (valeur de fallback si la source ne répond pas)
+        """
+        return self._fetch_indicator(name, self.indicators_config[name])
+    
+    def _fetch_indicator(self, name: str, config: Dict) -> float:
+        """
+        Récupère un indicateur (valeur de fallback si la source ne répond pas)
+        """
+        try:
+            if 'fred_series' in config:
+                value = self.fetch_fred_indicator(config['fred_series'])
+            elif 'eia_series' in config and name == 'oil_price':
+                value = self.fetch_eia_oil_price()
+            else:
+                value = None
+            
+            return value if value is not None else self.fallback_values.get(name, 100.0)
+            
+        except Exception as e:
+            logger.error(f"Erreur indicateur {name}: {e}")
+            return 100.0
     
     def analyze_indicator_signals(self, indicators: Dict[str, float]) -> Dict[str, str]:
         """
         Analyse les signaux de chaque indicateur
         """
-        signals = {}
-        
-        for name, value in indicators.items():
-            config = self.indicators_config[name]
-            
-            if value >= config['threshold_high']:
-                signals[name] = 'HIGH'
-            elif value <= config['threshold_low']:
-                signals[name] = 'LOW'
-            else:
-                signals[name] = 'NEUTRAL'
-        
-        return signals
+        engine = self.signal_engine
+        signals = engine.signals(engine.to_array(indicators))
+        return engine.signal_labels(signals, [name for name in indicators if name in engine.index])
     
     def calculate_market_stress_score(self, indicators: Dict[str, float], signals: Dict[str, str]) -> float:
         """
         Calcule un score de stress de marché basé sur les indicateurs physiques
         """
         try:
-            stress_components = []
-            
-            # Analyse des signaux de stress
-            for name, signal in signals.items():
-                config = self.indicators_config[name]
-                weight = config['weight']
-                interpretation = config['interpretation']
-                
-                # Logique de stress par type d'indicateur
-                if interpretation == 'safe_haven' and signal == 'HIGH':
-                    stress_components.append(weight * 0.8)  # Or élevé = stress
-                elif interpretation == 'energy_inflation' and signal == 'HIGH':
-                    stress_components.append(weight * 0.7)  # Pétrole élevé = inflation
-                elif interpretation == 'economic_activity' and signal == 'LOW':
-                    stress_components.append(weight * 0.6)  # Cuivre bas = récession
-                elif interpretation == 'global_trade' and signal == 'LOW':
-                    stress_components.append(weight * 0.5)  # Baltic bas = commerce faible
-                else:
-                    stress_components.append(weight * 0.2)  # Conditions normales
-            
-            # Score de stress normalisé (0-100)
-            raw_score = sum(stress_components) * 100
-            normalized_score = min(max(raw_score, 0), 100)
-            
-            return round(normalized_score, 1)
+            engine = self.signal_engine
+            present = np.array([name in signals for name in engine.names], dtype=float)
+            return float(engine.stress_scores(engine.signal_codes(signals), present))
             
         except Exception as e:
             logger.error(f"Erreur calcul stress: {e}")
@@ -250,23 +282,14 @@ class PhysicalIndicatorsManager:
         """
         try:
             # Allocation de base selon le régime
-            base_alloc = self.base_allocations.get(base_regime, self.base_allocations['EXPANSION']).copy()
-            
-            # Ajustements basés sur les signaux physiques
-            adjustments = self._calculate_allocation_adjustments(signals, indicators)
+            base_alloc = self.base_allocations.get(base_regime, self.base_allocations['EXPANSION'])
+            base = np.array([base_alloc.get(asset, 0.0) for asset in ASSET_CLASSES])
             
-            # Application des ajustements
-            for asset_class, adjustment in adjustments.items():
-                if asset_class in base_alloc:
-                    base_alloc[asset_class] = max(0.0, min(1.0, base_alloc[asset_class] + adjustment))
+            # Ajustements basés sur les signaux physiques, projetés sur les poids admissibles (somme 1, [0, 1])
+            adjustments = self.signal_engine.adjustments(self.signal_engine.signal_codes(signals))
+            allocations = self.signal_engine.allocations(base, adjustments)
             
-            # Normalisation pour que la somme = 1.0
-            total = sum(base_alloc.values())
-            if total > 0:
-                for asset_class in base_alloc:
-                    base_alloc[asset_class] = round(base_alloc[asset_class] / total, 3)
-            
-            return base_alloc
+            return {asset: float(allocations[i]) for i, asset in enumerate(ASSET_CLASSES) if asset in base_alloc}
             
         except Exception as e:
             logger.error(f"Erreur génération allocations: {e}")
@@ -277,51 +300,40 @@ class PhysicalIndicatorsManager:
         """
         Calcule les ajustements d'allocation basés sur les signaux
         """
-        adjustments = {'stocks': 0.0, 'bonds': 0.0, 'commodities': 0.0, 'cash': 0.0}
-        
         try:
-            # Logique d'ajustement sophistiquée
-            
-            # 1. Signaux de safe-haven (or élevé)
-            if signals.get('gold_price') == 'HIGH':
-                adjustments['stocks'] -= 0.05
-                adjustments['bonds'] += 0.03
-                adjustments['cash'] += 0.02
-            
-            # 2. Signaux d'inflation (pétrole, agriculture élevés)
-            inflation_signals = [signals.get('oil_price'), signals.get('agricultural_index')]
-            if inflation_signals.count('HIGH') >= 1:
-                adjustments['commodities'] += 0.08
-                adjustments['bonds'] -= 0.05
-                adjustments['stocks'] -= 0.03
-            
-            # 3. Signaux de récession (cuivre, baltic bas)
-            recession_signals = [signals.get('copper_price'), signals.get('baltic_dry_index')]
-            if recession_signals.count('LOW') >= 1:
-                adjustments['stocks'] -= 0.10
-                adjustments['bonds'] += 0.07
-                adjustments['cash'] += 0.03
-            
-            # 4. Signaux de croissance (indicateurs industriels élevés)
-            growth_signals = [signals.get('steel_price'), signals.get('lumber_price')]
-            if growth_signals.count('HIGH') >= 1:
-                adjustments['stocks'] += 0.08
-                adjustments['bonds'] -= 0.05
-                adjustments['commodities'] -= 0.03
-            
-            return adjustments
+            adjustments = self.signal_engine.adjustments(self.signal_engine.signal_codes(signals))
+            return {asset: float(adjustments[i]) for i, asset in enumerate(ASSET_CLASSES)}
             
         except Exception as e:
             logger.error(f"Erreur calcul ajustements: {e}")
-            return adjustments
+            return {asset: 0.0 for asset in ASSET_CLASSES}
     
-    def get_indicators_breakdown(self) -> Dict:
+    def evaluate_indicator_history(self, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Signaux, scores de stress et ajustements pour un tableau d'observations
+        
+        Args:
+            values: Tableau (..., 7) dans l'ordre de indicators_config (ex: pays × dates × indicateurs)
+        
+        Returns:
+            Dict de tableaux (voir IndicatorSignalEngine.evaluate)
+        """
+        return self.signal_engine.evaluate(values)
+    
+    def get_indicators_breakdown(self, indicators: Optional[Dict[str, float]] = None,
+                                 signals: Optional[Dict[str, str]] = None) -> Dict:
         """
         Retourne une analyse détaillée de tous les indicateurs
+        
+        Args:
+            indicators: Valeurs déjà collectées (sinon récupérées)
+            signals: Signaux déjà calculés pour ces valeurs
         """
         try:
-            indicators = self.get_all_indicators()
-            signals = self.analyze_indicator_signals(indicators)
+            if indicators is None:
+                indicators = self.get_all_indicators()
+            if signals is None:
+                signals = self.analyze_indicator_signals(indicators)
             stress_score = self.calculate_market_stress_score(indicators, signals)
             
             # Analyse détaillée par indicateur
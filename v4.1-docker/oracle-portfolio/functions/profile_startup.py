@@ -0,0 +1,115 @@
+"""
+Oracle Portfolio 3.0 - Startup Profile
+Mesure du coût d'import (démarrage à froid) de chaque fonction
+
+Usage:
+    python profile_startup.py [--runs 5] [getCountries getRegime ...]
+
+Chaque mesure est faite dans un interpréteur neuf avec FUNCTION_TARGET positionné,
+comme au démarrage d'une instance Cloud Functions
+"""
+
+import os
+import ast
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+FUNCTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Paquets lourds suivis dans le profil
+TRACKED_PACKAGES = ['numpy', 'pandas', 'requests', 'firebase_admin', 'firebase_functions', 'google.cloud.firestore']
+
+def load_endpoint_modules() -> Dict[str, List[str]]:
+    """Lit _ENDPOINT_MODULES dans main.py sans l'importer"""
+    with open(os.path.join(FUNCTIONS_DIR, 'main.py'), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == '_ENDPOINT_MODULES' for t in node.targets):
+            return ast.literal_eval(node.value)
+    return {}
+
+def profile_import(target: str, statement: str) -> Dict:
+    """
+    Importe dans un sous-processus avec -X importtime
+
+    Returns:
+        Dict avec durée totale (ms), coût cumulé des paquets suivis (ms) et erreur éventuelle
+    """
+    env = {**os.environ, 'FUNCTION_TARGET': target}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=FUNCTIONS_DIR, env=env, capture_output=True, text=True
+    )
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [p.strip() for p in line[len('import time:'):].split('|')]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        # Première ligne du paquet (quel que soit le niveau): coût cumulé de son import
+        name = parts[2]
+        if name in TRACKED_PACKAGES and name not in cumulative:
+            cumulative[name] = int(parts[1]) / 1000
+
+    total = 0.0
+    for line in result.stdout.splitlines():
+        if line.startswith('ELAPSED_MS='):
+            total = float(line.split('=', 1)[1])
+
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed'
+
+    return {'total_ms': total, 'packages_ms': cumulative, 'error': error}
+
+def profile_endpoint(target: str, modules: List[str], runs: int) -> Dict:
+    """
+    Profil de démarrage d'une fonction: import de main.py si possible, sinon de sa surface d'import
+    (modules légers de main.py + modules lourds de l'endpoint) quand firebase_functions est absent
+    """
+    timer = "import time; t = time.perf_counter(); {imports}; print(f'ELAPSED_MS={{(time.perf_counter() - t) * 1000:.1f}}')"
+    statement = timer.format(imports='import main')
+
+    samples = [profile_import(target, statement) for _ in range(runs)]
+    mode = 'main'
+
+    if samples[0]['error']:
+        surface = ['requests', 'regime_snapshot', 'country_registry', 'single_flight', 'upstream_config', 'http_cache', 'serialization'] + modules
+        statement = timer.format(imports='; '.join(f'import {m}' for m in surface))
+        samples = [profile_import(target, statement) for _ in range(runs)]
+        mode = 'surface'
+
+    return {
+        'target': target,
+        'mode': mode,
+        'median_ms': round(statistics.median(s['total_ms'] for s in samples), 1),
+        'packages_ms': samples[-1]['packages_ms'],
+        'error': samples[-1]['error']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Profil de démarrage à froid des fonctions')
+    parser.add_argument('targets', nargs='*', help='Fonctions à profiler (défaut: toutes)')
+    parser.add_argument('--runs', type=int, default=5, help='Interpréteurs neufs par fonction')
+    args = parser.parse_args()
+
+    endpoint_modules = load_endpoint_modules()
+    targets = args.targets or list(endpoint_modules)
+
+    print(f"{'Fonction':<28}{'Mode':<10}{'Médiane (ms)':>14}  Paquets lourds chargés")
+    for target in targets:
+        profile = profile_endpoint(target, endpoint_modules.get(target, []), args.runs)
+        packages = ', '.join(f"{name} {ms:.0f}ms" for name, ms in profile['packages_ms'].items()) or '-'
+        line = f"{target:<28}{profile['mode']:<10}{profile['median_ms']:>14.1f}  {packages}"
+        if profile['error']:
+            line += f"  [ERREUR: {profile['error']}]"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Oracle Portfolio - Limitation de Débit des APIs
+Token bucket par clé d'API: quota par minute (rechargé en continu) et quota journalier (UTC)
+Copie synchronisée de functions-python/modules/rate_limit.py (codebase déployée séparément)
+"""
+
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Dict
+
+class TokenBucket:
+    """
+    Quota d'appels d'une clé d'API
+    - Jetons rechargés au rythme per_minute / 60 par seconde (rafale max: per_minute)
+    - Compteur journalier remis à zéro à minuit UTC
+    - Blocage temporaire quand le fournisseur signale un dépassement (exhaust)
+    """
+
+    def __init__(self, per_minute: float, per_day: int):
+        self.per_minute = per_minute
+        self.per_day = per_day
+
+        self._tokens = float(per_minute)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._day = datetime.utcnow().date()
+        self._day_calls = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Consomme un jeton si le quota le permet (jamais bloquant)"""
+        with self._lock:
+            now = self._refill()
+            if now < self._blocked_until or self._day_calls >= self.per_day or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._day_calls += 1
+            return True
+
+    def seconds_until_available(self) -> float:
+        """Délai avant le prochain jeton disponible (0 si disponible)"""
+        with self._lock:
+            now = self._refill()
+            if self._day_calls >= self.per_day:
+                tomorrow = datetime.combine(self._day + timedelta(days=1), datetime.min.time())
+                return max((tomorrow - datetime.utcnow()).total_seconds(), 0.0)
+            wait_tokens = max(1 - self._tokens, 0.0) * 60 / self.per_minute
+            return max(self._blocked_until - now, wait_tokens, 0.0)
+
+    def exhaust(self, seconds: float = 60.0):
+        """Quota signalé épuisé par le fournisseur: plus d'appel pendant seconds"""
+        with self._lock:
+            now = self._refill()
+            self._tokens = 0.0
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def sync_daily_usage(self, day: str, calls: int):
+        """Aligne le compteur journalier sur un usage partagé (autres instances)"""
+        with self._lock:
+            self._refill()
+            if day == self._day.isoformat():
+                self._day_calls = max(self._day_calls, calls)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            now = self._refill()
+            return {
+                'tokens': round(self._tokens, 2),
+                'per_minute': self.per_minute,
+                'day': self._day.isoformat(),
+                'day_calls': self._day_calls,
+                'per_day': self.per_day,
+                'blocked_seconds': round(max(self._blocked_until - now, 0.0), 1)
+            }
+
+    # Méthodes privées utilitaires
+
+    def _refill(self) -> float:
+        """Recharge les jetons et change de jour si nécessaire (appelé sous verrou)"""
+        now = time.monotonic()
+        self._tokens = min(float(self.per_minute), self._tokens + (now - self._updated_at) * self.per_minute / 60)
+        self._updated_at = now
+
+        today = datetime.utcnow().date()
+        if today != self._day:
+            self._day = today
+            self._day_calls = 0
+        return now
+
+# Buckets partagés par clé d'API (une instance par clé et par instance de fonction)
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+def get_token_bucket(api_key: str, per_minute: float = None, per_day: int = None) -> TokenBucket:
+    """
+    Bucket de la clé d'API (quotas Alpha Vantage gratuits par défaut:
+    ALPHA_VANTAGE_PER_MINUTE=5, ALPHA_VANTAGE_PER_DAY=25)
+    """
+    with _buckets_lock:
+        if api_key not in _buckets:
+            _buckets[api_key] = TokenBucket(
+                per_minute if per_minute is not None else float(os.environ.get('ALPHA_VANTAGE_PER_MINUTE', 5)),
+                per_day if per_day is not None else int(os.environ.get('ALPHA_VANTAGE_PER_DAY', 25))
+            )
+        return _buckets[api_key]
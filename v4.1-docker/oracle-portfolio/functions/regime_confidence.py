@@ -0,0 +1,106 @@
+"""
+Oracle Portfolio 3.0 - Regime Confidence Module
+Probabilités de régime par perturbation bootstrap des indicateurs (calcul vectorisé)
+"""
+
+import numpy as np
+from typing import Dict, List, Optional
+
+REGIMES = ('RECESSION', 'EXPANSION', 'STAGFLATION', 'BOOM')
+
+# Incertitude accrue quand une partie des séries manque (valeurs par défaut utilisées)
+DATA_QUALITY_NOISE = {'HIGH': 1.0, 'MEDIUM': 1.5, 'LOW': 2.5, 'FALLBACK': 3.0}
+
+class RegimeConfidenceEngine:
+    """
+    Probabilités de régime calibrées
+    - Perturbation des indicateurs selon leur incertitude de mesure / révision
+    - Classification de tous les tirages en une seule opération NumPy (même règles que _classify_regime)
+    - Lissage par les fréquences historiques des régimes (a priori de Dirichlet)
+    """
+
+    def __init__(self, thresholds: Dict, regime_frequencies: Dict[str, float],
+                 noise_scales: Optional[Dict[str, float]] = None,
+                 n_samples: int = 4000, prior_strength: float = 20.0, seed: int = 0):
+        self.thresholds = thresholds
+        self.regime_frequencies = regime_frequencies
+
+        # Écart-type de l'erreur sur chaque indicateur (points de %)
+        self.noise_scales = noise_scales or {
+            'growth': 0.75,        # Révisions PIB
+            'inflation': 0.40,
+            'unemployment': 0.25
+        }
+
+        self.n_samples = n_samples
+        self.prior_strength = prior_strength  # Poids de l'a priori en nombre de tirages équivalents
+
+        # Tirages communs réutilisés à chaque requête: résultats déterministes et pas de RNG par appel
+        self._draws = np.random.default_rng(seed).standard_normal((3, n_samples))
+        self._prior = np.array([regime_frequencies.get(regime, 0.25) for regime in REGIMES])
+        self._prior = self._prior / self._prior.sum()
+
+    def classify(self, growth: np.ndarray, inflation: np.ndarray, unemployment: np.ndarray) -> np.ndarray:
+        """
+        Classification vectorisée (indices dans REGIMES), identique à EconomicRegimesDetector._classify_regime
+        """
+        growth_t = self.thresholds['growth']
+        inflation_t = self.thresholds['inflation']
+        unemployment_t = self.thresholds['unemployment']
+
+        high_inflation = inflation > inflation_t['high']
+        recession = growth < growth_t['recession']
+
+        return np.select(
+            [
+                recession & high_inflation,
+                recession,
+                growth > growth_t['boom'],
+                high_inflation & (unemployment > unemployment_t['high'])
+            ],
+            [2, 0, 3, 2],
+            default=1
+        )
+
+    def probabilities_batch(self, growth: np.ndarray, inflation: np.ndarray, unemployment: np.ndarray,
+                            noise_multiplier: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Probabilités de régime pour N jeux d'indicateurs
+
+        Args:
+            growth, inflation, unemployment: Tableaux (N,)
+            noise_multiplier: Facteur (N,) appliqué aux incertitudes (ex: données de faible qualité)
+
+        Returns:
+            Tableau (N, 4) de probabilités, colonnes dans l'ordre de REGIMES
+        """
+        growth = np.atleast_1d(np.asarray(growth, dtype=float))
+        inflation = np.atleast_1d(np.asarray(inflation, dtype=float))
+        unemployment = np.atleast_1d(np.asarray(unemployment, dtype=float))
+        multiplier = np.ones(len(growth)) if noise_multiplier is None else np.asarray(noise_multiplier, dtype=float)
+
+        # Tirages (N, S) pour chaque indicateur
+        scale = multiplier[:, None]
+        samples = self.classify(
+            growth[:, None] + self.noise_scales['growth'] * scale * self._draws[0],
+            inflation[:, None] + self.noise_scales['inflation'] * scale * self._draws[1],
+            unemployment[:, None] + self.noise_scales['unemployment'] * scale * self._draws[2]
+        )
+
+        counts = np.stack([(samples == i).sum(axis=1) for i in range(len(REGIMES))], axis=1)
+        return (counts + self.prior_strength * self._prior) / (self.n_samples + self.prior_strength)
+
+    def regime_probabilities(self, growth: float, inflation: float, unemployment: float,
+                             noise_multiplier: float = 1.0) -> Dict[str, float]:
+        """
+        Probabilités de régime pour un pays {régime: probabilité}
+        """
+        probabilities = self.probabilities_batch(growth, inflation, unemployment, np.array([noise_multiplier]))
+        return self.probabilities_to_dicts(probabilities)[0]
+
+    def probabilities_to_dicts(self, probabilities: np.ndarray) -> List[Dict[str, float]]:
+        """Conversion (N, 4) → liste de {régime: probabilité}"""
+        return [
+            {regime: round(float(p), 4) for regime, p in zip(REGIMES, row)}
+            for row in probabilities
+        ]
@@ -0,0 +1,214 @@
+"""
+Oracle Portfolio 3.0 - Regime Snapshot Module
+Table précalculée des régimes pour tous les pays supportés
+Snapshot plus ancien que max_age (défaut: 2 × la période de précalcul de 6 h) considéré périmé
+"""
+
+import os
+import json
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Configuration logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA_VERSION = 1
+SNAPSHOT_COLLECTION = 'regime_snapshots'
+SNAPSHOT_LATEST_DOC = 'latest'
+# Deux cycles de precomputeRegimeSnapshot (toutes les 6 h) manqués au plus
+SNAPSHOT_MAX_AGE = 12 * 3600
+
+def build_regime_snapshot(country_codes: List[str], fred_api_key: str) -> Dict:
+    """
+    Calcule régime, confiance et indicateurs pour tous les pays demandés
+    (étape de précalcul, hors chemin des requêtes HTTP)
+    """
+    # Import différé: la lecture du snapshot ne charge pas numpy / pandas
+    from economic_regimes_corrected import EconomicRegimesDetector
+
+    detector = EconomicRegimesDetector(fred_api_key)
+    regimes = detector.detect_regimes_batch(country_codes)
+
+    generated_at = datetime.utcnow()
+
+    return {
+        'version': generated_at.strftime('%Y%m%dT%H%M%SZ'),
+        'schema_version': SNAPSHOT_SCHEMA_VERSION,
+        'generated_at': generated_at.isoformat(),
+        'regimes': regimes,
+        'summary': generate_global_summary(regimes)
+    }
+
+def generate_global_summary(regimes: Dict) -> Dict:
+    """
+    Génère un résumé global des régimes
+    (sans dépendance lourde: servi depuis le snapshot sans charger la détection)
+    """
+    regime_counts = {}
+    total_confidence = 0
+    
+    for country_data in regimes.values():
+        regime = country_data['regime']
+        regime_counts[regime] = regime_counts.get(regime, 0) + 1
+        total_confidence += country_data['confidence']
+    
+    dominant_regime = max(regime_counts, key=regime_counts.get) if regime_counts else 'EXPANSION'
+    avg_confidence = total_confidence / len(regimes) if regimes else 0.75
+    
+    return {
+        'dominant_regime': dominant_regime,
+        'regime_distribution': regime_counts,
+        'average_confidence': round(avg_confidence, 2),
+        'countries_analyzed': len(regimes)
+    }
+
+class RegimeSnapshotStore:
+    """
+    Stockage versionné du snapshot des régimes
+    Backends: Firestore (défaut) ou fichier local (REGIME_SNAPSHOT_BACKEND=local)
+    Lecture servie depuis la mémoire de l'instance, rafraîchie au plus toutes les memo_ttl secondes
+    read_fresh() écarte un snapshot dont generated_at dépasse max_age secondes
+    """
+
+    def __init__(self, backend: Optional[str] = None, local_dir: Optional[str] = None,
+                 memo_ttl: Optional[float] = None, max_age: Optional[float] = None):
+        self.backend = backend or os.environ.get('REGIME_SNAPSHOT_BACKEND', 'firestore')
+        self.local_dir = local_dir or os.environ.get('REGIME_SNAPSHOT_DIR', '/tmp/regime_snapshots')
+        self.memo_ttl = memo_ttl if memo_ttl is not None else float(os.environ.get('REGIME_SNAPSHOT_MEMO_TTL', 60))
+        self.max_age = max_age if max_age is not None else float(
+            os.environ.get('REGIME_SNAPSHOT_MAX_AGE', SNAPSHOT_MAX_AGE)
+        )
+
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def write(self, snapshot: Dict) -> str:
+        """
+        Publie un snapshot: copie versionnée + pointeur 'latest'
+        """
+        if self.backend == 'local':
+            self._write_local(snapshot)
+        else:
+            self._write_firestore(snapshot)
+
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = datetime.utcnow().timestamp()
+
+        logger.info(f"Snapshot régimes {snapshot['version']} publié ({len(snapshot['regimes'])} pays)")
+        return snapshot['version']
+
+    def read(self) -> Optional[Dict]:
+        """
+        Retourne le dernier snapshot (lecture unique du backend si le mémo a expiré)
+        """
+        now = datetime.utcnow().timestamp()
+        if self._snapshot is not None and now - self._loaded_at < self.memo_ttl:
+            return self._snapshot
+
+        with self._lock:
+            if self._snapshot is not None and now - self._loaded_at < self.memo_ttl:
+                return self._snapshot
+
+            try:
+                snapshot = self._read_local() if self.backend == 'local' else self._read_firestore()
+            except Exception as e:
+                logger.error(f"Erreur lecture snapshot régimes: {e}")
+                snapshot = None
+
+            if snapshot is not None:
+                self._snapshot = snapshot
+                self._loaded_at = now
+
+            return self._snapshot
+
+    def read_fresh(self) -> Optional[Dict]:
+        """
+        Dernier snapshot s'il a moins de max_age secondes, None sinon (précalcul en échec)
+        """
+        snapshot = self.read()
+        if snapshot is None:
+            return None
+
+        age = self.age_seconds(snapshot)
+        if age is None or age > self.max_age:
+            logger.warning(
+                f"Snapshot régimes {snapshot.get('version')} périmé "
+                f"({'âge inconnu' if age is None else f'{age / 3600:.1f} h'}, max {self.max_age / 3600:.1f} h)"
+            )
+            return None
+        return snapshot
+
+    def age_seconds(self, snapshot: Dict) -> Optional[float]:
+        """Âge du snapshot d'après generated_at (UTC), None si absent ou invalide"""
+        try:
+            generated_at = datetime.fromisoformat(snapshot['generated_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return (datetime.utcnow() - generated_at).total_seconds()
+
+    def get_country(self, country: str) -> Optional[Dict]:
+        """Régime précalculé d'un pays, ou None si absent du snapshot ou périmé"""
+        snapshot = self.read_fresh()
+        if not snapshot:
+            return None
+        return snapshot['regimes'].get(country)
+
+    # Backends
+
+    def _write_firestore(self, snapshot: Dict):
+        from firebase_admin import firestore
+
+        collection = firestore.client().collection(SNAPSHOT_COLLECTION)
+        collection.document(snapshot['version']).set(snapshot)
+        collection.document(SNAPSHOT_LATEST_DOC).set(snapshot)
+
+    def _read_firestore(self) -> Optional[Dict]:
+        from firebase_admin import firestore
+
+        document = firestore.client().collection(SNAPSHOT_COLLECTION).document(SNAPSHOT_LATEST_DOC).get()
+        return document.to_dict() if document.exists else None
+
+    def _write_local(self, snapshot: Dict):
+        os.makedirs(self.local_dir, exist_ok=True)
+
+        payload = json.dumps(snapshot, ensure_ascii=False)
+        with open(os.path.join(self.local_dir, f"{snapshot['version']}.json"), 'w', encoding='utf-8') as f:
+            f.write(payload)
+
+        # Remplacement atomique du pointeur latest
+        latest_path = os.path.join(self.local_dir, f'{SNAPSHOT_LATEST_DOC}.json')
+        tmp_path = f'{latest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, latest_path)
+
+    def _read_local(self) -> Optional[Dict]:
+        latest_path = os.path.join(self.local_dir, f'{SNAPSHOT_LATEST_DOC}.json')
+        if not os.path.exists(latest_path):
+            return None
+        with open(latest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+_snapshot_store = None
+
+def get_snapshot_store() -> RegimeSnapshotStore:
+    """
+    Instance partagée du store (une par instance de fonction)
+    """
+    global _snapshot_store
+    if _snapshot_store is None:
+        _snapshot_store = RegimeSnapshotStore()
+    return _snapshot_store
+
+def refresh_regime_snapshot(country_codes: List[str], fred_api_key: str) -> Dict:
+    """
+    Recalcule et publie le snapshot pour tous les pays
+    """
+    snapshot = build_regime_snapshot(country_codes, fred_api_key)
+    get_snapshot_store().write(snapshot)
+    return snapshot
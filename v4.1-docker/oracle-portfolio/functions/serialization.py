@@ -0,0 +1,102 @@
+"""
+Oracle Portfolio 3.0 - Serialization Module
+Encodage JSON des réponses HTTP
+- Encodeur le plus rapide disponible: orjson, puis ujson, puis json (SERIALIZATION_ENCODER pour forcer)
+- Types NumPy (scalaires, tableaux) et dates encodés sans conversion préalable du payload
+  (NumPy reconnu sans être importé: pas de surcoût au démarrage des fonctions légères)
+- Payloads statiques (indépendants de la requête) encodés une seule fois par instance
+"""
+
+import os
+import json
+import threading
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Configuration logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _default(value: Any) -> Any:
+    """Types hors JSON natif (orjson: uniquement ceux qu'il ne gère pas nativement)"""
+    if hasattr(value, 'tolist'):
+        # ndarray et scalaires NumPy
+        return value.tolist()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+def _select_encoder() -> str:
+    available = {'orjson': orjson is not None, 'ujson': ujson is not None, 'json': True}
+    requested = os.environ.get('SERIALIZATION_ENCODER')
+    if requested:
+        if available.get(requested):
+            return requested
+        logger.warning(f"Encodeur {requested} indisponible - sélection automatique")
+    return next(name for name in ('orjson', 'ujson', 'json') if available[name])
+
+ENCODER = _select_encoder()
+
+if ENCODER == 'orjson':
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(payload: Any, sort_keys: bool = False) -> bytes:
+        """Encode le payload en JSON UTF-8 (sort_keys: encodage canonique)"""
+        option = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        return orjson.dumps(payload, option=option, default=_default)
+
+elif ENCODER == 'ujson':
+    def dumps(payload: Any, sort_keys: bool = False) -> bytes:
+        """Encode le payload en JSON UTF-8 (sort_keys: encodage canonique)"""
+        return ujson.dumps(payload, ensure_ascii=False, sort_keys=sort_keys, default=_default).encode('utf-8')
+
+else:
+    def dumps(payload: Any, sort_keys: bool = False) -> bytes:
+        """Encode le payload en JSON UTF-8 (sort_keys: encodage canonique)"""
+        return json.dumps(payload, ensure_ascii=False, sort_keys=sort_keys, default=_default).encode('utf-8')
+
+# Payloads statiques encodés: clé -> (payload, octets)
+_static_payloads: Dict[str, Tuple[Dict, bytes]] = {}
+_static_lock = threading.Lock()
+
+def get_static_json(key: str, build: Callable[[], Dict]) -> Tuple[Dict, bytes]:
+    """
+    Payload statique et son encodage, construits au premier appel puis réutilisés par l'instance
+
+    Args:
+        key: Identifiant du payload (ex: nom de la fonction)
+        build: Construction du payload (appelée une seule fois)
+    """
+    cached = _static_payloads.get(key)
+    if cached is not None:
+        return cached
+
+    with _static_lock:
+        if key not in _static_payloads:
+            payload = build()
+            _static_payloads[key] = (payload, dumps(payload))
+        return _static_payloads[key]
+
+def clear_static_json(key: Optional[str] = None):
+    """Invalide un payload statique (ou tous)"""
+    with _static_lock:
+        if key is None:
+            _static_payloads.clear()
+        else:
+            _static_payloads.pop(key, None)
@@ -0,0 +1,97 @@
+"""
+Oracle Portfolio 3.0 - Single Flight Module
+Regroupement des requêtes amont identiques et simultanées
+"""
+
+import threading
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Configuration logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Paramètres exclus de la clé (identifiants, sans effet sur la réponse)
+_SECRET_PARAMS = {'api_key', 'apikey'}
+
+class _Call:
+    """Requête en cours partagée entre les appelants d'une même clé"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Un seul appel amont en vol par clé (source, série, paramètres)
+    Les appelants concurrents de la même clé attendent et partagent le résultat (ou l'erreur)
+    Aucun résultat n'est conservé après la fin de l'appel: ce n'est pas un cache
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'shared': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Exécute fn() pour la clé, ou attend l'appel identique déjà en cours
+
+        Args:
+            key: Clé de regroupement (voir request_key)
+            fn: Appel amont sans argument
+
+        Returns:
+            Résultat de fn() (les exceptions sont propagées à tous les appelants)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+                self.stats['calls'] += 1
+            else:
+                call.waiters += 1
+                leader = False
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            if call.waiters:
+                logger.info(f"Requête amont partagée entre {call.waiters + 1} appelants: {key[:2] if isinstance(key, tuple) else key}")
+
+        return call.result
+
+def request_key(source: str, series: str, params: Dict) -> Tuple:
+    """Clé (source, série, paramètres) sans les clés d'API"""
+    return (source, series, tuple(sorted(
+        (name, str(value)) for name, value in params.items() if name not in _SECRET_PARAMS
+    )))
+
+_single_flight = SingleFlight()
+
+def single_flight(key: Hashable, fn: Callable[[], Any]) -> Any:
+    """
+    Appel regroupé via l'instance partagée (une par instance de fonction)
+    """
+    return _single_flight.do(key, fn)
+
+def get_single_flight() -> SingleFlight:
+    """Instance partagée (statistiques)"""
+    return _single_flight
@@ -0,0 +1,275 @@
+"""
+Oracle Portfolio 3.0 - Stress Index Module
+Série historique persistée de l'indice de stress de marché (quotidienne et mensuelle)
+Mise à jour incrémentale: un point par nouvelle observation, jamais de recalcul complet
+Lectures ciblées: documents des jours et mois concernés à l'ajout, requête bornée pour la consultation
+"""
+
+import os
+import json
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Configuration logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STRESS_SCHEMA_VERSION = 1
+STRESS_COLLECTIONS = {'daily': 'stress_index_daily', 'monthly': 'stress_index_monthly'}
+STRESS_FREQUENCIES = tuple(STRESS_COLLECTIONS)
+
+class StressIndexStore:
+    """
+    Stockage de la série de stress
+    Backends: Firestore (défaut, un document par période) ou fichiers locaux (STRESS_INDEX_BACKEND=local)
+    - Point quotidien: score, niveau, signaux et indicateurs de l'observation
+    - Point mensuel: moyenne courante des points quotidiens du mois (somme / nombre), mise à jour à chaque ajout
+    """
+
+    def __init__(self, backend: Optional[str] = None, local_dir: Optional[str] = None,
+                 memo_ttl: Optional[float] = None):
+        self.backend = backend or os.environ.get('STRESS_INDEX_BACKEND', 'firestore')
+        self.local_dir = local_dir or os.environ.get('STRESS_INDEX_DIR', '/tmp/stress_index')
+        self.memo_ttl = memo_ttl if memo_ttl is not None else float(os.environ.get('STRESS_INDEX_MEMO_TTL', 300))
+
+        # Résultats des consultations: (fréquence, start, end, limit) -> (instant, points)
+        self._queries: Dict[Tuple, Tuple[float, List[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    def append(self, manager, indicators: Dict[str, float], observed_at: Optional[datetime] = None) -> Dict:
+        """
+        Ajoute l'observation du jour (no-op si le jour est déjà présent)
+
+        Args:
+            manager: PhysicalIndicatorsManager (moteur de signaux et catégories de stress)
+            indicators: Valeurs des indicateurs physiques
+            observed_at: Date d'observation (défaut: maintenant)
+
+        Returns:
+            Point quotidien enregistré (ou existant)
+        """
+        return self.backfill(manager, [(observed_at or datetime.utcnow(), indicators)])[0]
+
+    def backfill(self, manager, observations: Sequence[Tuple[datetime, Dict[str, float]]]) -> List[Dict]:
+        """
+        Ajoute plusieurs observations historiques; seuls les jours absents sont évalués,
+        en une seule évaluation vectorisée
+        Seuls les documents des jours et mois concernés sont lus; une erreur de lecture
+        interrompt l'ajout sans aucune écriture (pas d'agrégat réécrit à partir d'une lecture vide)
+
+        Returns:
+            Points quotidiens correspondant aux observations (nouveaux ou existants)
+        """
+        engine = manager.signal_engine
+
+        # Un point par jour (dernière observation du jour retenue)
+        observed = {}
+        for observed_at, indicators in observations:
+            observed[observed_at.strftime('%Y-%m-%d')] = (observed_at, indicators)
+
+        with self._lock:
+            daily = self._read_points('daily', sorted(observed))
+            pending = {period: observation for period, observation in observed.items() if period not in daily}
+
+            if pending:
+                import numpy as np
+
+                periods = sorted(pending)
+                monthly = self._read_points('monthly', sorted({period[:7] for period in periods}))
+                values = np.array([engine.to_array(pending[p][1]) for p in periods])
+                evaluation = engine.evaluate(values)
+
+                new_daily, new_monthly = [], {}
+                for row, period in enumerate(periods):
+                    observed_at, indicators = pending[period]
+                    point = self._daily_point(manager, period, observed_at, indicators,
+                                              evaluation['signals'][row], float(evaluation['stress_scores'][row]))
+                    daily[period] = point
+                    new_daily.append(point)
+
+                    month_point = self._update_monthly(manager, monthly.get(period[:7]), point)
+                    monthly[month_point['period']] = month_point
+                    new_monthly[month_point['period']] = month_point
+
+                self._write('daily', new_daily)
+                self._write('monthly', list(new_monthly.values()))
+                self._queries.clear()
+
+                logger.info(f"Indice de stress: {len(periods)} point(s) ajouté(s), dernier {periods[-1]}")
+
+            return [daily[observed_at.strftime('%Y-%m-%d')] for observed_at, _ in observations]
+
+    def get_series(self, frequency: str = 'daily', start: Optional[str] = None,
+                   end: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Points de la série triés par période (bornes incluses, format de période de la fréquence)
+        limit conserve les points les plus récents
+        """
+        if frequency not in STRESS_FREQUENCIES:
+            raise ValueError(f"Fréquence {frequency} non supportée ({', '.join(STRESS_FREQUENCIES)})")
+
+        # Résultat mémorisé au plus memo_ttl secondes (la série n'évolue qu'une fois par jour)
+        key = (frequency, start, end, limit)
+        now = datetime.utcnow().timestamp()
+        with self._lock:
+            memo = self._queries.get(key)
+            if memo and now - memo[0] < self.memo_ttl:
+                return memo[1]
+
+        if self.backend == 'local':
+            points = self._query_local(frequency, start, end, limit)
+        else:
+            points = self._query_firestore(frequency, start, end, limit)
+
+        with self._lock:
+            if len(self._queries) >= 128:
+                self._queries.clear()
+            self._queries[key] = (now, points)
+        return points
+
+    # Construction des points
+
+    def _daily_point(self, manager, period: str, observed_at: datetime, indicators: Dict[str, float],
+                     signals: 'np.ndarray', stress_score: float) -> Dict:
+        labels = manager.signal_engine.signal_labels(signals)
+        return {
+            'period': period,
+            'frequency': 'daily',
+            'schema_version': STRESS_SCHEMA_VERSION,
+            'stress_score': stress_score,
+            'stress_level': manager._categorize_stress_level(stress_score),
+            'dominant_signals': manager._get_dominant_signals(labels),
+            'signals': labels,
+            'indicators': {name: round(float(value), 4) for name, value in indicators.items() if value is not None},
+            'observed_at': observed_at.isoformat()
+        }
+
+    def _update_monthly(self, manager, month_point: Optional[Dict], daily_point: Dict) -> Dict:
+        """Agrégat mensuel incrémental (pas de relecture des points du mois)"""
+        total = (month_point['score_sum'] if month_point else 0.0) + daily_point['stress_score']
+        count = (month_point['observations'] if month_point else 0) + 1
+        score = round(total / count, 1)
+        last = daily_point if not month_point or daily_point['period'] >= month_point['last_period'] else None
+
+        return {
+            'period': daily_point['period'][:7],
+            'frequency': 'monthly',
+            'schema_version': STRESS_SCHEMA_VERSION,
+            'stress_score': score,
+            'stress_level': manager._categorize_stress_level(score),
+            'score_sum': round(total, 4),
+            'observations': count,
+            'max_score': max(month_point['max_score'] if month_point else 0.0, daily_point['stress_score']),
+            'last_period': last['period'] if last else month_point['last_period'],
+            'last_score': last['stress_score'] if last else month_point['last_score']
+        }
+
+    # Backends
+
+    def _read_points(self, frequency: str, periods: Sequence[str]) -> Dict[str, Dict]:
+        """Points existants parmi periods (appelé sous verrou, erreurs de lecture propagées)"""
+        if not periods:
+            return {}
+        if self.backend == 'local':
+            series = self._read_local(frequency)
+            return {period: series[period] for period in periods if period in series}
+        return self._read_firestore(frequency, periods)
+
+    def _write(self, frequency: str, points: List[Dict]):
+        if self.backend == 'local':
+            self._write_local(frequency, points)
+        else:
+            self._write_firestore(frequency, points)
+
+    def _read_firestore(self, frequency: str, periods: Sequence[str]) -> Dict[str, Dict]:
+        from firebase_admin import firestore
+
+        client = firestore.client()
+        collection = client.collection(STRESS_COLLECTIONS[frequency])
+        documents = client.get_all([collection.document(period) for period in periods])
+        return {document.id: document.to_dict() for document in documents if document.exists}
+
+    def _query_firestore(self, frequency: str, start: Optional[str], end: Optional[str],
+                         limit: Optional[int]) -> List[Dict]:
+        from firebase_admin import firestore
+
+        # Bornes et tri sur le même champ: index simple, pas d'index composite requis
+        query = firestore.client().collection(STRESS_COLLECTIONS[frequency])
+        if start is not None:
+            query = query.where('period', '>=', start)
+        if end is not None:
+            query = query.where('period', '<=', end)
+        query = query.order_by('period', direction=firestore.Query.DESCENDING)
+        if limit:
+            query = query.limit(limit)
+
+        points = [document.to_dict() for document in query.stream()]
+        points.reverse()
+        return points
+
+    def _write_firestore(self, frequency: str, points: List[Dict]):
+        from firebase_admin import firestore
+
+        client = firestore.client()
+        collection = client.collection(STRESS_COLLECTIONS[frequency])
+
+        # Écritures groupées (limite Firestore: 500 opérations par batch)
+        for offset in range(0, len(points), 500):
+            batch = client.batch()
+            for point in points[offset:offset + 500]:
+                batch.set(collection.document(point['period']), point)
+            batch.commit()
+
+    def _series_path(self, frequency: str) -> str:
+        return os.path.join(self.local_dir, f'{STRESS_COLLECTIONS[frequency]}.json')
+
+    def _read_local(self, frequency: str) -> Dict[str, Dict]:
+        path = self._series_path(frequency)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _query_local(self, frequency: str, start: Optional[str], end: Optional[str],
+                     limit: Optional[int]) -> List[Dict]:
+        series = self._read_local(frequency)
+        points = [
+            series[period] for period in sorted(series)
+            if (start is None or period >= start) and (end is None or period <= end)
+        ]
+        return points[-limit:] if limit else points
+
+    def _write_local(self, frequency: str, points: List[Dict]):
+        os.makedirs(self.local_dir, exist_ok=True)
+
+        series = self._read_local(frequency)
+        series.update({point['period']: point for point in points})
+
+        # Remplacement atomique du fichier de série
+        path = self._series_path(frequency)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(series, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+_stress_index_store = None
+
+def get_stress_index_store() -> StressIndexStore:
+    """
+    Instance partagée du store (une par instance de fonction)
+    """
+    global _stress_index_store
+    if _stress_index_store is None:
+        _stress_index_store = StressIndexStore()
+    return _stress_index_store
+
+def record_stress_observation(fred_api_key: str, eia_api_key: str) -> Dict:
+    """
+    Récupère les indicateurs courants et ajoute le point du jour à la série
+    """
+    from physical_indicators_manager import PhysicalIndicatorsManager
+
+    manager = PhysicalIndicatorsManager(fred_api_key, eia_api_key)
+    return get_stress_index_store().append(manager, manager.get_all_indicators())
@@ -0,0 +1,397 @@
+"""
+Oracle Portfolio - Serveur Amont Simulé
+Sert FRED, EIA, Alpha Vantage, OECD et ENTSO-E depuis des fixtures locales,
+avec latence, taux d'erreur et limitation de débit configurables (tests de charge sans quota)
+
+Usage:
+    python mock_upstream.py --port 8099 --latency-ms 80 --jitter-ms 40 --error-rate 0.01 --rate-limit 120
+
+Puis, pour les fonctions:
+    export UPSTREAM_BASE_URL=http://localhost:8099   (voir upstream_config.py)
+
+Endpoints de pilotage:
+    GET  /__mock/stats    compteurs par source et statut
+    GET  /__mock/config   configuration courante
+    POST /__mock/config   mise à jour à chaud, ex: {"default": {"error_rate": 0.1}, "fred": {"latency_ms": 500}}
+    POST /__mock/reset    remise à zéro des compteurs et des quotas
+"""
+
+import os
+import json
+import time
+import zlib
+import random
+import asyncio
+import argparse
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SOURCES = ('fred', 'eia', 'alpha_vantage', 'oecd', 'entsoe')
+
+# Comportement par défaut (surchargé par source dans MockConfig.overrides)
+DEFAULT_BEHAVIOUR = {
+    'latency_ms': 50.0,        # Latence moyenne ajoutée à chaque réponse
+    'jitter_ms': 20.0,         # Écart uniforme +/- autour de la latence
+    'error_rate': 0.0,         # Probabilité de réponse 500
+    'timeout_rate': 0.0,       # Probabilité de ne pas répondre avant hang_seconds
+    'hang_seconds': 30.0,
+    'rate_limit_per_minute': 0  # Requêtes / minute / (source, clé d'API); 0 = illimité
+}
+
+class MockConfig:
+    """Comportement effectif par source: défaut + surcharges"""
+
+    def __init__(self, default: Optional[Dict] = None, overrides: Optional[Dict[str, Dict]] = None):
+        self.default = {**DEFAULT_BEHAVIOUR, **(default or {})}
+        self.overrides = {source: dict(values) for source, values in (overrides or {}).items()}
+
+    def for_source(self, source: str) -> Dict:
+        return {**self.default, **self.overrides.get(source, {})}
+
+    def update(self, payload: Dict):
+        for key, values in payload.items():
+            if key == 'default':
+                self.default.update(_validated(values))
+            elif key in SOURCES:
+                self.overrides.setdefault(key, {}).update(_validated(values))
+            else:
+                raise ValueError(f"Section inconnue: {key}")
+
+    def to_dict(self) -> Dict:
+        return {'default': self.default, **self.overrides}
+
+def _validated(values: Dict) -> Dict:
+    unknown = set(values) - set(DEFAULT_BEHAVIOUR)
+    if unknown:
+        raise ValueError(f"Paramètres inconnus: {', '.join(sorted(unknown))}")
+    return {key: float(value) for key, value in values.items()}
+
+class MinuteWindow:
+    """Limitation par fenêtre glissante d'une minute, par (source, clé d'API)"""
+
+    def __init__(self):
+        self.calls: Dict[tuple, List[float]] = defaultdict(list)
+
+    def allow(self, key: tuple, per_minute: float) -> bool:
+        if per_minute <= 0:
+            return True
+        now = time.monotonic()
+        window = [t for t in self.calls[key] if now - t < 60]
+        allowed = len(window) < per_minute
+        if allowed:
+            window.append(now)
+        self.calls[key] = window
+        return allowed
+
+class Fixtures:
+    """Fixtures au format des réponses amont, chargées une fois"""
+
+    def __init__(self, directory: str = FIXTURES_DIR):
+        def load(name):
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        self.fred = load('fred_observations.json')['series']
+        self.eia = load('eia.json')
+        self.alpha_vantage = load('alpha_vantage.json')['global_quote']
+        self.oecd = load('oecd.json')
+        self.entsoe = load('entsoe.json')['A75_hourly_mw']
+
+    def fred_series(self, series_id: str) -> List[List[str]]:
+        """Observations enregistrées, ou série synthétique déterministe pour un identifiant inconnu"""
+        if series_id in self.fred:
+            return self.fred[series_id]['observations']
+
+        rng = random.Random(zlib.crc32(series_id.encode()))
+        value = rng.uniform(50, 150)
+        observations = []
+        month = date(2025, 9, 1)
+        for _ in range(100):
+            observations.append([month.isoformat(), f"{value:.2f}"])
+            value *= 1 + rng.gauss(0, 0.01)
+            month = (month - timedelta(days=1)).replace(day=1)
+        return observations[::-1]
+
+    def quote(self, symbol: str) -> Dict:
+        if symbol in self.alpha_vantage:
+            return self.alpha_vantage[symbol]
+
+        rng = random.Random(zlib.crc32(symbol.encode()))
+        price = rng.uniform(20, 400)
+        return {
+            '01. symbol': symbol, '05. price': f"{price:.4f}", '06. volume': str(rng.randint(10000, 5000000)),
+            '07. latest trading day': '2025-09-30', '10. change percent': f"{rng.uniform(-2, 2):.4f}%"
+        }
+
+class MockUpstream:
+    """Application aiohttp: routage par source, injection de latence / erreurs / limitation"""
+
+    def __init__(self, fixtures: Fixtures, config: MockConfig, seed: Optional[int] = None):
+        self.fixtures = fixtures
+        self.config = config
+        self.random = random.Random(seed)
+        self.window = MinuteWindow()
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get('/fred/series/observations', self.fred_observations),
+            web.get('/eia/petroleum/pri/spt/data', self.eia_petroleum_spot),
+            web.get('/eia/international/data', self.eia_international),
+            web.get('/eia/electricity/electric-power-operational-data/data/', self.eia_power_operational),
+            web.get('/alpha_vantage/query', self.alpha_vantage_query),
+            web.get('/oecd/data/{dataset}/{key}/all', self.oecd_data),
+            web.get('/entsoe', self.entsoe_generation),
+            web.get('/__mock/stats', self.get_stats),
+            web.get('/__mock/config', self.get_config),
+            web.post('/__mock/config', self.post_config),
+            web.post('/__mock/reset', self.post_reset)
+        ])
+        return app
+
+    # Sources
+
+    async def fred_observations(self, request: web.Request) -> web.Response:
+        blocked = await self._behave(request, 'fred', request.query.get('api_key'))
+        if blocked:
+            return blocked
+
+        series_id = request.query.get('series_id', '')
+        observations = [
+            {'realtime_start': '2025-10-01', 'realtime_end': '2025-10-01', 'date': d, 'value': v}
+            for d, v in self.fixtures.fred_series(series_id)
+        ]
+        if request.query.get('sort_order', 'asc') == 'desc':
+            observations.reverse()
+        limit = int(request.query.get('limit', 100000))
+        observations = observations[:limit]
+
+        return self._json('fred', {
+            'units': 'lin', 'output_type': 1, 'file_type': 'json',
+            'order_by': 'observation_date', 'sort_order': request.query.get('sort_order', 'asc'),
+            'count': len(observations), 'offset': 0, 'limit': limit,
+            'observations': observations
+        })
+
+    async def eia_petroleum_spot(self, request: web.Request) -> web.Response:
+        blocked = await self._behave(request, 'eia', request.query.get('api_key'))
+        if blocked:
+            return blocked
+
+        series = request.query.get('facets[series][]', 'RBRTE')
+        rows = [
+            {'period': period, 'series': series, 'value': value, 'units': '$/BBL'}
+            for period, value in self.fixtures.eia['petroleum_spot'].get(series, [])
+        ]
+        return self._json('eia', self._eia_page(request, rows))
+
+    async def eia_international(self, request: web.Request) -> web.Response:
+        blocked = await self._behave(request, 'eia', request.query.get('api_key'))
+        if blocked:
+            return blocked
+
+        country = request.query.get('facets[countryRegionId][]', 'USA')
+        rows = [
+            {'period': period, 'countryRegionId': country, 'productId': 'electricity', 'value': value, 'unit': 'BKWH'}
+            for period, value in self.fixtures.eia['international_electricity'].get(country, [])
+        ]
+        return self._json('eia', self._eia_page(request, rows))
+
+    async def eia_power_operational(self, request: web.Request) -> web.Response:
+        blocked = await self._behave(request, 'eia', request.query.get('api_key'))
+        if blocked:
+            return blocked
+
+        location = request.query.get('facets[location][]', 'US')
+        rows = [
+            {'period': period, 'location': location, 'generation': value, 'generation-units': 'thousand megawatthours'}
+            for period, value in self.fixtures.eia['electric_power_operational'].get(location, [])
+        ]
+        return self._json('eia', self._eia_page(request, rows))
+
+    async def alpha_vantage_query(self, request: web.Request) -> web.Response:
+        blocked = await self._behave(request, 'alpha_vantage', request.query.get('apikey'))
+        if blocked:
+            return blocked
+
+        if request.query.get('function') != 'GLOBAL_QUOTE':
+            return self._json('alpha_vantage', {'Error Message': 'Invalid API call (mock: GLOBAL_QUOTE uniquement)'})
+        return self._json('alpha_vantage', {'Global Quote': self.fixtures.quote(request.query.get('symbol', ''))})
+
+    async def oecd_data(self, request: web.Request) -> web.Response:
+        blocked = await self._behave(request, 'oecd')
+        if blocked:
+            return blocked
+
+        dataset = request.match_info['dataset']
+        key = request.match_info['key'].split('.')
+        country = key[0]
+        if dataset == 'MEI':
+            values = self.fixtures.oecd['MEI_BSCICP03'].get(country)
+        else:
+            values = self.fixtures.oecd['QNA_B1_GE'].get(country)
+        if values is None:
+            return self._json('oecd', {'error': 'NoRecordsFound'}, status=404)
+
+        # Périodes consécutives à partir de startTime (mensuelles pour MEI, trimestrielles sinon)
+        start_year, start_month = (int(part) for part in request.query.get('startTime', '2023-01')[:7].split('-'))
+        if dataset == 'MEI':
+            periods = [f'{start_year + (start_month - 1 + i) // 12}-{(start_month - 1 + i) % 12 + 1:02d}'
+                       for i in range(len(values))]
+        else:
+            first_quarter = (start_month - 1) // 3
+            periods = [f'{start_year + (first_quarter + i) // 4}-Q{(first_quarter + i) % 4 + 1}'
+                       for i in range(len(values))]
+
+        return self._json('oecd', {
+            'header': {'id': 'mock', 'test': True, 'prepared': datetime.utcnow().isoformat()},
+            'dataSets': [{'action': 'Information', 'observations': {
+                f'0:0:0:{i}': [value, 0, None] for i, value in enumerate(values)
+            }}],
+            'structure': {
+                'name': dataset,
+                'dimensions': {'observation': [
+                    {'id': 'LOCATION', 'values': [{'id': country}]},
+                    {'id': 'SUBJECT', 'values': [{'id': key[1] if len(key) > 1 else ''}]},
+                    {'id': 'FREQUENCY', 'values': [{'id': 'M' if dataset == 'MEI' else 'Q'}]},
+                    {'id': 'TIME_PERIOD', 'values': [{'id': period} for period in periods]}
+                ]}
+            }
+        })
+
+    async def entsoe_generation(self, request: web.Request) -> web.Response:
+        blocked = await self._behave(request, 'entsoe', request.query.get('securityToken'))
+        if blocked:
+            return blocked
+
+        domain = request.query.get('in_Domain', '')
+        quantities = self.fixtures.entsoe.get(domain)
+        if quantities is None:
+            return self._count('entsoe', 200, web.Response(
+                text='<Acknowledgement_MarketDocument><Reason><code>999</code>'
+                     '<text>No matching data found</text></Reason></Acknowledgement_MarketDocument>',
+                content_type='application/xml'
+            ))
+
+        start = request.query.get('periodStart', '202509010000')
+        start_iso = f"{start[:4]}-{start[4:6]}-{start[6:8]}T00:00Z"
+        points = ''.join(
+            f'<Point><position>{i + 1}</position><quantity>{quantity:.0f}</quantity></Point>'
+            for i, quantity in enumerate(quantities)
+        )
+        xml = (
+            '<GL_MarketDocument xmlns="urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0">'
+            f'<TimeSeries><Period><timeInterval><start>{start_iso}</start></timeInterval>'
+            f'<resolution>PT60M</resolution>{points}</Period></TimeSeries></GL_MarketDocument>'
+        )
+        return self._count('entsoe', 200, web.Response(text=xml, content_type='application/xml'))
+
+    # Pilotage
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({source: dict(counts) for source, counts in self.stats.items()})
+
+    async def get_config(self, request: web.Request) -> web.Response:
+        return web.json_response(self.config.to_dict())
+
+    async def post_config(self, request: web.Request) -> web.Response:
+        try:
+            self.config.update(await request.json())
+        except (ValueError, TypeError) as e:
+            return web.json_response({'error': str(e)}, status=400)
+        logger.info(f"Configuration mise à jour: {self.config.to_dict()}")
+        return web.json_response(self.config.to_dict())
+
+    async def post_reset(self, request: web.Request) -> web.Response:
+        self.stats.clear()
+        self.window = MinuteWindow()
+        return web.json_response({'reset': True})
+
+    # Méthodes privées utilitaires
+
+    async def _behave(self, request: web.Request, source: str, api_key: Optional[str] = None) -> Optional[web.Response]:
+        """Latence, erreurs et limitation de la source; réponse de refus ou None pour servir normalement"""
+        behaviour = self.config.for_source(source)
+
+        delay = behaviour['latency_ms'] + self.random.uniform(-behaviour['jitter_ms'], behaviour['jitter_ms'])
+        await asyncio.sleep(max(delay, 0.0) / 1000)
+
+        if not self.window.allow((source, api_key), behaviour['rate_limit_per_minute']):
+            return self._rate_limited(source)
+
+        roll = self.random.random()
+        if roll < behaviour['timeout_rate']:
+            await asyncio.sleep(behaviour['hang_seconds'])
+            return self._count(source, 504, web.json_response({'error': 'mock timeout'}, status=504))
+        if roll < behaviour['timeout_rate'] + behaviour['error_rate']:
+            return self._count(source, 500, web.json_response({'error': 'mock internal error'}, status=500))
+        return None
+
+    def _rate_limited(self, source: str) -> web.Response:
+        """Refus au format de chaque fournisseur (Alpha Vantage: 200 + 'Note')"""
+        if source == 'alpha_vantage':
+            return self._count(source, 'throttled', web.json_response({
+                'Note': 'Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute.'
+            }))
+        if source == 'fred':
+            body = {'error_code': 429, 'error_message': 'Too Many Requests.  Exceeded Rate Limit'}
+        else:
+            body = {'error': 'Too Many Requests'}
+        return self._count(source, 429, web.json_response(body, status=429))
+
+    def _eia_page(self, request: web.Request, rows: List[Dict]) -> Dict:
+        if request.query.get('sort[0][direction]') == 'desc':
+            rows = rows[::-1]
+        offset = int(request.query.get('offset', 0))
+        length = int(request.query.get('length', 5000))
+        return {'response': {'total': len(rows), 'data': rows[offset:offset + length]}}
+
+    def _json(self, source: str, payload: Dict, status: int = 200) -> web.Response:
+        return self._count(source, status, web.json_response(payload, status=status))
+
+    def _count(self, source: str, status, response: web.Response) -> web.Response:
+        self.stats[source][str(status)] += 1
+        return response
+
+def main():
+    parser = argparse.ArgumentParser(description='Serveur amont simulé (FRED / EIA / Alpha Vantage / OECD / ENTSO-E)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('MOCK_UPSTREAM_PORT', 8099)))
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Répertoire des fixtures')
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_BEHAVIOUR['latency_ms'])
+    parser.add_argument('--jitter-ms', type=float, default=DEFAULT_BEHAVIOUR['jitter_ms'])
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_BEHAVIOUR['error_rate'])
+    parser.add_argument('--timeout-rate', type=float, default=DEFAULT_BEHAVIOUR['timeout_rate'])
+    parser.add_argument('--rate-limit', type=float, default=DEFAULT_BEHAVIOUR['rate_limit_per_minute'],
+                        help='Requêtes / minute / (source, clé), 0 = illimité')
+    parser.add_argument('--config', help='Fichier JSON de surcharges par source (même format que POST /__mock/config)')
+    parser.add_argument('--seed', type=int, default=None, help='Graine (latence et erreurs reproductibles)')
+    args = parser.parse_args()
+
+    config = MockConfig({
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'timeout_rate': args.timeout_rate,
+        'rate_limit_per_minute': args.rate_limit
+    })
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+
+    upstream = MockUpstream(Fixtures(args.fixtures), config, args.seed)
+    logger.info(f"Serveur amont simulé sur http://{args.host}:{args.port} - {config.to_dict()}")
+    web.run_app(upstream.build_app(), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+"""
+Oracle Portfolio - Tests de Charge des Fonctions HTTP
+Lance les fonctions localement (functions-framework) contre le serveur amont simulé
+et mesure latences p50/p95/p99, débit, démarrage à froid, mémoire par instance et appels amont par requête
+
+Usage:
+    python loadtest/run_load_test.py --concurrency 1 8 32 --duration 20 [getRegime getAllocations ...]
+    python loadtest/run_load_test.py --output baseline.json
+    python loadtest/run_load_test.py --compare baseline.json --tolerance 0.25
+
+Chaque fonction est servie par --instances processus neufs (une cible par processus, comme une instance
+Cloud Functions); le démarrage à froid est le délai entre le lancement et la première réponse
+"""
+
+import os
+import re
+import sys
+import ast
+import json
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+import tempfile
+from collections import Counter
+from typing import Dict, List, Optional
+
+import aiohttp
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTIONS_DIR = os.path.join(os.path.dirname(LOADTEST_DIR), 'functions')
+
+# Requêtes envoyées à chaque fonction HTTP (parcourues en boucle)
+DEFAULT_SCENARIOS = {
+    'getRegime': [{'country': country} for country in ('FRA', 'US', 'DEU', 'GBR', 'JPN')],
+    'getMultiRegime': [{'countries': 'FRA,US,DEU'}, {'countries': 'GBR,JPN,CAN,AUS'}],
+    'getAllocations': [
+        {'country': 'FRA', 'risk': 'moderate'},
+        {'country': 'US', 'risk': 'aggressive'},
+        {'country': 'DEU', 'risk': 'conservative'}
+    ],
+    'getAllocationsBatch': [{}],
+    'getIndicatorsBreakdown': [{}],
+    'getMarketData': [{}],
+    'getIntegratedDashboard': [{'country': 'FRA'}, {'country': 'US'}],
+    'getSystemHealth': [{}],
+    'getCountries': [{}],
+    'getStressIndexHistory': [{'frequency': 'daily', 'limit': '90'}, {'frequency': 'monthly'}]
+}
+
+# État précalculé par les fonctions planifiées (snapshot des régimes, cotations, indice de stress)
+SEED_STATE_SCRIPT = """
+import sys
+from regime_snapshot import refresh_regime_snapshot
+from market_quotes import get_quote_scheduler
+from stress_index import record_stress_observation
+
+refresh_regime_snapshot(sys.argv[1].split(','), 'loadtest')
+get_quote_scheduler('loadtest').refresh_due()
+record_stress_observation('loadtest', 'loadtest')
+"""
+
+def load_main_constant(name: str):
+    """Lit une constante littérale de main.py sans l'importer"""
+    with open(os.path.join(FUNCTIONS_DIR, 'main.py'), 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == name for t in node.targets):
+            return ast.literal_eval(node.value)
+    return None
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """RSS cumulée d'un processus et de ses descendants (Linux, /proc), None si indisponible"""
+    children: Dict[int, List[int]] = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'r') as f:
+                    # Le nom du processus (2e champ) peut contenir des espaces
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return None
+
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status', 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+class FunctionInstance:
+    """Une fonction servie par functions-framework dans un processus dédié"""
+
+    def __init__(self, target: str, env: Dict[str, str], log_dir: str):
+        self.target = target
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}/"
+        self.env = {**env, 'FUNCTION_TARGET': target}
+        self.log_path = os.path.join(log_dir, f"{target}-{self.port}.log")
+
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.startup_ms: Optional[float] = None
+        self.peak_rss_mb: Optional[float] = None
+
+    def start(self):
+        log = open(self.log_path, 'w')
+        self.started_at = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'functions_framework', '--target', self.target,
+             '--source', os.path.join(FUNCTIONS_DIR, 'main.py'), '--host', '127.0.0.1', '--port', str(self.port)],
+            cwd=FUNCTIONS_DIR, env=self.env, stdout=log, stderr=subprocess.STDOUT
+        )
+        log.close()
+
+    async def wait_ready(self, session: aiohttp.ClientSession, params: Dict, timeout: float) -> bool:
+        """Attend la première réponse (démarrage à froid = lancement + import + première requête)"""
+        deadline = self.started_at + timeout
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                return False
+            try:
+                async with session.get(self.url, params=params) as response:
+                    await response.read()
+                    self.startup_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+                    return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                await asyncio.sleep(0.05)
+        return False
+
+    def sample_memory(self) -> Optional[float]:
+        rss = process_tree_rss_mb(self.process.pid) if self.process else None
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, rss)
+        return rss
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def log_tail(self, lines: int = 5) -> str:
+        try:
+            with open(self.log_path, 'r', errors='replace') as f:
+                return ''.join(f.readlines()[-lines:])
+        except OSError:
+            return ''
+
+class MockUpstreamProcess:
+    """Serveur amont simulé (mock_upstream.py) lancé pour la durée du test"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, rate_limit: float, seed: int):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.args = [
+            '--port', str(self.port), '--latency-ms', str(latency_ms), '--jitter-ms', str(jitter_ms),
+            '--error-rate', str(error_rate), '--rate-limit', str(rate_limit), '--seed', str(seed)
+        ]
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(LOADTEST_DIR, 'mock_upstream.py')] + self.args,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    def wait_ready(self, timeout: float = 15.0) -> bool:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline and self.process.poll() is None:
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return True
+            except OSError:
+                time.sleep(0.1)
+        return False
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+async def upstream_request(session: aiohttp.ClientSession, upstream: Optional[str], path: str,
+                           method: str = 'GET') -> Optional[Dict]:
+    """Endpoint de pilotage du serveur simulé (None si absent: amont réel ou autre serveur)"""
+    if not upstream:
+        return None
+    try:
+        async with session.request(method, f"{upstream}/__mock/{path}") as response:
+            return await response.json() if response.status == 200 else None
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return None
+
+def summarize(latencies: List[float]) -> Dict:
+    """Percentiles de latence (ms)"""
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    if len(latencies) == 1:
+        value = round(latencies[0], 1)
+        return {'p50_ms': value, 'p95_ms': value, 'p99_ms': value, 'max_ms': value}
+
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'p50_ms': round(cuts[49], 1),
+        'p95_ms': round(cuts[94], 1),
+        'p99_ms': round(cuts[98], 1),
+        'max_ms': round(max(latencies), 1)
+    }
+
+async def drive_load(session: aiohttp.ClientSession, urls: List[str], scenarios: List[Dict],
+                     concurrency: int, duration: float) -> Dict:
+    """
+    Charge en boucle fermée: concurrency utilisateurs enchaînant les requêtes sans pause
+    (instances et scénarios parcourus à tour de rôle)
+    """
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    stop_at = time.perf_counter() + duration
+
+    async def user(index: int):
+        sequence = index
+        while time.perf_counter() < stop_at:
+            url = urls[sequence % len(urls)]
+            params = scenarios[sequence % len(scenarios)]
+            sequence += concurrency
+
+            started = time.perf_counter()
+            try:
+                async with session.get(url, params=params) as response:
+                    body = await response.read()
+                    # Les fonctions masquent leurs erreurs en 200 + success: false
+                    failed = response.status == 200 and re.search(rb'"success":\s*false', body)
+                    status = 'failed' if failed else str(response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                status = 'error'
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+
+    completed = sum(statuses.values())
+    return {
+        'concurrency': concurrency,
+        'requests': completed,
+        'errors': completed - statuses.get('200', 0),
+        'statuses': dict(statuses),
+        'rps': round(completed / duration, 1),
+        **summarize(latencies)
+    }
+
+async def sample_memory(instances: List[FunctionInstance], stop: asyncio.Event, interval: float = 0.5):
+    while not stop.is_set():
+        for instance in instances:
+            instance.sample_memory()
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_target(target: str, args, env: Dict[str, str], upstream: Optional[str], log_dir: str) -> List[Dict]:
+    """Toutes les concurrences d'une fonction sur les mêmes instances (démarrées à froid)"""
+    scenarios = DEFAULT_SCENARIOS.get(target, [{}])
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    results = []
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=0)) as session:
+        instances: List[FunctionInstance] = []
+        if args.base_url:
+            urls = [f"{args.base_url.rstrip('/')}/{target}"]
+        else:
+            instances = [FunctionInstance(target, env, log_dir) for _ in range(args.instances)]
+            for instance in instances:
+                instance.start()
+            ready = await asyncio.gather(*(i.wait_ready(session, scenarios[0], args.startup_timeout) for i in instances))
+            if not all(ready):
+                tails = '\n'.join(i.log_tail() for i in instances)
+                for instance in instances:
+                    instance.stop()
+                raise RuntimeError(f"{target}: instance non démarrée\n{tails}")
+            urls = [instance.url for instance in instances]
+
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_memory(instances, stop))
+        try:
+            for concurrency in args.concurrency:
+                if args.warmup > 0:
+                    await drive_load(session, urls, scenarios, concurrency, args.warmup)
+                await upstream_request(session, upstream, 'reset', 'POST')
+                result = await drive_load(session, urls, scenarios, concurrency, args.duration)
+
+                upstream_stats = await upstream_request(session, upstream, 'stats')
+                upstream_calls = sum(sum(c.values()) for c in upstream_stats.values()) if upstream_stats else None
+                result['upstream_per_request'] = (
+                    round(upstream_calls / result['requests'], 2)
+                    if upstream_calls is not None and result['requests'] else None
+                )
+
+                rss = [i.sample_memory() for i in instances]
+                result['rss_mb'] = [r for r in rss if r is not None] or None
+                results.append({'target': target, **result})
+        finally:
+            stop.set()
+            await sampler
+            for instance in instances:
+                instance.stop()
+
+    startup = [i.startup_ms for i in instances if i.startup_ms is not None]
+    peak = [i.peak_rss_mb for i in instances if i.peak_rss_mb is not None]
+    for result in results:
+        result['startup_ms'] = max(startup) if startup else None
+        result['peak_rss_mb'] = max(peak) if peak else None
+    return results
+
+def seed_state(env: Dict[str, str]):
+    """Exécute les traitements planifiés une fois (sinon les fonctions HTTP prennent leur chemin de secours)"""
+    countries = load_main_constant('SUPPORTED_COUNTRIES') or ['FRA', 'US']
+    result = subprocess.run(
+        [sys.executable, '-c', SEED_STATE_SCRIPT, ','.join(countries)],
+        cwd=FUNCTIONS_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(f"Précalcul de l'état incomplet: {result.stderr.strip().splitlines()[-1:]}", file=sys.stderr)
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Régressions par rapport à une exécution de référence (p95, débit, démarrage, mémoire)"""
+    reference = {(r['target'], r['concurrency']): r for r in baseline}
+    regressions = []
+
+    for result in results:
+        base = reference.get((result['target'], result['concurrency']))
+        if not base:
+            continue
+        label = f"{result['target']} x{result['concurrency']}"
+        for metric in ('p95_ms', 'startup_ms', 'peak_rss_mb', 'upstream_per_request'):
+            if result.get(metric) is not None and base.get(metric):
+                if result[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(f"{label}: {metric} {base[metric]} -> {result[metric]}")
+        if base.get('rps') and result['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{label}: rps {base['rps']} -> {result['rps']}")
+    return regressions
+
+def print_report(results: List[Dict]):
+    def fmt(value, spec='.1f'):
+        return '-' if value is None else format(value, spec)
+
+    header = (f"{'Fonction':<24}{'Conc.':>6}{'Req.':>8}{'Err.':>6}{'RPS':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+              f"{'Démarrage':>11}{'RSS max':>9}{'Amont/req':>10}")
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['target']:<24}{r['concurrency']:>6}{r['requests']:>8}{r['errors']:>6}{fmt(r['rps']):>8}"
+              f"{fmt(r['p50_ms']):>9}{fmt(r['p95_ms']):>9}{fmt(r['p99_ms']):>9}"
+              f"{fmt(r['startup_ms'], '.0f'):>11}{fmt(r['peak_rss_mb']):>9}{fmt(r['upstream_per_request'], '.2f'):>10}")
+    print("Latences et démarrage en ms, RSS max par instance en Mo (processus et descendants)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Tests de charge des fonctions HTTP contre le serveur amont simulé')
+    parser.add_argument('targets', nargs='*', help='Fonctions à tester (défaut: toutes les fonctions HTTP)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Niveaux de concurrence')
+    parser.add_argument('--duration', type=float, default=20.0, help='Durée mesurée par niveau (s)')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Charge non mesurée avant chaque niveau (s)')
+    parser.add_argument('--instances', type=int, default=1, help='Instances (processus) par fonction')
+    parser.add_argument('--threads', type=int, default=8, help='Threads par instance (THREADS de functions-framework)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Timeout par requête (s)')
+    parser.add_argument('--startup-timeout', type=float, default=60.0, help='Délai max de démarrage (s)')
+    parser.add_argument('--base-url', help='Fonctions déjà servies (ex: émulateur), URL sans le nom de fonction')
+    parser.add_argument('--upstream', help='Serveur amont existant (défaut: mock_upstream.py lancé par le test)')
+    parser.add_argument('--upstream-latency-ms', type=float, default=80.0)
+    parser.add_argument('--upstream-jitter-ms', type=float, default=30.0)
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0)
+    parser.add_argument('--upstream-rate-limit', type=float, default=0.0, help='Requêtes / minute / source, 0 = illimité')
+    parser.add_argument('--no-seed', action='store_true', help='Ne pas précalculer snapshot / cotations / stress')
+    parser.add_argument('--output', help='Résultats JSON (référence pour --compare)')
+    parser.add_argument('--compare', help='Résultats JSON de référence')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Dégradation relative tolérée par --compare')
+    args = parser.parse_args()
+
+    http_targets = [t for t in (load_main_constant('_ENDPOINT_MODULES') or DEFAULT_SCENARIOS) if t in DEFAULT_SCENARIOS]
+    targets = args.targets or http_targets
+
+    mock = None
+    upstream = args.upstream
+    # Fonctions servies ailleurs (--base-url): leur amont est configuré de leur côté
+    if not upstream and not args.base_url:
+        mock = MockUpstreamProcess(args.upstream_latency_ms, args.upstream_jitter_ms, args.upstream_error_rate,
+                                   args.upstream_rate_limit, seed=42)
+        mock.start()
+        upstream = mock.url
+
+    state_dir = tempfile.mkdtemp(prefix='oracle-loadtest-')
+    env = {
+        **os.environ,
+        'UPSTREAM_BASE_URL': upstream or '',
+        'FRED_API_KEY': 'loadtest', 'EIA_API_KEY': 'loadtest', 'ALPHA_VANTAGE_API_KEY': 'loadtest',
+        'REGIME_SNAPSHOT_BACKEND': 'local', 'REGIME_SNAPSHOT_DIR': os.path.join(state_dir, 'regime_snapshots'),
+        'MARKET_QUOTES_BACKEND': 'local', 'MARKET_QUOTES_DIR': os.path.join(state_dir, 'market_quotes'),
+        'STRESS_INDEX_BACKEND': 'local', 'STRESS_INDEX_DIR': os.path.join(state_dir, 'stress_index'),
+        'WORKERS': '1', 'THREADS': str(args.threads),
+        'PYTHONUNBUFFERED': '1'
+    }
+
+    results: List[Dict] = []
+    try:
+        if mock and not mock.wait_ready():
+            raise RuntimeError("Serveur amont simulé non démarré (aiohttp installé ?)")
+        if not args.no_seed and not args.base_url:
+            seed_state(env)
+        for target in targets:
+            print(f"{target}: concurrence {args.concurrency}...", file=sys.stderr)
+            try:
+                results.extend(asyncio.run(run_target(target, args, env, upstream, state_dir)))
+            except RuntimeError as e:
+                print(str(e), file=sys.stderr)
+    finally:
+        if mock:
+            mock.stop()
+
+    print_report(results)
+    if not args.base_url:
+        print(f"Journaux des instances: {state_dir}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()